@@ -1,34 +1,162 @@
-from flask import Flask, request, jsonify, render_template, send_file
+from flask import Flask, Response, request, jsonify, render_template, send_file
 from flask_cors import CORS
+from shapely.geometry import mapping
+import hashlib
 import json
+import math
+import threading
+import time
 import folium
 from folium import plugins
 import os
-from read_osm import RoadNetworkGraph
+from read_osm import RoadNetworkGraph, ALGORITHMS, METRIC_ATTRIBUTES
+from concurrent.futures.process import BrokenProcessPool
+from compare_pool import ComparePool, run_summary
+from search_stream import stream_search
+from route_cache import RouteCache
 
 app = Flask(__name__)
 CORS(app)  # Cross-Origin Resource Sharing идэвхжүүлэх
 
+# Замын өгөгдөл - .parquet / .arrow (convert_roads.py-р хөрвүүлсэн) файлыг ч заана
+ROADS_PATH = "gis_osm_roads_free_1.shp"
+
+# 2-р зэргийн оройн гинжийг нэгтгэсэн (хялбаршуулсан) графаар хайх эсэх
+SIMPLIFY_GRAPH = True
+
 # Глобал хувьсагч - замын сүлжээ
 road_network = None
+network_error = None  # Сүүлийн ачааллын алдаа (/api/ready-д харуулна)
+
+# /api/compare-н worker процессууд (анх хэрэгтэй үед үүснэ)
+compare_pool = None
+
+# Compare pool-н процессын тоо (COMPARE_POOL_WORKERS орчны хувьсагч): байхгүй
+# бол алгоритмын тоо ба CPU-н тооны бага нь, 0 бол pool үүсгэхгүй -
+# алгоритмуудыг хүсэлтийн процесст дараалан ажиллуулна (gunicorn.conf.py)
+COMPARE_POOL_WORKERS = (int(os.environ['COMPARE_POOL_WORKERS'])
+                        if 'COMPARE_POOL_WORKERS' in os.environ else None)
+
+# python app.py үед графыг background-д ачаалах thread (/api/ready-д харуулна)
+_load_thread = None
+
+# /api/visualize-н зурсан газрын зургийн кэш (хүсэлтийн түлхүүр -> хариу)
+MAP_CACHE_SIZE = 64
+
+def _remove_map_file(key, response):
+    """Кэшээс хасагдсан газрын зургийн файлыг устгах (static/ хязгааргүй өсөхгүй)"""
+    try:
+        os.remove(os.path.join('static', os.path.basename(response['map_url'])))
+    except OSError:
+        pass  # Өөр процесс устгасан эсвэл дахин бичиж байна
+
+map_cache = RouteCache(maxsize=MAP_CACHE_SIZE, on_evict=_remove_map_file)
+
+# /api/matrix-н эхлэл, төгсгөлийн дээд тоо (тус бүр); CH бэлтгээгүй бол эхлэл
+# бүр тусдаа Dijkstra хийх тул эхлэлийн тоог илүү хязгаарлана
+MATRIX_MAX_POINTS = 500
+MATRIX_MAX_SOURCES_WITHOUT_CH = 100
+
+# /api/search/batch-н хосын дээд тоо
+BATCH_MAX_PAIRS = 1000
+
+# Газрын зурагт зурах хайсан оройн дээд тоо (илүү бол жигд алгасаж сонгоно)
+MAP_MAX_VISITED = 20000
+
+# Зэрэг ирсэн эхний хүсэлтүүд графыг давхар ачаалахаас сэргийлнэ
+_init_lock = threading.Lock()
 
 def initialize_network():
-    """Замын сүлжээг эхлүүлэх"""
-    global road_network
-    if road_network is None:
+    """Замын сүлжээг эхлүүлэх (thread-safe - зөвхөн нэг удаа ачаална)"""
+    global road_network, network_error
+    if road_network is not None:
+        return
+    with _init_lock:
+        if road_network is not None:
+            return
         try:
             print("Замын сүлжээг ачаалж байна...")
-            road_network = RoadNetworkGraph("gis_osm_roads_free_1.shp")
+            road_network = RoadNetworkGraph(ROADS_PATH, simplify=SIMPLIFY_GRAPH)
+            network_error = None
             print("Амжилттай ачаалагдлаа!")
         except Exception as e:
+            network_error = str(e)
             print(f"Алдаа: {e}")
             raise Exception(f"Shapefile уншихад алдаа: {str(e)}")
 
+def start_network_loading():
+    """
+    Графыг (KD-tree, STRtree-тай нь) background thread-д ачаалж эхлүүлэх
+
+    Сервер шууд хүсэлт хүлээн авч, /api/ready ачаалал дуустал 'loading' буцаана.
+    """
+    global _load_thread
+
+    def load():
+        try:
+            initialize_network()
+            road_network.build_indexes()
+        except Exception:
+            pass  # Алдааг network_error-р /api/ready харуулна
+
+    _load_thread = threading.Thread(target=load, daemon=True)
+    _load_thread.start()
+
+def get_compare_pool():
+    """
+    Алгоритмуудыг зэрэг ажиллуулах процессын pool (графын snapshot-г ачаалсны дараа)
+
+    Returns:
+        ComparePool эсвэл COMPARE_POOL_WORKERS == 0 бол None
+    """
+    global compare_pool
+    if COMPARE_POOL_WORKERS == 0:
+        return None
+    with _init_lock:
+        if compare_pool is None:
+            compare_pool = ComparePool(road_network.shapefile_path, workers=COMPARE_POOL_WORKERS,
+                                       options=road_network.build_options())
+    return compare_pool
+
+def reset_compare_pool(pool):
+    """Унасан pool-г хаях - дараагийн хүсэлт get_compare_pool()-р шинийг үүсгэнэ"""
+    global compare_pool
+    with _init_lock:
+        if compare_pool is pool:
+            compare_pool = None
+    pool.shutdown()
+
 @app.route('/')
 def index():
     """Үндсэн хуудас"""
     return render_template('index.html')
 
+@app.route('/api/ready', methods=['GET'])
+def readiness():
+    """
+    Readiness шалгалт - граф ачаалагдсан бол 200, үгүй бол 503
+
+    Графыг ачаалахгүй тул load balancer ачаалал дуусахаас өмнө хүсэлт илгээхгүй.
+    Ачаалал эхлээгүй (wsgi.py, start_network_loading-гүй) бол 'not_started' -
+    эхний API хүсэлт графыг ачаална.
+    """
+    if road_network is None:
+        if network_error:
+            status, message = 'error', network_error
+        elif _load_thread is not None or _init_lock.locked():
+            status, message = 'loading', 'Граф ачаалагдаж байна'
+        else:
+            status, message = 'not_started', 'Граф ачаалагдаагүй (эхний хүсэлт ачаална)'
+        return jsonify({
+            'status': status,
+            'message': message
+        }), 503
+    return jsonify({
+        'status': 'ready',
+        'nodes': road_network.node_count,
+        'edges': road_network.edge_count
+    })
+
 @app.route('/api/info', methods=['GET'])
 def get_graph_info():
     """Графын ерөнхий мэдээлэл авах"""
@@ -39,14 +167,27 @@ def get_graph_info():
             'status': 'error',
             'message': f'Shapefile ачаалахад алдаа: {str(e)}. Бүх файлууд байгаа эсэхийг шалгана уу (.shp, .shx, .dbf)'
         }), 500
-    G = road_network.get_graph()
-
     return jsonify({
-        'nodes': G.number_of_nodes(),
-        'edges': G.number_of_edges(),
+        'nodes': road_network.node_count,
+        'edges': road_network.edge_count,
+        'components': road_network.component_info(),
+        'merge': road_network.tables['merge'],
+        'edge_bytes': road_network.edge_memory,
         'status': 'success'
     })
 
+@app.route('/api/cache', methods=['GET'])
+def get_cache_stats():
+    """Хайлтын үр дүнгийн LRU кэшийн статистик (hit, miss, eviction)"""
+    try:
+        initialize_network()
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': f'Shapefile ачаалахад алдаа: {str(e)}. Бүх файлууд байгаа эсэхийг шалгана уу (.shp, .shx, .dbf)'
+        }), 500
+    return jsonify(dict(road_network.route_cache.stats(), status='success'))
+
 @app.route('/api/search', methods=['POST'])
 def search_path():
     """
@@ -54,12 +195,18 @@ def search_path():
 
     Request body:
     {
-        "algorithm": "bfs" | "dfs" | "dijkstra",
+        "algorithm": "bfs" | "dfs" | "dijkstra" | "astar" | "bidirectional" | "ch" | "alt",
         "start_lat": float,
         "start_lon": float,
         "end_lat": float,
-        "end_lon": float
+        "end_lon": float,
+        "metric": "distance" | "time"  (заавал биш, анхдагч нь distance),
+        "largest_component": bool  (заавал биш - true бол цэгүүдийг хамгийн том
+                                    хүчтэй холбоост бүрэлдэхүүн дээр буулгана)
     }
+
+    Эхлэл, төгсгөл графын холбогдоогүй хэсгүүдэд байвал хайлт хийлгүйгээр
+    found: false буцаана.
     """
     try:
         initialize_network()
@@ -75,10 +222,18 @@ def search_path():
     start_lon = float(data.get('start_lon'))
     end_lat = float(data.get('end_lat'))
     end_lon = float(data.get('end_lon'))
+    metric = data.get('metric', 'distance')
+    largest_component = bool(data.get('largest_component', False))
+
+    if metric not in METRIC_ATTRIBUTES:
+        return jsonify({
+            'status': 'error',
+            'message': 'Буруу хэмжүүр (distance эсвэл time)'
+        }), 400
 
-    # Хамгийн ойр оройнуудыг олох
-    start_node = road_network.find_nearest_node(start_lat, start_lon)
-    end_node = road_network.find_nearest_node(end_lat, end_lon)
+    # Цэгүүдийг хамгийн ойр замын сегмент дээр буулгах
+    start_node, end_node = road_network.snap_points(
+        [start_lat, end_lat], [start_lon, end_lon], largest_component)
 
     if start_node is None or end_node is None:
         return jsonify({
@@ -86,18 +241,25 @@ def search_path():
             'message': 'Орой олдсонгүй'
         }), 400
 
-    # Алгоритм сонгох
-    if algorithm == 'bfs':
-        result = road_network.bfs(start_node, end_node)
-    elif algorithm == 'dfs':
-        result = road_network.dfs(start_node, end_node)
-    elif algorithm == 'dijkstra':
-        result = road_network.dijkstra(start_node, end_node)
-    else:
+    # Алгоритм шалгах
+    if algorithm not in ALGORITHMS:
         return jsonify({
             'status': 'error',
             'message': 'Буруу алгоритм'
         }), 400
+    if algorithm == 'ch' and metric not in road_network.contraction_hierarchies:
+        return jsonify({
+            'status': 'error',
+            'message': f'Contraction Hierarchies ({metric}) бэлтгэгдээгүй байна (python contraction_hierarchy.py)'
+        }), 400
+    if algorithm == 'alt' and metric not in road_network.landmarks:
+        return jsonify({
+            'status': 'error',
+            'message': f'ALT landmark ({metric}) бэлтгэгдээгүй байна (python landmarks.py)'
+        }), 400
+
+    # Давтагдсан хайлтыг кэшээс авна
+    result = road_network.search(algorithm, start_node, end_node, metric)
 
     # Координатуудыг буцаах
     path_coords = [[node[1], node[0]] for node in result['path']]  # [lat, lon]
@@ -106,12 +268,182 @@ def search_path():
     return jsonify({
         'status': 'success',
         'algorithm': algorithm,
+        'metric': metric,
         'found': result['found'],
         'path': path_coords,
         'visited': visited_coords,
         'distance': round(result['distance'], 2),
+        'time': round(result['time'], 2),
         'path_length': len(result['path']),
-        'visited_count': len(result['visited'])
+        'visited_count': result['visited_count']
+    })
+
+@app.route('/api/search/stream', methods=['POST'])
+def search_stream():
+    """
+    Зам хайх явцыг NDJSON (мөр бүр нэг JSON) хэлбэрээр дамжуулах
+
+    Request body: /api/search-тэй ижил
+
+    Хайлт ажиллаж байх үед хайсан оройнуудыг багцаар илгээж, эцэст нь
+    үр дүнг илгээнэ:
+    {"type": "visited", "nodes": [[lat, lon], ...], "count": int}
+    ...
+    {"type": "result", "status": "success", "found": bool, "path": [...], ...}
+    Хайлтын үеийн алдаа: {"type": "error", "status": "error", "message": str}
+    """
+    try:
+        initialize_network()
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': f'Shapefile ачаалахад алдаа: {str(e)}. Бүх файлууд байгаа эсэхийг шалгана уу (.shp, .shx, .dbf)'
+        }), 500
+
+    data = request.json
+    algorithm = data.get('algorithm', 'dijkstra')
+    start_lat = float(data.get('start_lat'))
+    start_lon = float(data.get('start_lon'))
+    end_lat = float(data.get('end_lat'))
+    end_lon = float(data.get('end_lon'))
+    metric = data.get('metric', 'distance')
+    largest_component = bool(data.get('largest_component', False))
+
+    if metric not in METRIC_ATTRIBUTES:
+        return jsonify({
+            'status': 'error',
+            'message': 'Буруу хэмжүүр (distance эсвэл time)'
+        }), 400
+
+    # Цэгүүдийг хамгийн ойр замын сегмент дээр буулгах
+    start_node, end_node = road_network.snap_points(
+        [start_lat, end_lat], [start_lon, end_lon], largest_component)
+
+    if start_node is None or end_node is None:
+        return jsonify({
+            'status': 'error',
+            'message': 'Орой олдсонгүй'
+        }), 400
+
+    # Алгоритм шалгах
+    if algorithm not in ALGORITHMS:
+        return jsonify({
+            'status': 'error',
+            'message': 'Буруу алгоритм'
+        }), 400
+    if algorithm == 'ch' and metric not in road_network.contraction_hierarchies:
+        return jsonify({
+            'status': 'error',
+            'message': f'Contraction Hierarchies ({metric}) бэлтгэгдээгүй байна (python contraction_hierarchy.py)'
+        }), 400
+    if algorithm == 'alt' and metric not in road_network.landmarks:
+        return jsonify({
+            'status': 'error',
+            'message': f'ALT landmark ({metric}) бэлтгэгдээгүй байна (python landmarks.py)'
+        }), 400
+
+    def generate():
+        count = 0
+        for kind, payload in stream_search(road_network, algorithm, start_node, end_node, metric):
+            if kind == 'visited':
+                count += len(payload)
+                event = {
+                    'type': 'visited',
+                    'nodes': [[node[1], node[0]] for node in payload],  # [lat, lon]
+                    'count': count
+                }
+            elif kind == 'result':
+                event = {
+                    'type': 'result',
+                    'status': 'success',
+                    'algorithm': algorithm,
+                    'metric': metric,
+                    'found': payload['found'],
+                    'path': [[node[1], node[0]] for node in payload['path']],
+                    'distance': round(payload['distance'], 2),
+                    'time': round(payload['time'], 2),
+                    'path_length': len(payload['path']),
+                    'visited_count': payload['visited_count']
+                }
+            else:
+                event = {'type': 'error', 'status': 'error', 'message': payload}
+            yield json.dumps(event, ensure_ascii=False) + '\n'
+
+    # Proxy (nginx) хариуг буферлэхгүй байх
+    return Response(generate(), mimetype='application/x-ndjson',
+                    headers={'X-Accel-Buffering': 'no', 'Cache-Control': 'no-cache'})
+
+@app.route('/api/search/batch', methods=['POST'])
+def search_batch():
+    """
+    Олон эхлэл-төгсгөлийн хосын замыг нэг хүсэлтээр хайх (Dijkstra)
+
+    Бүх цэгийг нэг дор буулгаж, ижил эхлэлтэй хосуудад нэг хайлтын мод ашиглана.
+
+    Request body:
+    {
+        "pairs": [{"start_lat": float, "start_lon": float, "end_lat": float, "end_lon": float}, ...],
+        "metric": "distance" | "time"  (заавал биш, анхдагч нь distance)
+    }
+    """
+    try:
+        initialize_network()
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': f'Shapefile ачаалахад алдаа: {str(e)}. Бүх файлууд байгаа эсэхийг шалгана уу (.shp, .shx, .dbf)'
+        }), 500
+
+    data = request.json
+    metric = data.get('metric', 'distance')
+
+    if metric not in METRIC_ATTRIBUTES:
+        return jsonify({
+            'status': 'error',
+            'message': 'Буруу хэмжүүр (distance эсвэл time)'
+        }), 400
+
+    try:
+        pairs = [(float(pair['start_lat']), float(pair['start_lon']),
+                  float(pair['end_lat']), float(pair['end_lon']))
+                 for pair in data.get('pairs') or []]
+    except (KeyError, TypeError, ValueError):
+        pairs = []
+
+    if not pairs:
+        return jsonify({
+            'status': 'error',
+            'message': 'pairs-г [{start_lat, start_lon, end_lat, end_lon}, ...] хэлбэрээр өгнө үү'
+        }), 400
+
+    if len(pairs) > BATCH_MAX_PAIRS:
+        return jsonify({
+            'status': 'error',
+            'message': f'Хэт олон хос ({len(pairs)}) - хамгийн ихдээ {BATCH_MAX_PAIRS}'
+        }), 400
+
+    start_time = time.time()
+
+    # Бүх эхлэл, төгсгөлийг нэг дор замын сегмент дээр буулгах
+    start_lats, start_lons, end_lats, end_lons = zip(*pairs)
+    snapped = road_network.snap_points(start_lats + end_lats, start_lons + end_lons)
+    results, search_count = road_network.search_batch(
+        list(zip(snapped[:len(pairs)], snapped[len(pairs):])), metric)
+
+    batch_time = (time.time() - start_time) * 1000
+
+    return jsonify({
+        'status': 'success',
+        'metric': metric,
+        'results': [{
+            'found': result['found'],
+            'path': [[node[1], node[0]] for node in result['path']],  # [lat, lon]
+            'distance': round(result['distance'], 2),
+            'time': round(result['time'], 2),
+            'path_length': len(result['path'])
+        } for result in results],
+        'search_count': search_count,
+        'execution_time_ms': round(batch_time, 2)
     })
 
 @app.route('/api/visualize', methods=['POST'])
@@ -119,7 +451,7 @@ def visualize_path():
     """
     Замыг газрын зураг дээр харуулах
 
-    Request body: same as /api/search
+    Request body: same as /api/search (metric-г оруулаад)
     """
     try:
         initialize_network()
@@ -135,10 +467,18 @@ def visualize_path():
     start_lon = float(data.get('start_lon'))
     end_lat = float(data.get('end_lat'))
     end_lon = float(data.get('end_lon'))
+    metric = data.get('metric', 'distance')
+    largest_component = bool(data.get('largest_component', False))
+
+    if metric not in METRIC_ATTRIBUTES:
+        return jsonify({
+            'status': 'error',
+            'message': 'Буруу хэмжүүр (distance эсвэл time)'
+        }), 400
 
-    # Хамгийн ойр оройнуудыг олох
-    start_node = road_network.find_nearest_node(start_lat, start_lon)
-    end_node = road_network.find_nearest_node(end_lat, end_lon)
+    # Цэгүүдийг хамгийн ойр замын сегмент дээр буулгах
+    start_node, end_node = road_network.snap_points(
+        [start_lat, end_lat], [start_lon, end_lon], largest_component)
 
     if start_node is None or end_node is None:
         return jsonify({
@@ -146,13 +486,26 @@ def visualize_path():
             'message': 'Орой олдсонгүй'
         }), 400
 
-    # Алгоритм ажиллуулах
-    if algorithm == 'bfs':
-        result = road_network.bfs(start_node, end_node)
-    elif algorithm == 'dfs':
-        result = road_network.dfs(start_node, end_node)
-    else:
-        result = road_network.dijkstra(start_node, end_node)
+    # Алгоритм ажиллуулах (бэлтгэгдээгүй/буруу бол Dijkstra)
+    search_algorithm = algorithm
+    if algorithm not in ALGORITHMS \
+            or (algorithm == 'ch' and metric not in road_network.contraction_hierarchies) \
+            or (algorithm == 'alt' and metric not in road_network.landmarks):
+        search_algorithm = 'dijkstra'
+
+    # Ижил хүсэлтийн газрын зургийг дахин зурахгүй
+    key = (search_algorithm, metric, largest_component, start_lat, start_lon, end_lat, end_lon)
+    map_filename = f"map_{search_algorithm}_{hashlib.sha1(repr(key).encode()).hexdigest()[:16]}.html"
+    map_path = os.path.join('static', map_filename)
+    cached = map_cache.get(key)
+    if cached is not None and os.path.exists(map_path):
+        return jsonify(dict(cached, cached=True))
+
+    # Хайсан бүх оройг зурах тул (кэш эхнийхийг л хадгална) кэшгүйгээр хайна -
+    # давтан хүсэлтийг map_cache хариулна
+    start_time = time.perf_counter()
+    result = road_network.run_algorithm(search_algorithm, start_node, end_node, metric)
+    search_time = (time.perf_counter() - start_time) * 1000
 
     if not result['found']:
         return jsonify({
@@ -160,34 +513,81 @@ def visualize_path():
             'message': 'Зам олдсонгүй'
         }), 404
 
-    # Folium газрын зураг үүсгэх
+    start_time = time.perf_counter()
+    route_map = _route_map(result, search_algorithm, start_lat, start_lon, end_lat, end_lon)
+
+    # Файл бүр хүсэлтийн түлхүүрээр нэрлэгдэх тул зэрэг хүсэлтүүд бие биеийнхийг дарахгүй;
+    # хагас бичигдсэн файл харагдахгүйн тулд түр файлаас солино
+    os.makedirs('static', exist_ok=True)
+    temp_path = f'{map_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    route_map.save(temp_path)
+    os.replace(temp_path, map_path)
+    render_time = (time.perf_counter() - start_time) * 1000
+
+    response = {
+        'status': 'success',
+        'map_url': f'/static/{map_filename}',
+        'metric': metric,
+        'distance': round(result['distance'], 2),
+        'time': round(result['time'], 2),
+        'path_length': len(result['path']),
+        'visited_count': len(result['visited']),
+        'search_time_ms': round(search_time, 2),
+        'render_time_ms': round(render_time, 2)
+    }
+    map_cache.put(key, response)
+    return jsonify(dict(response, cached=False))
+
+def _route_map(result, algorithm, start_lat, start_lon, end_lat, end_lon):
+    """
+    Хайсан оройнууд болон замыг нэг GeoJSON давхарга болгон Folium газрын зураг үүсгэх
+
+    Орой бүрт тусдаа marker үүсгэхийн оронд нэг MultiPoint, нэг LineString
+    бүхий FeatureCollection-г canvas дээр зурна.
+    """
     center_lat = (start_lat + end_lat) / 2
     center_lon = (start_lon + end_lon) / 2
-    m = folium.Map(location=[center_lat, center_lon], zoom_start=13)
-
-    # Хайсан оройнуудыг харуулах (бүдэг цэгүүд)
-    visited_coords = [[node[1], node[0]] for node in result['visited'][:500]]
-    if visited_coords:
-        for coord in visited_coords:
-            folium.CircleMarker(
-                location=coord,
-                radius=2,
-                color='orange',
-                fill=True,
-                fillOpacity=0.3,
-                popup='Хайсан'
-            ).add_to(m)
-
-    # Олдсон замыг харуулах (улаан шугам)
-    path_coords = [[node[1], node[0]] for node in result['path']]
-    if path_coords:
-        folium.PolyLine(
-            path_coords,
-            color='red',
-            weight=5,
-            opacity=0.8,
-            popup=f"{algorithm.upper()} - {result['distance']:.2f} км"
-        ).add_to(m)
+    m = folium.Map(location=[center_lat, center_lon], zoom_start=13, prefer_canvas=True)
+
+    # GeoJSON нь [lon, lat] дараалалтай - үр дүнгийн (lon, lat)-г шууд ашиглана
+    visited = result['visited']
+    step = max(1, math.ceil(len(visited) / MAP_MAX_VISITED))
+    features = {
+        'type': 'FeatureCollection',
+        'features': [
+            {
+                'type': 'Feature',
+                'geometry': {
+                    'type': 'MultiPoint',
+                    'coordinates': [[round(lon, 6), round(lat, 6)] for lon, lat in visited[::step]]
+                },
+                'properties': {'kind': 'visited', 'label': 'Хайсан'}
+            },
+            {
+                'type': 'Feature',
+                'geometry': {
+                    'type': 'LineString',
+                    'coordinates': [[round(lon, 6), round(lat, 6)] for lon, lat in result['path']]
+                },
+                'properties': {
+                    'kind': 'path',
+                    'label': f"{algorithm.upper()} - {result['distance']:.2f} км, {result['time']:.1f} мин"
+                }
+            }
+        ]
+    }
+
+    def style(feature):
+        if feature['properties']['kind'] == 'path':
+            return {'color': 'red', 'weight': 5, 'opacity': 0.8}
+        return {'color': 'orange', 'fillColor': 'orange', 'weight': 1, 'fillOpacity': 0.3}
+
+    folium.GeoJson(
+        features,
+        style_function=style,
+        marker=folium.CircleMarker(radius=2),
+        tooltip=folium.GeoJsonTooltip(fields=['label'], labels=False)
+    ).add_to(m)
 
     # Эхлэх болон төгсгөх цэгүүд
     folium.Marker(
@@ -202,22 +602,15 @@ def visualize_path():
         icon=folium.Icon(color='red', icon='stop')
     ).add_to(m)
 
-    # HTML файл үүсгэх
-    map_filename = f'map_{algorithm}.html'
-    map_path = os.path.join('static', map_filename)
-    os.makedirs('static', exist_ok=True)
-    m.save(map_path)
-
-    return jsonify({
-        'status': 'success',
-        'map_url': f'/static/{map_filename}',
-        'distance': round(result['distance'], 2),
-        'path_length': len(result['path'])
-    })
+    return m
 
 @app.route('/api/compare', methods=['POST'])
 def compare_algorithms():
-    """3 алгоритмыг харьцуулах"""
+    """
+    Алгоритмуудыг харьцуулах (BFS/DFS жин харгалзахгүй, бусад нь metric-р)
+
+    Request body: /api/search-тэй ижил (algorithm-с бусад)
+    """
     try:
         initialize_network()
     except Exception as e:
@@ -231,10 +624,18 @@ def compare_algorithms():
     start_lon = float(data.get('start_lon'))
     end_lat = float(data.get('end_lat'))
     end_lon = float(data.get('end_lon'))
+    metric = data.get('metric', 'distance')
+    largest_component = bool(data.get('largest_component', False))
 
-    # Хамгийн ойр оройнуудыг олох
-    start_node = road_network.find_nearest_node(start_lat, start_lon)
-    end_node = road_network.find_nearest_node(end_lat, end_lon)
+    if metric not in METRIC_ATTRIBUTES:
+        return jsonify({
+            'status': 'error',
+            'message': 'Буруу хэмжүүр (distance эсвэл time)'
+        }), 400
+
+    # Цэгүүдийг хамгийн ойр замын сегмент дээр буулгах
+    start_node, end_node = road_network.snap_points(
+        [start_lat, end_lat], [start_lon, end_lon], largest_component)
 
     if start_node is None or end_node is None:
         return jsonify({
@@ -242,55 +643,199 @@ def compare_algorithms():
             'message': 'Орой олдсонгүй'
         }), 400
 
-    # 3 алгоритм ажиллуулах
-    import time
+    # Алгоритмуудыг worker процессуудад зэрэг ажиллуулах (хугацааг worker дотор хэмжинэ)
+    algorithms = ['bfs', 'dfs', 'dijkstra', 'astar', 'bidirectional']
+    if metric in road_network.contraction_hierarchies:
+        algorithms.append('ch')  # Урьдчилан бэлтгэсэн үед
+    if metric in road_network.landmarks:
+        algorithms.append('alt')
+
+    start_time = time.time()
+    pool = get_compare_pool()
+    summaries = None
+    if pool is not None:
+        try:
+            summaries = pool.run(algorithms, start_node, end_node, metric)
+        except BrokenProcessPool:
+            # Worker унасан (жишээ нь санах ой хүрээгүй) - pool-г шинэчилж энэ
+            # хүсэлтийг үндсэн процесст дараалан ажиллуулна
+            print("Compare pool унасан тул дахин үүсгэнэ")
+            reset_compare_pool(pool)
+    if summaries is None:
+        summaries = [run_summary(road_network, algorithm, start_node, end_node, metric)
+                     for algorithm in algorithms]
+    total_time = (time.time() - start_time) * 1000
 
     results = {}
+    for algorithm, summary in zip(algorithms, summaries):
+        if summary is None:
+            continue
+        results[algorithm] = {
+            'found': summary['found'],
+            'distance': round(summary['distance'], 2),
+            'time': round(summary['time'], 2),
+            'path_length': summary['path_length'],
+            'visited_count': summary['visited_count'],
+            'execution_time_ms': round(summary['execution_time_ms'], 2)
+        }
+
+    # Dijkstra-с хэдэн оройгоор цөөн хайсан
+    dijkstra_visited = results['dijkstra']['visited_count']
+    for algorithm in ('astar', 'bidirectional', 'ch', 'alt'):
+        if algorithm in results:
+            results[algorithm]['visited_saved_vs_dijkstra'] = \
+                dijkstra_visited - results[algorithm]['visited_count']
 
-    # BFS
-    start_time = time.time()
-    bfs_result = road_network.bfs(start_node, end_node)
-    bfs_time = (time.time() - start_time) * 1000  # миллисекунд
-
-    results['bfs'] = {
-        'found': bfs_result['found'],
-        'distance': round(bfs_result['distance'], 2),
-        'path_length': len(bfs_result['path']),
-        'visited_count': len(bfs_result['visited']),
-        'execution_time_ms': round(bfs_time, 2)
+    return jsonify({
+        'status': 'success',
+        'metric': metric,
+        'results': results,
+        'total_time_ms': round(total_time, 2)  # Зэрэг ажилласан нийт хугацаа
+    })
+
+@app.route('/api/matrix', methods=['POST'])
+def distance_matrix():
+    """
+    Олон эхлэл, олон төгсгөлийн хоорондох зай (эсвэл хугацааны) матриц
+
+    Request body:
+    {
+        "sources": [[lat, lon], ...],
+        "targets": [[lat, lon], ...],
+        "metric": "distance" | "time"  (заавал биш, анхдагч нь distance)
     }
 
-    # DFS
+    matrix[i][j] нь sources[i]-с targets[j] хүртэлх км эсвэл минут (зам байхгүй бол null)
+    """
+    try:
+        initialize_network()
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': f'Shapefile ачаалахад алдаа: {str(e)}. Бүх файлууд байгаа эсэхийг шалгана уу (.shp, .shx, .dbf)'
+        }), 500
+
+    data = request.json
+    metric = data.get('metric', 'distance')
+
+    if metric not in METRIC_ATTRIBUTES:
+        return jsonify({
+            'status': 'error',
+            'message': 'Буруу хэмжүүр (distance эсвэл time)'
+        }), 400
+
+    try:
+        sources = [(float(lat), float(lon)) for lat, lon in data.get('sources') or []]
+        targets = [(float(lat), float(lon)) for lat, lon in data.get('targets') or []]
+    except (TypeError, ValueError):
+        sources = targets = []
+
+    if not sources or not targets:
+        return jsonify({
+            'status': 'error',
+            'message': 'sources, targets-г [[lat, lon], ...] хэлбэрээр өгнө үү'
+        }), 400
+
+    if len(sources) > MATRIX_MAX_POINTS or len(targets) > MATRIX_MAX_POINTS:
+        return jsonify({
+            'status': 'error',
+            'message': f'Хэт олон цэг - sources, targets тус бүр хамгийн ихдээ {MATRIX_MAX_POINTS}'
+        }), 400
+    if metric not in road_network.contraction_hierarchies \
+            and len(sources) > MATRIX_MAX_SOURCES_WITHOUT_CH:
+        return jsonify({
+            'status': 'error',
+            'message': f'Contraction Hierarchies ({metric}) бэлтгээгүй үед sources хамгийн ихдээ '
+                       f'{MATRIX_MAX_SOURCES_WITHOUT_CH} (python contraction_hierarchy.py)'
+        }), 400
+
     start_time = time.time()
-    dfs_result = road_network.dfs(start_node, end_node)
-    dfs_time = (time.time() - start_time) * 1000
-
-    results['dfs'] = {
-        'found': dfs_result['found'],
-        'distance': round(dfs_result['distance'], 2),
-        'path_length': len(dfs_result['path']),
-        'visited_count': len(dfs_result['visited']),
-        'execution_time_ms': round(dfs_time, 2)
+
+    # Бүх цэгийг нэг дор замын сегмент дээр буулгах
+    source_points = road_network.snap_points(*zip(*sources))
+    target_points = road_network.snap_points(*zip(*targets))
+    matrix = road_network.distance_matrix(source_points, target_points, metric)
+
+    matrix_time = (time.time() - start_time) * 1000
+
+    return jsonify({
+        'status': 'success',
+        'metric': metric,
+        'method': 'ch' if metric in road_network.contraction_hierarchies else 'dijkstra',
+        'matrix': [[round(value, 2) if math.isfinite(value) else None for value in row]
+                   for row in matrix.tolist()],
+        'execution_time_ms': round(matrix_time, 2)
+    })
+
+@app.route('/api/isochrone', methods=['POST'])
+def isochrone():
+    """
+    Цэгээс өгсөн хугацаа/зайн дотор хүрэх бүсүүд (isochrone)
+
+    Request body:
+    {
+        "lat": float,
+        "lon": float,
+        "budgets": [5, 10, 15],
+        "metric": "time" | "distance"  (заавал биш, анхдагч нь time - минут)
     }
+    """
+    try:
+        initialize_network()
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': f'Shapefile ачаалахад алдаа: {str(e)}. Бүх файлууд байгаа эсэхийг шалгана уу (.shp, .shx, .dbf)'
+        }), 500
+
+    data = request.json
+    metric = data.get('metric', 'time')
+
+    if metric not in METRIC_ATTRIBUTES:
+        return jsonify({
+            'status': 'error',
+            'message': 'Буруу хэмжүүр (distance эсвэл time)'
+        }), 400
+
+    try:
+        lat = float(data.get('lat'))
+        lon = float(data.get('lon'))
+        # Өсөх дарааллаар - клиент бүсүүдийг томоос нь эхэлж зурж, өнгийг дарааллаар өгнө
+        budgets = sorted(float(budget) for budget in data.get('budgets') or [])
+    except (TypeError, ValueError):
+        budgets = []
+
+    if not budgets or min(budgets) <= 0:
+        return jsonify({
+            'status': 'error',
+            'message': 'lat, lon болон эерэг budgets-г өгнө үү'
+        }), 400
 
-    # Dijkstra
     start_time = time.time()
-    dijkstra_result = road_network.dijkstra(start_node, end_node)
-    dijkstra_time = (time.time() - start_time) * 1000
-
-    results['dijkstra'] = {
-        'found': dijkstra_result['found'],
-        'distance': round(dijkstra_result['distance'], 2),
-        'path_length': len(dijkstra_result['path']),
-        'visited_count': len(dijkstra_result['visited']),
-        'execution_time_ms': round(dijkstra_time, 2)
-    }
+    start_node = road_network.snap_point(lat, lon)
+    isochrones = road_network.isochrones(start_node, budgets, metric)
+    isochrone_time = (time.time() - start_time) * 1000
+
+    if isochrones is None:
+        return jsonify({
+            'status': 'error',
+            'message': 'Орой олдсонгүй'
+        }), 400
 
     return jsonify({
         'status': 'success',
-        'results': results
+        'metric': metric,
+        'isochrones': [{
+            'budget': result['budget'],
+            'reachable_nodes': result['reachable_nodes'],
+            'geometry': mapping(result['polygon'])  # GeoJSON [lon, lat]
+        } for result in isochrones],
+        'execution_time_ms': round(isochrone_time, 2)
     })
 
 if __name__ == '__main__':
+    # Reloader-н эцэг процесс биш, серверийг ажиллуулах процесст л ачаална
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_network_loading()
     app.run(debug=True, host='0.0.0.0', port=3000)
 
@@ -0,0 +1,424 @@
+"""
+Гүйцэтгэлийн benchmark скрипт
+
+Хайлтын хэрэгжүүлэлтүүдийн хугацаа, санах ойг урт аялалын (хол зайн) хосууд
+дээр хэмжинэ.
+
+Ажиллуулах:
+    python benchmark.py
+"""
+
+from read_osm import RoadNetworkGraph
+from convert_roads import convert_roads
+from collections import deque
+import heapq
+import os
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+
+
+# ---------------------------------------------------------------------------
+# Харьцуулах зорилгоор хадгалсан хуучин хэрэгжүүлэлт: дараалал/стэк/heap-н
+# элемент бүр замын бүтэн хуулбарыг (path + [neighbor]) авч явна.
+# ---------------------------------------------------------------------------
+
+def bfs_path_copy(graph, start_node, end_node):
+    """Замын хуулбар хадгалдаг BFS"""
+    queue = deque([(start_node, [start_node])])
+    visited = set()
+
+    while queue:
+        current_node, path = queue.popleft()
+        if current_node in visited:
+            continue
+        visited.add(current_node)
+        if current_node == end_node:
+            return path
+        for neighbor in graph.neighbors(current_node):
+            if neighbor not in visited:
+                queue.append((neighbor, path + [neighbor]))
+    return []
+
+
+def dfs_path_copy(graph, start_node, end_node):
+    """Замын хуулбар хадгалдаг DFS"""
+    stack = [(start_node, [start_node])]
+    visited = set()
+
+    while stack:
+        current_node, path = stack.pop()
+        if current_node in visited:
+            continue
+        visited.add(current_node)
+        if current_node == end_node:
+            return path
+        for neighbor in reversed(list(graph.neighbors(current_node))):
+            if neighbor not in visited:
+                stack.append((neighbor, path + [neighbor]))
+    return []
+
+
+def dijkstra_path_copy(graph, start_node, end_node):
+    """Замын хуулбар хадгалдаг Dijkstra"""
+    pq = [(0, start_node, [start_node])]
+    distances = {start_node: 0}
+    visited = set()
+
+    while pq:
+        current_dist, current_node, path = heapq.heappop(pq)
+        if current_node in visited:
+            continue
+        visited.add(current_node)
+        if current_node == end_node:
+            return path
+        for neighbor in graph.neighbors(current_node):
+            if neighbor not in visited:
+                new_dist = current_dist + graph[current_node][neighbor].get('weight', 0)
+                if neighbor not in distances or new_dist < distances[neighbor]:
+                    distances[neighbor] = new_dist
+                    heapq.heappush(pq, (new_dist, neighbor, path + [neighbor]))
+    return []
+
+
+def measure(func, *args, repeat=3):
+    """
+    Функцийн хугацаа (мс, хамгийн бага нь) ба санах ойн оргил (МБ)
+
+    tracemalloc хугацааг удаашруулдаг тул санах ойг тусдаа ажиллуулалтаар хэмжинэ.
+    """
+    elapsed_ms = float('inf')
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        result = func(*args)
+        elapsed_ms = min(elapsed_ms, (time.perf_counter() - start_time) * 1000)
+
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed_ms, peak / (1024 * 1024)
+
+
+def long_od_pairs(road_network, count=3, sample_size=300, seed=0):
+    """
+    Хол зайн эхлэл-төгсгөлийн (OD) хосуудыг сонгох
+
+    Санамсаргүй оройнуудаас шулуун зайгаараа хамгийн хол хосуудыг авна.
+    """
+    node_coords = np.asarray(road_network.arrays['node_coords'])
+    rng = np.random.default_rng(seed)
+    sample = rng.choice(len(node_coords), size=min(sample_size, len(node_coords)), replace=False)
+    lon, lat = node_coords[sample, 0], node_coords[sample, 1]
+    distance = np.hypot((lon[:, None] - lon[None, :]) * np.cos(np.radians(lat[:, None])),
+                        lat[:, None] - lat[None, :])
+
+    pairs = []
+    for flat in np.argsort(distance, axis=None)[::-1]:
+        i, j = np.unravel_index(flat, distance.shape)
+        start, end = tuple(node_coords[sample[i]].tolist()), tuple(node_coords[sample[j]].tolist())
+        if road_network.dijkstra(start, end)['found']:
+            pairs.append((start, end))
+        if len(pairs) == count:
+            break
+    return pairs
+
+
+def random_od_pairs(road_network, count=5, seed=0):
+    """Хоорондоо зам бүхий санамсаргүй OD хосууд"""
+    node_coords = np.asarray(road_network.arrays['node_coords'])
+    rng = np.random.default_rng(seed)
+
+    pairs = []
+    for _ in range(count * 20):
+        i, j = rng.integers(len(node_coords), size=2)
+        start, end = tuple(node_coords[i].tolist()), tuple(node_coords[j].tolist())
+        if start != end and road_network.dijkstra(start, end)['found']:
+            pairs.append((start, end))
+        if len(pairs) == count:
+            break
+    return pairs
+
+
+def benchmark_graph_core(road_network):
+    """CSR массивын цөм ба networkx графын санах ойг харьцуулах"""
+    print(f"\n{'=' * 80}")
+    print("ГРАФЫН ЦӨМИЙН САНАХ ОЙ (CSR массив vs networkx)")
+    print(f"{'=' * 80}")
+
+    array_mb = sum(np.asarray(array).nbytes for array in road_network.arrays.values()) / (1024 * 1024)
+    tracemalloc.start()
+    road_network.get_graph()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    networkx_mb = peak / (1024 * 1024)
+
+    edge_count = max(road_network.edge_count, 1)
+    print(f"{'Бүтэц':<12} {'МБ':<10} {'Байт / ирмэг':<15}")
+    print("-" * 80)
+    print(f"{'CSR':<12} {array_mb:<10.2f} {array_mb * 1024 * 1024 / edge_count:<15.1f}")
+    print(f"{'networkx':<12} {networkx_mb:<10.2f} {networkx_mb * 1024 * 1024 / edge_count:<15.1f}")
+
+
+def benchmark_path_tracking(road_network):
+    """Эцэг оройн map болон замын хуулбар хадгалах аргуудыг харьцуулах"""
+    print(f"\n{'=' * 80}")
+    print("ЗАМ СЭРГЭЭХ АРГЫН ХАРЬЦУУЛАЛТ (хол зайн хосууд)")
+    print(f"{'=' * 80}")
+
+    algorithms = [
+        ('BFS', road_network.bfs, bfs_path_copy),
+        ('DFS', road_network.dfs, dfs_path_copy),
+        ('Dijkstra', road_network.dijkstra, dijkstra_path_copy),
+    ]
+
+    G = road_network.get_graph()
+    for pair_idx, (start, end) in enumerate(long_od_pairs(road_network), 1):
+        print(f"\nХос {pair_idx}: {start} -> {end}")
+        print(f"{'Алгоритм':<10} {'Замын урт':<10} {'Хуулбар (мс)':<14} {'Map (мс)':<10} "
+              f"{'Хуулбар (МБ)':<14} {'Map (МБ)':<10}")
+        print("-" * 80)
+
+        for name, parent_search, copy_search in algorithms:
+            copy_path, copy_ms, copy_mb = measure(copy_search, G, start, end)
+            result, map_ms, map_mb = measure(parent_search, start, end)
+            if name != 'Dijkstra':
+                # Dijkstra-д ижил урттай өөр зам сонгогдож болно
+                assert result['path'] == copy_path, f"{name}: замууд зөрлөө"
+
+            print(f"{name:<10} {len(copy_path):<10} {copy_ms:<14.2f} {map_ms:<10.2f} "
+                  f"{copy_mb:<14.2f} {map_mb:<10.2f}")
+
+
+def benchmark_point_to_point(road_network):
+    """A*, хоёр чиглэлтэй Dijkstra, ALT-н хайсан оройн тоог Dijkstra-тай харьцуулах"""
+    print(f"\n{'=' * 80}")
+    print("ЦЭГЭЭС ЦЭГ ХҮРТЭЛХ ХАЙЛТ vs DIJKSTRA (хайсан оройн тоо)")
+    print(f"{'=' * 80}")
+    print(f"{'Хос':<5} {'Алгоритм':<15} {'Хайсан':<10} {'Dijkstra':<10} {'Хэмнэлт':<10} "
+          f"{'Хугацаа (мс)':<15} {'Dijkstra (мс)':<15}")
+    print("-" * 80)
+
+    algorithms = [
+        ('A*', road_network.astar),
+        ('Bidirectional', road_network.bidirectional_dijkstra),
+    ]
+    if 'distance' not in road_network.landmarks:
+        print("ALT landmark бэлтгэж байна...")
+        road_network.build_landmarks()
+    algorithms.append(('ALT', road_network.alt))
+
+    for pair_idx, (start, end) in enumerate(random_od_pairs(road_network), 1):
+        dijkstra_result, dijkstra_ms, _ = measure(road_network.dijkstra, start, end)
+        dijkstra_visited = len(dijkstra_result['visited'])
+
+        for name, search in algorithms:
+            result, elapsed_ms, _ = measure(search, start, end)
+            assert abs(result['distance'] - dijkstra_result['distance']) < 1e-9
+
+            visited = len(result['visited'])
+            saved = 1 - visited / dijkstra_visited if dijkstra_visited else 0
+            print(f"{pair_idx:<5} {name:<15} {visited:<10} {dijkstra_visited:<10} "
+                  f"{saved:<10.1%} {elapsed_ms:<15.2f} {dijkstra_ms:<15.2f}")
+
+
+def benchmark_contraction_hierarchy(road_network):
+    """CH-н бэлтгэлийн хугацаа, shortcut-н тоо, хайлтын хугацааг хэмжих"""
+    print(f"\n{'=' * 80}")
+    print("CONTRACTION HIERARCHIES")
+    print(f"{'=' * 80}")
+
+    ch = road_network.contraction_hierarchies.get('distance')
+    if ch is None:
+        print("CH бэлтгэж байна...")
+        ch = road_network.build_contraction_hierarchy()
+
+    edge_count = len(road_network.arrays['indices'])
+    print(f"Бэлтгэлийн хугацаа: {ch.stats['build_seconds']:.2f} секунд")
+    print(f"Shortcut: {ch.stats['shortcuts']:,} ({ch.stats['shortcuts'] / max(edge_count, 1):.2f} / ирмэг)")
+
+    pairs = random_od_pairs(road_network, count=20)
+    dijkstra_ms = ch_ms = 0
+    dijkstra_visited = ch_visited = 0
+    for start, end in pairs:
+        dijkstra_result, elapsed_ms, _ = measure(road_network.dijkstra, start, end)
+        dijkstra_ms += elapsed_ms
+        dijkstra_visited += len(dijkstra_result['visited'])
+
+        ch_result, elapsed_ms, _ = measure(road_network.ch_query, start, end)
+        ch_ms += elapsed_ms
+        ch_visited += len(ch_result['visited'])
+        assert abs(ch_result['distance'] - dijkstra_result['distance']) < 1e-9
+
+    count = max(len(pairs), 1)
+    print(f"{'Алгоритм':<10} {'Дундаж хугацаа (мс)':<22} {'Дундаж хайсан орой':<20}")
+    print("-" * 80)
+    print(f"{'Dijkstra':<10} {dijkstra_ms / count:<22.3f} {dijkstra_visited / count:<20.1f}")
+    print(f"{'CH':<10} {ch_ms / count:<22.3f} {ch_visited / count:<20.1f}")
+
+
+def benchmark_distance_matrix(road_network, size=100):
+    """Зайн матрицыг хос бүрийн Dijkstra-тай харьцуулах"""
+    print(f"\n{'=' * 80}")
+    print(f"ЗАЙН МАТРИЦ ({size} x {size})")
+    print(f"{'=' * 80}")
+
+    node_coords = np.asarray(road_network.arrays['node_coords'])
+    rng = np.random.default_rng(0)
+    points = [tuple(coord) for coord in node_coords[rng.integers(len(node_coords), size=2 * size)].tolist()]
+    sources, targets = points[:size], points[size:]
+
+    matrix, matrix_ms, _ = measure(road_network.distance_matrix, sources, targets, repeat=1)
+
+    # Хос бүрийн Dijkstra-г цөөн мөрөөр хэмжиж бүтэн матрицад хөрвүүлнэ
+    sample_rows = min(5, size)
+    start_time = time.perf_counter()
+    for row in range(sample_rows):
+        for column, target in enumerate(targets):
+            result = road_network.dijkstra(sources[row], target)
+            expected = result['distance'] if result['found'] else float('inf')
+            assert abs(matrix[row, column] - expected) < 1e-9 or matrix[row, column] == expected
+    pairwise_ms = (time.perf_counter() - start_time) * 1000 * size / sample_rows
+
+    method = 'CH bucket' if 'distance' in road_network.contraction_hierarchies else 'one-to-many'
+    print(f"{'Арга':<22} {'Хугацаа (мс)':<15}")
+    print("-" * 80)
+    print(f"{'Хос бүрийн Dijkstra':<22} {pairwise_ms:<15.1f} (тооцоолсон)")
+    print(f"{method:<22} {matrix_ms:<15.1f}")
+
+
+def benchmark_simplification(road_network, count=30):
+    """2-р зэргийн гинж нэгтгэсэн графыг бүтэн графтай харьцуулах (Dijkstra)"""
+    print(f"\n{'=' * 80}")
+    print("ГРАФ ХЯЛБАРШУУЛАЛТ (2-р зэргийн оройн гинж нэгтгэх)")
+    print(f"{'=' * 80}")
+
+    simple_network = RoadNetworkGraph(road_network.shapefile_path, simplify=True,
+                                      merge_tolerance=road_network.merge_tolerance)
+
+    # Хоёр графын оройнууд өөр тул ижил координатыг хоёуланд нь буулгана
+    node_coords = np.asarray(road_network.arrays['node_coords'])
+    rng = np.random.default_rng(0)
+    sample = node_coords[rng.integers(len(node_coords), size=2 * count)]
+    totals = []
+    for network in (road_network, simple_network):
+        points = network.snap_points(sample[:, 1], sample[:, 0])
+        elapsed = visited = 0
+        for start, end in zip(points[:count], points[count:]):
+            result, ms, _ = measure(network.dijkstra, start, end, repeat=1)
+            elapsed += ms
+            visited += len(result['visited'])
+        totals.append((network.node_count, network.edge_count, elapsed / count, visited / count))
+
+    print(f"{'Граф':<14} {'Орой':<10} {'Ирмэг':<10} {'Dijkstra (мс)':<15} {'Хайсан орой':<12}")
+    print("-" * 80)
+    for name, (nodes, edges, ms, visited) in zip(('Бүтэн', 'Хялбаршуулсан'), totals):
+        print(f"{name:<14} {nodes:<10} {edges:<10} {ms:<15.2f} {visited:<12.1f}")
+    print(f"Оройн тоо {totals[0][0] / max(totals[1][0], 1):.1f} дахин, "
+          f"хайсан орой {totals[0][3] / max(totals[1][3], 1):.1f} дахин цөөрсөн")
+
+
+def benchmark_unreachable(road_network, count=10):
+    """Өөр бүрэлдэхүүнд орших хосууд - бүрэлдэхүүнээр шууд татгалзах ба бүтэн хайлт"""
+    print(f"\n{'=' * 80}")
+    print("ХОЛБОГДООГҮЙ ХОСУУД (холбоост бүрэлдэхүүн)")
+    print(f"{'=' * 80}")
+
+    weak = np.asarray(road_network.arrays['weak_component'])
+    sizes = np.bincount(weak)
+    if len(sizes) < 2:
+        print("Граф нэг бүрэлдэхүүнтэй - холбогдоогүй хос байхгүй")
+        return
+
+    # Хамгийн том бүрэлдэхүүнээс бусад руу: бүрэлдэхүүнгүй бол эхлэлээс хүрэх
+    # бүх оройг хайж байж зам байхгүйг мэднэ
+    rng = np.random.default_rng(0)
+    largest = sizes.argmax()
+    starts = rng.choice(np.flatnonzero(weak == largest), size=count)
+    ends = rng.choice(np.flatnonzero(weak != largest), size=count)
+    node_key = road_network.node_key
+
+    rejected = exhausted = explored = 0
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        result, ms, _ = measure(road_network.dijkstra, node_key(start), node_key(end), repeat=1)
+        assert not result['found']
+        rejected += ms
+        settled, ms, _ = measure(road_network._bounded_dijkstra, start, float('inf'), {}, 'weight',
+                                 repeat=1)
+        exhausted += ms
+        explored += len(settled)
+
+    print(f"Бүрэлдэхүүн: {len(sizes)}, хамгийн том нь {sizes.max()} оройтой")
+    print(f"{'Арга':<28} {'Дундаж (мс)':<14} {'Хайсан орой':<12}")
+    print("-" * 80)
+    print(f"{'Бүрэлдэхүүнээр татгалзах':<28} {rejected / count:<14.4f} {0:<12}")
+    print(f"{'Бүтэн хайлт':<28} {exhausted / count:<14.2f} {explored / count:<12.1f}")
+    print(f"Хурдсалт: {exhausted / max(rejected, 1e-9):.0f} дахин")
+
+
+def benchmark_ingest(road_network, chunk_size=20000):
+    """Shapefile-г бүтнээр нь болон хэсэглэн уншиж ирмэг гаргах үеийн хугацаа, санах ойн оргил"""
+    print(f"\n{'=' * 80}")
+    print("SHAPEFILE УНШИХ (бүтэн vs хэсэглэсэн)")
+    print(f"{'=' * 80}")
+
+    original_chunk_size = road_network.chunk_size
+    rows = []
+    for label, size in (('Бүтэн', None), (f'{chunk_size} мөрөөр', chunk_size)):
+        road_network.chunk_size = size
+        _, ms, peak_mb = measure(road_network._extract_edges, repeat=1)
+        rows.append((label, ms, peak_mb))
+    road_network.chunk_size = original_chunk_size
+    graph_mb = sum(np.asarray(array).nbytes for array in road_network.arrays.values()) / (1024 * 1024)
+
+    print(f"{'Унших':<16} {'Хугацаа (мс)':<14} {'Оргил (МБ)':<12}")
+    print("-" * 80)
+    for label, ms, peak_mb in rows:
+        print(f"{label:<16} {ms:<14.1f} {peak_mb:<12.2f}")
+    print(f"Графын массивууд: {graph_mb:.2f} МБ")
+
+
+def benchmark_ingest_formats(road_network):
+    """Shapefile ба түүнээс хөрвүүлсэн GeoParquet / Arrow IPC-с граф үүсгэх хугацаа"""
+    print(f"\n{'=' * 80}")
+    print("ӨГӨГДЛИЙН ФОРМАТ (Shapefile vs GeoParquet vs Arrow IPC)")
+    print(f"{'=' * 80}")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        base = os.path.join(tmp_dir, 'roads')
+        paths = [('Shapefile', road_network.shapefile_path),
+                 ('GeoParquet', convert_roads(road_network.shapefile_path, base + '.parquet')),
+                 ('Arrow IPC', convert_roads(road_network.shapefile_path, base + '.arrow'))]
+
+        rows = []
+        for label, path in paths:
+            network, ms, _ = measure(
+                lambda: RoadNetworkGraph(path, use_snapshot=False,
+                                         merge_tolerance=road_network.merge_tolerance,
+                                         chunk_size=road_network.chunk_size), repeat=1)
+            same = all(np.array_equal(np.asarray(network.arrays[name]),
+                                      np.asarray(road_network.arrays[name]))
+                       for name in ('indptr', 'indices', 'weight'))
+            # Shapefile-н шинж чанарууд .dbf-д тусдаа байна
+            files = [path, os.path.splitext(path)[0] + '.dbf'] if path.endswith('.shp') else [path]
+            rows.append((label, sum(os.path.getsize(f) for f in files if os.path.exists(f)) / (1024 * 1024),
+                         network.build_stats['read'] * 1000, ms, same))
+
+    print(f"{'Формат':<12} {'Файл (МБ)':<11} {'Унших (мс)':<12} {'Нийт (мс)':<11} {'Граф ижил':<10}")
+    print("-" * 80)
+    for label, size_mb, read_ms, total_ms, same in rows:
+        print(f"{label:<12} {size_mb:<11.2f} {read_ms:<12.1f} {total_ms:<11.1f} {'Тийм' if same else 'Үгүй':<10}")
+
+
+if __name__ == "__main__":
+    road_network = RoadNetworkGraph("gis_osm_roads_free_1.shp")
+    benchmark_graph_core(road_network)
+    benchmark_path_tracking(road_network)
+    benchmark_point_to_point(road_network)
+    benchmark_contraction_hierarchy(road_network)
+    benchmark_distance_matrix(road_network)
+    benchmark_simplification(road_network)
+    benchmark_unreachable(road_network)
+    benchmark_ingest(road_network)
+    benchmark_ingest_formats(road_network)
@@ -0,0 +1,103 @@
+"""
+/api/compare-н алгоритмуудыг зэрэг ажиллуулах процессын pool
+
+Python-н GIL-н улмаас thread-үүд хайлтыг хурдасгахгүй тул алгоритм бүрийг
+тусдаа процесст ажиллуулна. Worker бүр графыг snapshot-с (memory-map) нэг
+удаа ачаална - массивууд үйлдлийн системийн page cache-р хуваалцагдах ба
+хүсэлт бүрт графыг pickle хийхгүй. Процессуудын хооронд зөвхөн буулгасан
+эхлэл, төгсгөл болон үр дүнгийн товч мэдээлэл дамжина. Хугацааг worker
+дотор хэмждэг тул харьцуулалт шударга хэвээр байна.
+"""
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from read_osm import ALGORITHMS, RoadNetworkGraph
+
+# Worker процессын граф (_init_worker ачаална)
+_worker_network = None
+
+
+def _init_worker(shapefile_path, options):
+    """Worker эхлэхэд графыг snapshot-с ачаалах (үндсэн процессын build_options-р)"""
+    global _worker_network
+    _worker_network = RoadNetworkGraph(shapefile_path, **options)
+
+
+def _ready():
+    """Worker граф ачаалж дууссаныг шалгах"""
+    return _worker_network is not None
+
+
+def _run_algorithm(algorithm, start_node, end_node, metric):
+    """Нэг алгоритмыг worker дотор ажиллуулж товч үр дүнг буцаах"""
+    return run_summary(_worker_network, algorithm, start_node, end_node, metric)
+
+
+def run_summary(network, algorithm, start_node, end_node, metric='distance'):
+    """
+    Нэг алгоритмыг ажиллуулж товч үр дүнг буцаах (pool ажиллахгүй үед
+    үндсэн процесст ч дуудна)
+
+    Returns:
+        {'found', 'distance', 'time', 'path_length', 'visited_count',
+        'execution_time_ms'} - алгоритм бэлтгэгдээгүй (CH/ALT) бол None
+    """
+    start_time = time.perf_counter()
+    try:
+        result = network.run_algorithm(algorithm, start_node, end_node, metric)
+    except RuntimeError:
+        return None
+    execution_time = (time.perf_counter() - start_time) * 1000
+
+    return {
+        'found': result['found'],
+        'distance': result['distance'],
+        'time': result['time'],
+        'path_length': len(result['path']),
+        'visited_count': len(result['visited']),
+        'execution_time_ms': execution_time
+    }
+
+
+class ComparePool:
+    """Алгоритмуудыг зэрэг ажиллуулах worker процессууд"""
+
+    def __init__(self, shapefile_path, workers=None, options=None):
+        """
+        Args:
+            shapefile_path: Worker-үүдийн ачаалах shapefile (snapshot нь үүссэн байх ёстой)
+            workers: Процессын тоо (анхдагч нь алгоритмын тоо ба CPU-н тооны бага нь)
+            options: RoadNetworkGraph-н бусад параметр (үндсэн процессын
+                build_options()) - өөр бол worker snapshot-г дахин үүсгэж, оройн
+                дугаар зөрнө
+        """
+        self.workers = workers or min(len(ALGORITHMS), os.cpu_count() or 1)
+        # Flask-н thread-тэй процессыг fork хийхгүйн тулд spawn ашиглана
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(os.path.abspath(shapefile_path), options or {}))
+        # Worker-үүдийг эхний хүсэлтээс өмнө ачаалж эхлүүлэх
+        self._warmup = [self._executor.submit(_ready) for _ in range(self.workers)]
+
+    def run(self, algorithms, start_node, end_node, metric='distance'):
+        """
+        Алгоритмуудыг зэрэг ажиллуулах
+
+        Returns:
+            algorithms-н дарааллаар _run_algorithm-н үр дүнгүүд
+
+        Raises:
+            BrokenProcessPool: Worker процесс унасан бол (pool-г дахин үүсгэх хэрэгтэй)
+        """
+        futures = [self._executor.submit(_run_algorithm, algorithm, start_node, end_node, metric)
+                   for algorithm in algorithms]
+        return [future.result() for future in futures]
+
+    def shutdown(self):
+        """Worker процессуудыг зогсоох"""
+        self._executor.shutdown(cancel_futures=True)
@@ -0,0 +1,62 @@
+"""
+pytest-н хуваалцсан fixture-ууд
+
+Жинхэнэ shapefile-гүйгээр тестлэхийн тулд жижиг торон замын сүлжээг түр
+хавтсанд үүсгэнэ. Уулзвар хоорондын зам бүр завсрын оройтой тул
+хялбаршуулсан граф гинжийг нэгтгэж завсрын геометр үүсгэнэ.
+"""
+
+import geopandas as gpd
+import numpy as np
+import pytest
+from shapely.geometry import LineString
+
+from read_osm import RoadNetworkGraph
+
+# Торны мөр/баганын тоо ба алхам (градус, ~300-400 м)
+GRID_SIZE = 5
+GRID_STEP = 0.004
+GRID_ORIGIN = (106.9, 47.9)
+
+
+def grid_point(i, j):
+    """Торны (i, j) уулзварын (lon, lat)"""
+    return (GRID_ORIGIN[0] + j * GRID_STEP, GRID_ORIGIN[1] + i * GRID_STEP)
+
+
+@pytest.fixture(scope='session')
+def roads_path(tmp_path_factory):
+    """Хоёр чиглэлтэй торон замын shapefile (уулзвар хооронд 3 завсрын оройтой)"""
+    rng = np.random.default_rng(0)
+    rows = []
+    for i in range(GRID_SIZE):
+        for j in range(GRID_SIZE - 1):
+            for a, b in ((grid_point(i, j), grid_point(i, j + 1)),
+                         (grid_point(j, i), grid_point(j + 1, i))):
+                # Жигд биш, зам дагуу бага зэрэг муруй завсрын оройнууд
+                inner = [(a[0] + (b[0] - a[0]) * t + (b[1] - a[1]) * offset,
+                          a[1] + (b[1] - a[1]) * t + (b[0] - a[0]) * offset)
+                         for t, offset in zip(np.sort(rng.uniform(0.05, 0.95, 3)),
+                                              rng.uniform(-0.1, 0.1, 3))]
+                rows.append({
+                    'geometry': LineString([a, *inner, b]),
+                    'fclass': 'residential',
+                    'name': f'Street {i}',
+                    'oneway': 'B',
+                    'maxspeed': 40
+                })
+    path = tmp_path_factory.mktemp('roads') / 'roads.shp'
+    gpd.GeoDataFrame(rows, crs='EPSG:4326').to_file(path)
+    return str(path)
+
+
+@pytest.fixture(scope='session')
+def road_network(roads_path):
+    """Хялбаршуулаагүй граф"""
+    return RoadNetworkGraph(roads_path, use_snapshot=False)
+
+
+@pytest.fixture(scope='session')
+def simple_network(roads_path):
+    """2-р зэргийн оройн гинжийг нэгтгэсэн граф"""
+    return RoadNetworkGraph(roads_path, use_snapshot=False, simplify=True)
@@ -0,0 +1,409 @@
+"""
+Contraction Hierarchies (CH) - урьдчилан боловсруулсан шатлалтай хайлт
+
+Оройнуудыг ач холбогдлын дарааллаар нэг нэгээр нь "агшааж", тэдгээрээр
+дамжих хамгийн богино замуудыг shortcut ирмэгээр орлуулна. Хайлт нь эхлэл ба
+төгсгөлөөс зөвхөн дээш (илүү өндөр зэрэглэлтэй орой руу) явдаг тул маш цөөн
+орой хайна. Shortcut бүр дундын оройгоо хадгалдаг тул замыг бүтэн оройн
+дараалал болгон задална.
+
+Урьдчилан боловсруулах (offline):
+    python contraction_hierarchy.py
+"""
+
+import heapq
+import os
+import time
+
+import numpy as np
+
+from graph_snapshot import load_snapshot, save_snapshot
+
+# Хадгалах массивуудын нэрс
+CH_ARRAY_NAMES = (
+    'rank',              # (N,) int32 - агшаасан дараалал
+    'forward_indptr',    # Дээш чиглэсэн u -> v ирмэгүүд (rank[v] > rank[u])
+    'forward_indices',
+    'forward_weight',
+    'forward_middle',    # Shortcut-н дундын орой (-1 бол жинхэнэ ирмэг)
+    'backward_indptr',   # Урвуу хайлтын v -> u (u -> v ирмэгийн, rank[u] > rank[v])
+    'backward_indices',
+    'backward_weight',
+    'backward_middle',
+)
+
+# Гэрчийн (witness) хайлтын хязгаар - их байх тусам shortcut цөөн, бэлтгэл удаан
+WITNESS_SETTLED_LIMIT = 100
+
+
+class ContractionHierarchy:
+    """Contraction Hierarchies-н бэлтгэл ба хайлт"""
+
+    def __init__(self, arrays, stats=None):
+        """
+        Args:
+            arrays: CH_ARRAY_NAMES нэр бүхий массивууд
+            stats: Бэлтгэлийн статистик {'shortcuts': ..., 'build_seconds': ...}
+        """
+        self.arrays = arrays
+        self.rank = arrays['rank']
+        self.stats = stats or {}
+
+    @classmethod
+    def build(cls, indptr, indices, weight, witness_limit=WITNESS_SETTLED_LIMIT):
+        """
+        CSR графаас CH үүсгэх
+
+        Args:
+            indptr, indices, weight: Графын CSR массивууд
+            witness_limit: Гэрчийн хайлтад тогтоох хамгийн их оройн тоо
+
+        Returns:
+            ContractionHierarchy
+        """
+        build_start = time.perf_counter()
+        node_count = len(indptr) - 1
+
+        # Үлдсэн (агшаагаагүй) оройнуудын гарах/орох ирмэгүүд
+        outgoing = [dict() for _ in range(node_count)]
+        incoming = [dict() for _ in range(node_count)]
+        source = np.repeat(np.arange(node_count), np.diff(indptr))
+        for u, v, w in zip(source.tolist(), np.asarray(indices).tolist(),
+                           np.asarray(weight).tolist()):
+            if u != v and w < outgoing[u].get(v, float('inf')):
+                outgoing[u][v] = w
+                incoming[v][u] = w
+        middle = {}
+
+        def witness_distances(start, excluded, targets, max_distance):
+            """excluded оройг тойрсон start-аас targets хүртэлх зай (хязгаарлагдмал)"""
+            distances = {start: 0.0}
+            pq = [(0.0, start)]
+            remaining = set(targets)
+            settled = 0
+            while pq:
+                dist, node = heapq.heappop(pq)
+                if dist > distances[node]:
+                    continue
+                if dist > max_distance or settled >= witness_limit:
+                    break
+                remaining.discard(node)
+                if not remaining:
+                    break
+                settled += 1
+                for neighbor, w in outgoing[node].items():
+                    if neighbor == excluded:
+                        continue
+                    new_dist = dist + w
+                    if new_dist < distances.get(neighbor, float('inf')):
+                        distances[neighbor] = new_dist
+                        heapq.heappush(pq, (new_dist, neighbor))
+            return distances
+
+        def required_shortcuts(node):
+            """node-г агшаахад шаардагдах shortcut-ууд [(u, w, зай)]"""
+            shortcuts = []
+            for u, in_weight in incoming[node].items():
+                targets = {w: in_weight + out_weight
+                           for w, out_weight in outgoing[node].items() if w != u}
+                if not targets:
+                    continue
+                distances = witness_distances(u, node, targets, max(targets.values()))
+                for w, via in targets.items():
+                    if distances.get(w, float('inf')) > via:
+                        shortcuts.append((u, w, via))
+            return shortcuts
+
+        contracted_neighbors = [0] * node_count
+
+        def priority(node):
+            """Ирмэгийн зөрүү + агшаасан хөршийн тоо - бага нь түрүүлж агшина"""
+            edge_difference = (len(required_shortcuts(node))
+                               - len(incoming[node]) - len(outgoing[node]))
+            return edge_difference + contracted_neighbors[node]
+
+        pq = [(priority(node), node) for node in range(node_count)]
+        heapq.heapify(pq)
+
+        rank = np.empty(node_count, dtype=np.int32)
+        forward_edges = []   # (v, w, зай, дундын орой)
+        backward_edges = []  # (v, u, зай, дундын орой)
+        shortcut_count = 0
+        next_rank = 0
+
+        while pq:
+            _, node = heapq.heappop(pq)
+
+            # Lazy update: шинэчилсэн priority дараагийнхаас их бол буцааж хийнэ
+            current = priority(node)
+            if pq and current > pq[0][0]:
+                heapq.heappush(pq, (current, node))
+                continue
+
+            # Үлдсэн хөршүүд бүгд дээд зэрэглэлтэй тул дээш чиглэсэн ирмэг болно
+            for w, out_weight in outgoing[node].items():
+                forward_edges.append((node, w, out_weight, middle.get((node, w), -1)))
+            for u, in_weight in incoming[node].items():
+                backward_edges.append((node, u, in_weight, middle.get((u, node), -1)))
+
+            for u, w, via in required_shortcuts(node):
+                # Жинхэнэ ирмэг эсвэл өмнөх shortcut-с богино бол орлуулна
+                if via < outgoing[u].get(w, float('inf')):
+                    if (u, w) not in middle:
+                        shortcut_count += 1
+                    outgoing[u][w] = via
+                    incoming[w][u] = via
+                    middle[(u, w)] = node
+
+            for w in outgoing[node]:
+                del incoming[w][node]
+                contracted_neighbors[w] += 1
+            for u in incoming[node]:
+                del outgoing[u][node]
+                contracted_neighbors[u] += 1
+            outgoing[node] = {}
+            incoming[node] = {}
+
+            rank[node] = next_rank
+            next_rank += 1
+
+        arrays = {'rank': rank}
+        for prefix, edges in (('forward', forward_edges), ('backward', backward_edges)):
+            arrays.update(cls._edges_to_csr(prefix, edges, node_count))
+
+        return cls(arrays, {
+            'shortcuts': shortcut_count,
+            'build_seconds': time.perf_counter() - build_start
+        })
+
+    @staticmethod
+    def _edges_to_csr(prefix, edges, node_count):
+        """(эх, төгсгөл, зай, дундын орой) жагсаалтыг CSR болгох"""
+        edges = np.array(edges, dtype=float).reshape(-1, 4)
+        source = edges[:, 0].astype(np.int64)
+        target = edges[:, 1].astype(np.int64)
+        order = np.lexsort((target, source))
+
+        indptr = np.zeros(node_count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(source, minlength=node_count), out=indptr[1:])
+        return {
+            f'{prefix}_indptr': indptr,
+            f'{prefix}_indices': target[order].astype(np.int32),
+            f'{prefix}_weight': edges[order, 2],
+            f'{prefix}_middle': edges[order, 3].astype(np.int32),
+        }
+
+    def save(self, ch_dir, signature):
+        """CH-г snapshot хэлбэрээр хадгалах"""
+        save_snapshot(ch_dir, self.arrays, self.stats, signature)
+
+    @classmethod
+    def load(cls, ch_dir, signature):
+        """Хадгалсан CH-г memory-map хийж унших (байхгүй/хуучирсан бол None)"""
+        if not os.path.isdir(ch_dir):
+            return None
+        snapshot = load_snapshot(ch_dir, signature, names=CH_ARRAY_NAMES)
+        if snapshot is None:
+            return None
+        arrays, stats = snapshot
+        return cls(arrays, stats)
+
+    def query(self, sources, targets):
+        """
+        Хоёр чиглэлтэй дээш хайлт
+
+        Args:
+            sources: [(орой, эхний зай)] - эхлэлийн оройнууд
+            targets: [(орой, үлдэх зай)] - төгсгөлийн оройнууд
+
+        Returns:
+            (зай, оройн замын жагсаалт, хайсан оройнууд) - зам олдоогүй бол (inf, [], хайсан)
+        """
+        sides = (
+            (self.arrays['forward_indptr'], self.arrays['forward_indices'],
+             self.arrays['forward_weight']),
+            (self.arrays['backward_indptr'], self.arrays['backward_indices'],
+             self.arrays['backward_weight']),
+        )
+        distances = ({}, {})
+        parents = ({}, {})
+        pqs = ([], [])
+        for side, seeds in enumerate((sources, targets)):
+            for node, offset in seeds:
+                if offset < distances[side].get(node, float('inf')):
+                    distances[side][node] = offset
+                    parents[side][node] = None
+                    heapq.heappush(pqs[side], (offset, node))
+
+        settled = (set(), set())
+        visited_order = []
+        best_distance = float('inf')
+        meeting_node = None
+
+        # Дээш хайлтад хоёр талын нийлбэрээр зогсоох боломжгүй - тал бүр өөрийн
+        # дарааллын хамгийн бага утга олдсон замаас багагүй болтол явна
+        while True:
+            active = [side for side in (0, 1) if pqs[side] and pqs[side][0][0] < best_distance]
+            if not active:
+                break
+            side = min(active, key=lambda s: pqs[s][0][0])
+
+            dist, node = heapq.heappop(pqs[side])
+            if node in settled[side] or dist > distances[side][node]:
+                continue
+            settled[side].add(node)
+            visited_order.append(node)
+
+            other = distances[1 - side]
+            if node in other and dist + other[node] < best_distance:
+                best_distance = dist + other[node]
+                meeting_node = node
+
+            indptr, indices, weight = sides[side]
+            start, end = indptr[node], indptr[node + 1]
+            for neighbor, w in zip(indices[start:end].tolist(), weight[start:end].tolist()):
+                new_dist = dist + w
+                if new_dist < distances[side].get(neighbor, float('inf')):
+                    distances[side][neighbor] = new_dist
+                    parents[side][neighbor] = node
+                    heapq.heappush(pqs[side], (new_dist, neighbor))
+
+        if meeting_node is None:
+            return float('inf'), [], visited_order
+
+        # Урагш талын гинж: эхлэл -> уулзах орой
+        chain = [meeting_node]
+        while parents[0][chain[-1]] is not None:
+            chain.append(parents[0][chain[-1]])
+        chain.reverse()
+        # Урвуу талын гинж: уулзах орой -> төгсгөл
+        node = meeting_node
+        while parents[1][node] is not None:
+            node = parents[1][node]
+            chain.append(node)
+
+        path = [chain[0]]
+        for u, v in zip(chain, chain[1:]):
+            self._unpack(u, v, path)
+        return best_distance, path, visited_order
+
+    def many_to_many(self, sources, targets):
+        """
+        Олон эхлэлээс олон төгсгөл хүртэлх зайн матриц (bucket арга)
+
+        Төгсгөл бүрээс урвуу дээш хайлт хийж, хүрсэн орой бүрийн "bucket"-д
+        (төгсгөл, зай)-г хадгална. Дараа нь эхлэл бүрээс урагш дээш хайлт хийж,
+        хүрсэн оройнуудын bucket-уудыг уншиж матрицын мөрийг бөглөнө. Нийт
+        len(sources) + len(targets) хайлт хийх тул хос бүрийг тусад нь хайхаас
+        хамаагүй хурдан.
+
+        Args:
+            sources: Эхлэл бүрийн [(орой, эхний зай)] жагсаалт
+            targets: Төгсгөл бүрийн [(орой, үлдэх зай)] жагсаалт
+
+        Returns:
+            (len(sources), len(targets)) float64 матриц - хүрэхгүй бол inf
+        """
+        matrix = np.full((len(sources), len(targets)), np.inf)
+        bucket_nodes, bucket_columns, bucket_distances = [], [], []
+        for column, seeds in enumerate(targets):
+            distances = self._upward_search(1, seeds)
+            bucket_nodes.append(np.fromiter(distances.keys(), np.int64, len(distances)))
+            bucket_distances.append(np.fromiter(distances.values(), float, len(distances)))
+            bucket_columns.append(np.full(len(distances), column, dtype=np.int64))
+        if not bucket_nodes:
+            return matrix
+
+        # Bucket-уудыг оройгоор эрэмбэлж, орой бүрийн хэсгийг searchsorted-р олно
+        bucket_nodes = np.concatenate(bucket_nodes)
+        order = np.argsort(bucket_nodes, kind='stable')
+        bucket_nodes = bucket_nodes[order]
+        bucket_columns = np.concatenate(bucket_columns)[order]
+        bucket_distances = np.concatenate(bucket_distances)[order]
+
+        for row, seeds in enumerate(sources):
+            distances = self._upward_search(0, seeds)
+            nodes = np.fromiter(distances.keys(), np.int64, len(distances))
+            node_distances = np.fromiter(distances.values(), float, len(distances))
+            start = np.searchsorted(bucket_nodes, nodes, side='left')
+            counts = np.searchsorted(bucket_nodes, nodes, side='right') - start
+            total = int(counts.sum())
+            if total == 0:
+                continue
+            # Орой бүрийн bucket-н байрлалууд (ragged хэсгүүдийг нэг массив болгох)
+            offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+            positions = np.repeat(start, counts) + offsets
+            np.minimum.at(matrix[row], bucket_columns[positions],
+                          np.repeat(node_distances, counts) + bucket_distances[positions])
+        return matrix
+
+    def _upward_search(self, side, seeds):
+        """
+        Зөвхөн дээш чиглэсэн бүтэн Dijkstra хайлт
+
+        Args:
+            side: 0 - урагш (forward), 1 - урвуу (backward) ирмэгүүд
+            seeds: [(орой, эхний зай)]
+
+        Returns:
+            {орой: зай} - хүрсэн бүх орой
+        """
+        prefix = ('forward', 'backward')[side]
+        indptr = self.arrays[f'{prefix}_indptr']
+        indices = self.arrays[f'{prefix}_indices']
+        weight = self.arrays[f'{prefix}_weight']
+
+        distances = {}
+        pq = []
+        for node, offset in seeds:
+            if offset < distances.get(node, float('inf')):
+                distances[node] = offset
+                heapq.heappush(pq, (offset, node))
+
+        settled = set()
+        while pq:
+            dist, node = heapq.heappop(pq)
+            if node in settled or dist > distances[node]:
+                continue
+            settled.add(node)
+            start, end = indptr[node], indptr[node + 1]
+            for neighbor, w in zip(indices[start:end].tolist(), weight[start:end].tolist()):
+                new_dist = dist + w
+                if new_dist < distances.get(neighbor, float('inf')):
+                    distances[neighbor] = new_dist
+                    heapq.heappush(pq, (new_dist, neighbor))
+        return distances
+
+    def _middle(self, u, v):
+        """u -> v ирмэгийн дундын орой (-1 бол жинхэнэ ирмэг)"""
+        if self.rank[u] < self.rank[v]:
+            prefix, row, target = 'forward', u, v
+        else:
+            prefix, row, target = 'backward', v, u
+        indptr = self.arrays[f'{prefix}_indptr']
+        start, end = indptr[row], indptr[row + 1]
+        position = start + self.arrays[f'{prefix}_indices'][start:end].tolist().index(target)
+        return int(self.arrays[f'{prefix}_middle'][position])
+
+    def _unpack(self, u, v, path):
+        """u -> v (shortcut байж болох) ирмэгийг жинхэнэ ирмэгүүд болгон path-д нэмэх"""
+        stack = [(u, v)]
+        while stack:
+            a, b = stack.pop()
+            middle = self._middle(a, b)
+            if middle < 0:
+                path.append(b)
+            else:
+                stack.append((middle, b))
+                stack.append((a, middle))
+
+
+if __name__ == "__main__":
+    from read_osm import RoadNetworkGraph
+
+    # app.py-н (SIMPLIFY_GRAPH) ашигладаг хялбаршуулсан графд бэлтгэнэ
+    road_network = RoadNetworkGraph("gis_osm_roads_free_1.shp", simplify=True)
+    for metric in ('distance', 'time'):
+        ch = road_network.build_contraction_hierarchy(metric)
+        print(f"CH ({metric}) бэлтгэгдлээ: {ch.stats['shortcuts']} shortcut, "
+              f"{ch.stats['build_seconds']:.2f} секунд")
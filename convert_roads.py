@@ -0,0 +1,55 @@
+"""
+Замын shapefile-г GeoParquet (эсвэл Arrow IPC) болгон нэг удаа хөрвүүлэх
+
+    python convert_roads.py [gis_osm_roads_free_1.shp] [gis_osm_roads_free_1.parquet]
+
+.dbf-н тэмдэгт мөр задлах нь shapefile уншилтын ихэнх хугацааг эзэлдэг.
+GeoParquet нь баганан, шахсан бөгөөд зөвхөн хэрэгтэй баганаа уншина;
+талбарын нэрийн урт (10 тэмдэгт), файлын хэмжээний (2 ГБ) хязгааргүй.
+Гаралтын зам .arrow / .feather бол Arrow IPC файл бичнэ.
+RoadNetworkGraph("gis_osm_roads_free_1.parquet") үүнийг шууд уншина.
+"""
+
+import os
+import sys
+import time
+
+import geopandas as gpd
+
+# Arrow IPC-р бичих өргөтгөлүүд (бусад нь GeoParquet)
+IPC_EXTENSIONS = ('.arrow', '.feather', '.ipc')
+
+
+def convert_roads(source_path, output_path=None):
+    """
+    Shapefile-г GeoParquet / Arrow IPC болгох
+
+    Args:
+        source_path: Эх .shp файл
+        output_path: Гаралтын файл (анхдагч нь эх файлын хажууд .parquet)
+
+    Returns:
+        Бичсэн файлын зам
+    """
+    if output_path is None:
+        output_path = os.path.splitext(source_path)[0] + '.parquet'
+
+    gdf = gpd.read_file(source_path)
+    # Хагас бичигдсэн файлыг граф уншихаас сэргийлж түр файлд бичээд солино
+    tmp_path = f"{output_path}.tmp-{os.getpid()}"
+    if os.path.splitext(output_path)[1].lower() in IPC_EXTENSIONS:
+        gdf.to_feather(tmp_path)
+    else:
+        gdf.to_parquet(tmp_path)
+    os.replace(tmp_path, output_path)
+    return output_path
+
+
+if __name__ == "__main__":
+    source = sys.argv[1] if len(sys.argv) > 1 else "gis_osm_roads_free_1.shp"
+    output = sys.argv[2] if len(sys.argv) > 2 else None
+
+    start_time = time.perf_counter()
+    output = convert_roads(source, output)
+    elapsed = time.perf_counter() - start_time
+    print(f"{source} -> {output}: {os.path.getsize(output) / (1024 * 1024):.1f} МБ, {elapsed:.2f} секунд")
@@ -24,18 +24,17 @@ def run_comprehensive_tests():
     print("\n📊 Графыг ачаалж байна...")
     start_time = time.time()
     road_network = RoadNetworkGraph("gis_osm_roads_free_1.shp")
-    G = road_network.get_graph()
     load_time = time.time() - start_time
 
     print(f"✅ Ачааллаа ({load_time:.2f} секунд)")
-    print(f"   - Оройн тоо: {G.number_of_nodes():,}")
-    print(f"   - Ирмэгийн тоо: {G.number_of_edges():,}")
+    print(f"   - Оройн тоо: {road_network.node_count:,}")
+    print(f"   - Ирмэгийн тоо: {road_network.edge_count:,}")
 
-    if G.number_of_nodes() == 0:
+    if road_network.node_count == 0:
         print("\n❌ Граф хоосон байна!")
         return
 
-    nodes_list = list(G.nodes())
+    nodes_list = road_network.nodes()
 
     # Тест кейсүүд - өөр өөр зайнууд
     test_cases = [
@@ -132,8 +131,8 @@ def run_comprehensive_tests():
     with open('test_results.json', 'w', encoding='utf-8') as f:
         json.dump({
             'graph_info': {
-                'nodes': G.number_of_nodes(),
-                'edges': G.number_of_edges(),
+                'nodes': road_network.node_count,
+                'edges': road_network.edge_count,
                 'load_time': round(load_time, 2)
             },
             'tests': all_results
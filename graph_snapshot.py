@@ -0,0 +1,130 @@
+"""
+Замын графын хоёртын (binary) snapshot
+
+Оройн координат, CSR хөршийн бүтэц, ирмэгийн шинж чанаруудыг тусдаа .npy
+массив болгон хадгалж, дараагийн эхлэлд memory-map хийж уншина. Ижил машин
+дээрх олон процесс нэг файлыг map хийхэд үйлдлийн систем хуудсуудыг хуваалцана.
+"""
+
+import json
+import os
+import shutil
+
+import numpy as np
+
+# Snapshot-н бүтэц өөрчлөгдөх бүрт нэмэгдүүлнэ
+SNAPSHOT_VERSION = 5
+
+# Хадгалах массивуудын нэрс
+ARRAY_NAMES = (
+    'node_coords',   # (N, 2) float64 [lon, lat]
+    'indptr',        # (N + 1,) int64 - CSR мөрийн эхлэл
+    'indices',       # (E,) int32 - ирмэгийн төгсгөл орой
+    'weight',        # (E,) float32 - зай (км)
+    'time',          # (E,) float32 - хугацаа (минут)
+    'road_type',     # (E,) int8/16/32 - fclass хүснэгтийн код (хүснэгтийн хэмжээгээр)
+    'name',          # (E,) int8/16/32 - name хүснэгтийн код
+    'oneway',        # (E,) int8/16/32 - oneway хүснэгтийн код
+    'weak_component',    # (N,) int32 - сул холбоост бүрэлдэхүүний дугаар
+    'strong_component',  # (N,) int32 - хүчтэй холбоост бүрэлдэхүүний дугаар
+)
+
+# Хялбаршуулсан (2-р зэргийн оройн гинжийг нэгтгэсэн) графын нэмэлт массивууд
+GEOMETRY_ARRAY_NAMES = (
+    'geometry_indptr',   # (E + 1,) int64 - ирмэг бүрийн завсрын цэгүүдийн эхлэл
+    'geometry_coords',   # (G, 2) float64 [lon, lat] - ирмэгийн чиглэлийн дарааллаар
+    'geometry_share',    # (G,) float64 - завсрын цэг хүртэлх зай / ирмэгийн зай
+)
+
+# Буулгах (snap_points) сегментийн индексийн массивууд - эхлэл бүрт дахин
+# тооцохгүйн тулд хадгална (STRtree-г анх буулгах үед эдгээрээс үүсгэнэ)
+SEGMENT_ARRAY_NAMES = (
+    'segment_nodes',     # (S, 2) int64 - сегментийн (u, v), u < v
+    'piece_segment',     # (P,) int64 - шулуун хэсгийн сегмент
+    'piece_start',       # (P, 2) float64 [lon, lat] - хэсгийн эхлэл (u -> v чиглэлд)
+    'piece_end',         # (P, 2) float64 [lon, lat] - хэсгийн төгсгөл
+    'piece_offset',      # (P,) float64 - хэсгийн эхлэл хүртэлх зай / сегментийн зай
+    'piece_share',       # (P,) float64 - хэсгийн зай / сегментийн зай
+)
+
+META_FILE = 'meta.json'
+
+
+def default_snapshot_dir(source_path, simplified=False):
+    """Эх файлын хажууд байрлах snapshot хавтасны нэр (хялбаршуулсан граф тусдаа)"""
+    return os.path.splitext(source_path)[0] + ('.simple.graph' if simplified else '.graph')
+
+
+def source_signature(source_path):
+    """
+    Эх өгөгдлийн файлуудын хэмжээ ба өөрчлөгдсөн хугацаа
+
+    .shp файлын хувьд шинж чанарууд нь .dbf-д байдаг тул хоёуланг нь шалгана.
+    """
+    base, extension = os.path.splitext(source_path)
+    paths = (source_path, base + '.dbf') if extension.lower() == '.shp' else (source_path,)
+    signature = {}
+    for path in paths:
+        if os.path.exists(path):
+            stat = os.stat(path)
+            signature[os.path.basename(path)] = [stat.st_size, stat.st_mtime_ns]
+    return signature
+
+
+def save_snapshot(snapshot_dir, arrays, tables, signature):
+    """
+    Snapshot-г түр хавтсанд бичээд атомаар солих
+
+    Args:
+        snapshot_dir: Хадгалах хавтас
+        arrays: {нэр: NumPy массив} (графын хувьд ARRAY_NAMES)
+        tables: Ангиллын кодын хүснэгтүүд {'road_type': [...], ...}
+        signature: source_signature()-н үр дүн
+    """
+    tmp_dir = f"{snapshot_dir}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    for name, array in arrays.items():
+        np.save(os.path.join(tmp_dir, f"{name}.npy"), np.ascontiguousarray(array))
+
+    with open(os.path.join(tmp_dir, META_FILE), 'w', encoding='utf-8') as f:
+        json.dump({
+            'version': SNAPSHOT_VERSION,
+            'source': signature,
+            'tables': tables
+        }, f, ensure_ascii=False)
+
+    shutil.rmtree(snapshot_dir, ignore_errors=True)
+    os.replace(tmp_dir, snapshot_dir)
+
+
+def load_snapshot(snapshot_dir, signature, names=ARRAY_NAMES):
+    """
+    Snapshot-г memory-map хийж унших
+
+    Args:
+        snapshot_dir: Snapshot хавтас
+        signature: source_signature()-н үр дүн
+        names: Унших массивуудын нэрс
+
+    Returns:
+        (arrays, tables) эсвэл эх файл өөрчлөгдсөн / snapshot байхгүй бол None
+    """
+    meta_path = os.path.join(snapshot_dir, META_FILE)
+    try:
+        with open(meta_path, encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('version') != SNAPSHOT_VERSION or meta.get('source') != signature:
+            return None
+
+        # np.memmap дэд классын индексжүүлэлт удаан тул санах ойг хуваалцсан
+        # энгийн ndarray харагдац болгоно
+        arrays = {
+            name: np.asarray(np.load(os.path.join(snapshot_dir, f"{name}.npy"), mmap_mode='r'))
+            for name in names
+        }
+    except (OSError, ValueError):
+        return None
+
+    return arrays, meta['tables']
@@ -0,0 +1,32 @@
+"""
+Gunicorn тохиргоо - production горим
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+
+import multiprocessing
+import os
+
+# app.py-н хөгжүүлэлтийн серверийн порт
+bind = '0.0.0.0:3000'
+
+# Хайлт CPU ачаалалтай тул процессын тоо = CPU-н тоо; thread-үүд I/O-г (JSON,
+# газрын зургийн файл) давхцуулна
+workers = multiprocessing.cpu_count()
+worker_class = 'gthread'
+threads = 4
+
+# Графыг master-т ачаалж, fork хийхэд worker-үүд хуваалцана (wsgi.py)
+preload_app = True
+
+# Хол зайн хайлт, том матриц удаж болно
+timeout = 120
+
+# /api/compare-н процессын pool: worker бүр fork-с хойш анхны compare хүсэлтээр
+# өөрийн pool-г үүсгэнэ (app.py). Pool-н процесс бүр графыг snapshot-с
+# memory-map хийх тул массивууд page cache-р хуваалцагдах ч Python объект,
+# хайлтын санах ой процесс бүрт тусдаа - нийт процесс нь
+# workers × (1 + COMPARE_POOL_WORKERS). Их бол алгоритмууд зэрэг ажиллаж
+# /api/compare хурдан, санах ой их; 0 бол алгоритмуудыг worker дотор дараалан
+# ажиллуулна. Орчны хувьсагчаар (COMPARE_POOL_WORKERS=4 gunicorn ...) өөрчилнө.
+raw_env = [f"COMPARE_POOL_WORKERS={os.environ.get('COMPARE_POOL_WORKERS', 2)}"]
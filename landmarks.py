@@ -0,0 +1,178 @@
+"""
+ALT (A*, Landmarks, Triangle inequality) - газрын тэмдэгт (landmark) суурилсан доод хязгаар
+
+Цөөн тооны landmark L сонгож, L-с орой бүр хүртэлх (урагш) болон орой бүрээс
+L хүртэлх (урвуу) хамгийн богино зайг урьдчилан тооцно. Гурвалжны тэнцэтгэл
+бишээр v-с t хүртэлх зай дараах хоёроос багагүй:
+
+    d(L, t) - d(L, v)        ба        d(v, L) - d(t, L)
+
+Бүх landmark-н хамгийн их утгыг A*-н heuristic болгон ашиглана. Орой бүрийн
+урагш, урвуу зайнууд нэг мөрөнд зэрэгцэн байрлах тул heuristic нь нэг мөр
+уншина. Хүснэгт float32 тул бөөрөнхийлөлтийн алдааг хасаж, heuristic-г
+зөвшөөрөгдөхүйц байлгана.
+
+Урьдчилан боловсруулах (offline):
+    python landmarks.py
+"""
+
+import os
+import time
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+from graph_snapshot import load_snapshot, save_snapshot
+
+# Хадгалах массивуудын нэрс
+LANDMARK_ARRAY_NAMES = (
+    'landmarks',       # (K,) int32 - landmark оройнууд
+    'distances',       # (N, 2K) float32 - [d(L, v) ... | d(v, L) ...]
+)
+
+# Landmark-н тоо - их байх тусам доод хязгаар нарийн, хүснэгт том
+LANDMARK_COUNT = 16
+
+# Хүрэх боломжгүй зайны оронд хадгалах том тоо (inf - inf = NaN-с зайлсхийнэ)
+UNREACHABLE = 1e30
+
+# float32 бөөрөнхийлөлтийн харьцангуй алдааны дээд хязгаар (хоёр утгын зөрүүнд)
+FLOAT32_TOLERANCE = 2.0 ** -22
+
+
+class Landmarks:
+    """ALT landmark-н зайн хүснэгтүүд ба доод хязгаарын heuristic"""
+
+    def __init__(self, arrays, stats=None):
+        """
+        Args:
+            arrays: LANDMARK_ARRAY_NAMES нэр бүхий массивууд
+            stats: Бэлтгэлийн статистик {'landmarks': ..., 'tolerance': ..., 'build_seconds': ...}
+        """
+        self.arrays = arrays
+        self.distances = arrays['distances']
+        self.stats = stats or {}
+        self.tolerance = self.stats.get('tolerance', 0.0)
+
+    @classmethod
+    def build(cls, indptr, indices, weight, count=LANDMARK_COUNT, seed=0):
+        """
+        CSR графаас landmark сонгож зайн хүснэгтүүдийг тооцох
+
+        Landmark-уудыг хамгийн хол цэгийн (farthest-point) аргаар сонгоно:
+        дараагийн landmark нь сонгогдсон бүх landmark-аас хамгийн хол орой.
+
+        Args:
+            indptr, indices, weight: Графын CSR массивууд
+            count: Landmark-н тоо
+            seed: Эхний санамсаргүй оройн seed
+
+        Returns:
+            Landmarks
+        """
+        build_start = time.perf_counter()
+        node_count = len(indptr) - 1
+        forward_graph = csr_matrix(
+            (np.asarray(weight), np.asarray(indices), np.asarray(indptr)),
+            shape=(node_count, node_count))
+        backward_graph = forward_graph.transpose().tocsr()
+
+        count = min(count, node_count)
+        landmarks = np.empty(count, dtype=np.int32)
+        distances = np.empty((node_count, 2 * count), dtype=np.float32)
+
+        # Эхний landmark: санамсаргүй оройгоос хамгийн хол орой
+        if count > 0:
+            start = np.random.default_rng(seed).integers(node_count)
+            nearest = dijkstra(forward_graph, indices=start)
+        max_distance = 0.0
+
+        for k in range(count):
+            # Хүрэх боломжгүй (inf) оройнуудыг тусдаа бүрэлдэхүүн гэж үзэж алгасна
+            reachable = np.where(np.isfinite(nearest), nearest, -1.0)
+            landmark = int(np.argmax(reachable))
+            landmarks[k] = landmark
+
+            forward = dijkstra(forward_graph, indices=landmark)
+            backward = dijkstra(backward_graph, indices=landmark)
+            for column, values in ((k, forward), (count + k, backward)):
+                finite = np.isfinite(values)
+                max_distance = max(max_distance, float(values[finite].max()))
+                distances[:, column] = np.where(finite, values, UNREACHABLE)
+            nearest = forward if k == 0 else np.minimum(nearest, forward)
+
+        return cls({
+            'landmarks': landmarks,
+            'distances': distances
+        }, {
+            'landmarks': int(count),
+            'tolerance': FLOAT32_TOLERANCE * max_distance,
+            'build_seconds': time.perf_counter() - build_start
+        })
+
+    def save(self, landmark_dir, signature):
+        """Хүснэгтүүдийг snapshot хэлбэрээр хадгалах"""
+        save_snapshot(landmark_dir, self.arrays, self.stats, signature)
+
+    @classmethod
+    def load(cls, landmark_dir, signature):
+        """Хадгалсан хүснэгтүүдийг memory-map хийж унших (байхгүй/хуучирсан бол None)"""
+        if not os.path.isdir(landmark_dir):
+            return None
+        snapshot = load_snapshot(landmark_dir, signature, names=LANDMARK_ARRAY_NAMES)
+        if snapshot is None:
+            return None
+        arrays, stats = snapshot
+        return cls(arrays, stats)
+
+    def heuristic(self, targets):
+        """
+        targets хүртэлх зайн доод хязгаарыг буцаах функц үүсгэх
+
+        Args:
+            targets: [(орой, үлдэх зай)] - виртуал төгсгөлийн хувьд сегментийн
+                үзүүрүүд ба тэдгээрээс төгсгөл хүртэлх хэсэгчилсэн зай
+
+        Returns:
+            function(орой) -> доод хязгаар; зам байхгүй нь тодорхой бол UNREACHABLE орчим
+        """
+        target_rows = np.asarray(self.distances[[node for node, _ in targets]], dtype=float)
+        offsets = np.array([offset for _, offset in targets], dtype=float)
+        landmark_count = self.distances.shape[1] // 2
+        # Урагш хэсэгт d(L, t) - d(L, v), урвуу хэсэгт d(v, L) - d(t, L)
+        sign = np.repeat([1.0, -1.0], landmark_count)
+        distances = self.distances
+        tolerance = self.tolerance
+        cache = {}
+
+        if len(targets) == 1:
+            target_row, offset = target_rows[0], float(offsets[0])
+
+            def heuristic(node):
+                bound = cache.get(node)
+                if bound is None:
+                    bound = float(((target_row - distances[node]) * sign).max())
+                    bound = cache[node] = max(bound - tolerance, 0.0) + offset
+                return bound
+        else:
+            def heuristic(node):
+                bound = cache.get(node)
+                if bound is None:
+                    bounds = ((target_rows - distances[node]) * sign).max(axis=1)
+                    bound = cache[node] = float(
+                        (np.maximum(bounds - tolerance, 0.0) + offsets).min())
+                return bound
+
+        return heuristic
+
+
+if __name__ == "__main__":
+    from read_osm import RoadNetworkGraph
+
+    # app.py-н (SIMPLIFY_GRAPH) ашигладаг хялбаршуулсан графд бэлтгэнэ
+    road_network = RoadNetworkGraph("gis_osm_roads_free_1.shp", simplify=True)
+    for metric in ('distance', 'time'):
+        landmarks = road_network.build_landmarks(metric)
+        print(f"ALT ({metric}) бэлтгэгдлээ: {landmarks.stats['landmarks']} landmark, "
+              f"{landmarks.stats['build_seconds']:.2f} секунд")
@@ -1,76 +1,883 @@
+import heapq
+import json
+import math
+import os
+import sys
+import time
+from collections import deque, namedtuple
+from itertools import chain
+
 import geopandas as gpd
 import networkx as nx
+import shapely
 from shapely.geometry import Point
 import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
+from scipy.sparse.csgraph import dijkstra as sparse_dijkstra
+from scipy.spatial import cKDTree
+
+from contraction_hierarchy import ContractionHierarchy
+from graph_snapshot import (ARRAY_NAMES, GEOMETRY_ARRAY_NAMES, SEGMENT_ARRAY_NAMES, default_snapshot_dir,
+                            load_snapshot, save_snapshot, source_signature)
+from landmarks import Landmarks
+from route_cache import RouteCache
+
+# Дэлхийн радиус (км)
+EARTH_RADIUS_KM = 6371.0
+
+# Хайлтын хэмжүүр -> ирмэгийн шинж чанар
+METRIC_ATTRIBUTES = {'distance': 'weight', 'time': 'time'}
+
+# search()-р нэрээр нь ажиллуулах алгоритмууд
+ALGORITHMS = ('bfs', 'dfs', 'dijkstra', 'astar', 'bidirectional', 'ch', 'alt')
+
+# maxspeed тодорхойгүй үед ашиглах хурд (км/цаг)
+DEFAULT_MAX_SPEED = 50
+
+# Хүрэх бүсийн (isochrone) concave hull-н ratio: 0 - хамгийн хотгор, 1 - гүдгэр
+ISOCHRONE_HULL_RATIO = 0.1
+
+# Хүрэх бүс цэг/шугам болж хувирах үед (1-2 орой) тэлэх зай (км)
+ISOCHRONE_BUFFER_KM = 0.1
+
+# Нэг орой болгон нэгтгэх координатын зөрүү (градус, ~0.1 м) - 0 бол зөвхөн яг ижил координат
+NODE_MERGE_TOLERANCE = 1e-6
+
+# Shapefile-с нэг удаад унших мөрийн (замын) тоо - санах ойн оргилыг хязгаарлана
+INGEST_CHUNK_SIZE = 100_000
+
+# Граф үүсгэхэд хэрэгтэй шинж чанарын баганууд (бусдыг уншихгүй)
+INGEST_COLUMNS = ('fclass', 'name', 'oneway', 'maxspeed')
+
+# GeoParquet / Arrow IPC файлын өргөтгөл -> pyarrow.dataset формат (бусад нь shapefile-р уншина)
+ARROW_FORMATS = {'.parquet': 'parquet', '.geoparquet': 'parquet',
+                 '.arrow': 'ipc', '.feather': 'ipc', '.ipc': 'ipc'}
+
+# Ирмэгийн кодлох шинж чанар -> (shapefile багана, багана байхгүй үеийн утга)
+ATTRIBUTE_COLUMNS = {
+    'road_type': ('fclass', 'unknown'),
+    'name': ('name', 'Unnamed'),
+    'oneway': ('oneway', 'no')
+}
+
+# Гинжийг нэгтгэх хоёр ирмэгийн хурдны (хугацаа / зай) харьцангуй зөрүүний дээд хязгаар
+CHAIN_SPEED_TOLERANCE = 1e-5
+
+# search()-н кэшд хадгалах хайсан оройн тоо (эхнийх нь) - бүх хайсан оройг
+# хадгалбал 256 үр дүн хэдэн зуун МБ болно; нийт тоо нь visited_count-д
+CACHED_VISITED_LIMIT = 500
+
+# Завсрын цэгийн хувийг буулгасан цэгийн хувьтай ижил гэж үзэх зөрүү - буулгасан
+# цэг завсрын орой дээр таарвал тэр оройг замд давхар оруулахгүй
+GEOMETRY_SHARE_TOLERANCE = 1e-9
+
+# CH-гүй зайн матрицад эхлэл бүрийн хайлтын хязгаарыг (limit) төгсгөлүүд хүртэлх
+# Haversine доод хязгаараас эхлүүлж, бүх төгсгөл тогтоотол өсгөх үржвэр
+MATRIX_LIMIT_GROWTH = 2.0
+
+
+def _haversine(lon1, lat1, lon2, lat2):
+    """
+    Haversine томъёогоор зай тооцох - скаляр болон NumPy массив аль алинд ажиллана
+
+    Returns:
+        Зай (км)
+    """
+    lat1_rad = np.radians(lat1)
+    lat2_rad = np.radians(lat2)
+    delta_lat = np.radians(lat2 - lat1)
+    delta_lon = np.radians(lon2 - lon1)
+
+    a = np.sin(delta_lat/2)**2 + np.cos(lat1_rad) * np.cos(lat2_rad) * np.sin(delta_lon/2)**2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1-a))
+
+    return EARTH_RADIUS_KM * c
+
+
+def _lonlat_to_unit(lon, lat):
+    """
+    Уртраг/өргөрөгийг нэгж бөмбөрцөг дээрх 3D цэг болгох
+
+    Хоёр цэгийн хөвчийн (chord) зай нь тэдгээрийн геодезийн зайтай монотон
+    хамааралтай тул энэ огторгуйд хамгийн ойр цэг нь газрын гадарга дээр ч
+    хамгийн ойр байна.
+    """
+    lon_rad = np.radians(lon)
+    lat_rad = np.radians(lat)
+    cos_lat = np.cos(lat_rad)
+    return np.column_stack([cos_lat * np.cos(lon_rad), cos_lat * np.sin(lon_rad), np.sin(lat_rad)])
+
+
+# Ирмэгийн шинж чанарын массивууд (тоон утга эсвэл хүснэгтийн код)
+EDGE_ATTRIBUTE_NAMES = ('weight', 'time', 'road_type', 'name', 'oneway')
+
+
+def _intern(values, table):
+    """
+    Утгуудыг хүснэгтийн код болгох (NaN бол -1)
+
+    table нь {утга: код} dict - шинэ утга анх гарч ирсэн дарааллаар нэмэгдэх
+    тул хэсэг хэсгээр дуудахад бүх утгыг нэг дор pd.factorize хийсэнтэй ижил код гарна.
+    """
+    codes, uniques = pd.factorize(values)
+    mapping = [table.setdefault(value, len(table)) for value in uniques]
+    return np.array(mapping + [-1], dtype=np.int32)[codes]
+
+
+def _unique_rows(values):
+    """
+    (M, 2) массивын ялгаатай мөрүүд (np.unique(axis=0)-с хурдан, санах ой бага)
+
+    Returns:
+        (бүлэг бүрийн анх гарч ирсэн мөрийн индекс, мөр бүрийн бүлгийн дугаар)
+    """
+    # Тогтвортой эрэмбэлэлт тул ижил мөрүүдийн эхнийх нь хамгийн бага индекстэй
+    order = np.lexsort((values[:, 1], values[:, 0]))
+    sorted_values = values[order]
+    new_group = np.ones(len(values), dtype=bool)
+    np.any(sorted_values[1:] != sorted_values[:-1], axis=1, out=new_group[1:])
+    del sorted_values
+    inverse = np.empty(len(values), dtype=np.int64)
+    inverse[order] = np.cumsum(new_group) - 1
+    return order[new_group], inverse
+
+
+def _column_values(gdf, column, default):
+    """GeoDataFrame-н баганыг object массиваар авах (багана байхгүй бол анхны утга)"""
+    if column in gdf.columns:
+        return gdf[column].to_numpy(dtype=object)
+    return np.full(len(gdf), default, dtype=object)
+
+
+def _code_dtype(table):
+    """Хүснэгтийн бүх кодыг (болон утгагүйн -1) багтаах хамгийн бага бүхэл тоон төрөл"""
+    for dtype in (np.int8, np.int16):
+        if len(table) <= np.iinfo(dtype).max:
+            return dtype
+    return np.int32
+
+
+# Зам дээр буулгасан цэг: проекц цэг (lon, lat), сегментийн хоёр оройн индекс,
+# u -> v чиглэлд проекц хүртэлх хувь (0..1), анхны цэгээс зам хүртэлх зай (км)
+SnappedPoint = namedtuple('SnappedPoint', ['point', 'u', 'v', 'fraction', 'distance'])
+
+
+def _partial_edge(edge_data, share):
+    """Ирмэгийн хэсэгт ногдох жин, хугацаатай хуулбар"""
+    return dict(edge_data, weight=edge_data['weight'] * share, time=edge_data['time'] * share)
+
+
+def _parse_max_speed(value):
+    """maxspeed утгыг тоо болгох ("60 mph" гэх мэт тэмдэгт мөрийг ч задална)"""
+    if isinstance(value, str):
+        try:
+            return float(value.split()[0])
+        except (ValueError, IndexError):
+            return DEFAULT_MAX_SPEED
+    return value
+
 
 class RoadNetworkGraph:
-    """OpenStreetMap замын сүлжээг граф болгон хувирган ажиллах класс"""
+    """
+    OpenStreetMap замын сүлжээг граф болгон хувирган ажиллах класс
 
-    def __init__(self, shapefile_path):
+    Хайлтууд бүхэл тоон оройн индекс, CSR массивууд дээр ажиллана. Эхлэл,
+    төгсгөлийг (lon, lat) tuple эсвэл SnappedPoint-р өгч, замыг (lon, lat)
+    tuple-н жагсаалтаар буцаана. networkx граф зөвхөн get_graph() дуудахад үүснэ.
+    """
+
+    def __init__(self, shapefile_path, use_snapshot=True, simplify=False,
+                 merge_tolerance=NODE_MERGE_TOLERANCE, chunk_size=INGEST_CHUNK_SIZE,
+                 bbox=None, columns=None):
         """
         OSM shapefile-г унших
 
         Args:
-            shapefile_path: gis_osm_roads_free_1.shp файлын зам
+            shapefile_path: gis_osm_roads_free_1.shp файлын зам (.parquet / .arrow
+                бол GeoParquet / Arrow IPC-с уншина - convert_roads.py)
+            use_snapshot: Хадгалсан snapshot-г ашиглах/үүсгэх эсэх
+                (.shp/.dbf өөрчлөгдвөл автоматаар дахин үүсгэнэ)
+            simplify: 2-р зэргийн оройн гинжийг завсрын геометртэй нэг ирмэг
+                болгох эсэх (тусдаа snapshot, CH, ALT-тай)
+            merge_tolerance: Энэ зөрүүнээс (градус) ойр координатуудыг нэг орой
+                болгох (0 бол зөвхөн яг ижил координат). Өөрчлөгдвөл snapshot
+                дахин үүснэ.
+            chunk_size: Shapefile-г энэ тооны мөрөөр хэсэглэн унших (None бол
+                бүгдийг нэг дор) - санах ойн оргил нь графын хэмжээгээр хязгаарлагдана
+            bbox: Зөвхөн (minx, miny, maxx, maxy) тэгш өнцөгттэй огтлолцох замууд
+            columns: Унших шинж чанарын баганууд (анхдагч нь INGEST_COLUMNS);
+                уншаагүй баганын оронд анхны утга ашиглана
         """
-        self.gdf = gpd.read_file(shapefile_path)
-        self.graph = nx.DiGraph()  # Чиглэлтэй граф
+        self.shapefile_path = shapefile_path
+        self.use_snapshot = use_snapshot
+        self.simplify = simplify
+        self.merge_tolerance = merge_tolerance
+        self.chunk_size = chunk_size
+        self.bbox = list(bbox) if bbox is not None else None
+        self.columns = list(columns) if columns is not None else list(INGEST_COLUMNS)
+        self.snapshot_dir = default_snapshot_dir(shapefile_path, simplify)
+        self.build_stats = {}  # Үе шат бүрийн хугацаа (секунд)
+        self._graph = None  # networkx граф (get_graph() анх дуудахад үүснэ)
+        self._reverse = None  # Урвуу CSR (хоёр чиглэлтэй хайлтад анх хэрэгтэй үед)
+        self.route_cache = RouteCache()  # search()-н үр дүн
         self._build_graph()
 
     def _build_graph(self):
-        """Shapefile-с граф үүсгэх"""
-        print(f"Нийт {len(self.gdf)} замыг уншиж байна...")
+        """Snapshot эсвэл shapefile-с граф үүсгэх (хуучин графын кэшлэсэн үр дүнг хасна)"""
+        self.route_cache.clear()
+        snapshot_dir = self.snapshot_dir
+        # Нэгтгэх зөрүү, bbox, баганууд өөр бол граф өөр тул snapshot, CH, ALT хүчингүй
+        signature = self.source_signature = dict(
+            source_signature(self.shapefile_path), merge_tolerance=self.merge_tolerance,
+            bbox=self.bbox, columns=self.columns)
+
+        snapshot = None
+        if self.use_snapshot:
+            stage_start = time.perf_counter()
+            names = ARRAY_NAMES + GEOMETRY_ARRAY_NAMES if self.simplify else ARRAY_NAMES
+            snapshot = load_snapshot(snapshot_dir, signature, names + SEGMENT_ARRAY_NAMES)
+            self.build_stats['snapshot'] = time.perf_counter() - stage_start
+
+        if snapshot is not None:
+            self.arrays, self.tables = snapshot
+            print(f"Snapshot-с ачааллаа: {snapshot_dir}")
+        else:
+            self.arrays, self.tables = self._build_csr(self._extract_edges())
+            if self.simplify:
+                self.arrays = self._contract_chains(self.arrays)
+            self.arrays.update(self._connected_components(self.arrays))
+
+        self._init_core()
+        if snapshot is None:
+            # Сегментийн массивууд _init_core-н завсрын геометрийг ашиглана
+            self.arrays.update(self._segment_arrays())
+            if self.use_snapshot:
+                stage_start = time.perf_counter()
+                save_snapshot(snapshot_dir, self.arrays, self.tables, signature)
+                self.build_stats['save'] = time.perf_counter() - stage_start
+
+        self._init_segments()
+        self.max_speed = self._network_max_speed()
+
+        # Урьдчилан бэлтгэсэн CH (contraction_hierarchy.py), ALT landmark
+        # хүснэгтүүд (landmarks.py) байвал хэмжүүр бүрээр ачаалах
+        self.contraction_hierarchies = {}
+        self.landmarks = {}
+        for metric in METRIC_ATTRIBUTES:
+            ch = ContractionHierarchy.load(self._contraction_hierarchy_dir(metric), signature)
+            if ch is not None:
+                self.contraction_hierarchies[metric] = ch
+            landmarks = Landmarks.load(self._landmarks_dir(metric), signature)
+            if landmarks is not None:
+                self.landmarks[metric] = landmarks
+
+        print(f"Граф үүслээ: {self.node_count} оройтой, {self.edge_count} ирмэгтэй")
+        self.edge_memory = self._edge_memory()
+        print(f"Ирмэгийн шинж чанар: {self.edge_memory['compact']:.1f} байт/ирмэг "
+              f"(ирмэг бүр Python объект байсан бол ~{self.edge_memory['objects']:.1f})")
+        print("Үе шат бүрийн хугацаа: " + ", ".join(
+            f"{stage} {seconds:.2f}с" for stage, seconds in self.build_stats.items()))
+
+    def _init_core(self):
+        """
+        Хайлтын массивуудыг бэлтгэх
 
-        for idx, row in self.gdf.iterrows():
-            if row.geometry is None:
-                continue
+        memoryview нь (memory-map хийсэн) NumPy массивыг хуулахгүйгээр
+        элемент бүрийг Python тоо болгон хурдан уншина.
+        """
+        arrays = self.arrays
+        self.node_count = len(arrays['node_coords'])
+        self.edge_count = len(arrays['indices'])
+        # Виртуал оройнууд (node_count, node_count + 1) хоосон CSR мөртэй байхаар сунгана
+        self._indptr = memoryview(np.append(arrays['indptr'], [self.edge_count] * 2))
+        self._indices = memoryview(np.ascontiguousarray(arrays['indices']))
+        self._coords = memoryview(np.ascontiguousarray(arrays['node_coords']))
+        # Ирмэгийн шинж чанар -> жингийн массив
+        self._edge_weights = {
+            attribute: memoryview(np.ascontiguousarray(arrays[attribute]))
+            for attribute in METRIC_ATTRIBUTES.values()
+        }
+        # Ирмэгүүдийн завсрын геометр - хялбаршуулаагүй графын бүх ирмэг шулуун
+        if 'geometry_indptr' in arrays:
+            self._geometry_indptr = arrays['geometry_indptr']
+            self._geometry_coords = arrays['geometry_coords']
+            self._geometry_share = arrays['geometry_share']
+        else:
+            self._geometry_indptr = np.zeros(self.edge_count + 1, dtype=np.int64)
+            self._geometry_coords = np.empty((0, 2))
+            self._geometry_share = np.empty(0)
+        self._has_geometry = len(self._geometry_coords) > 0
+        # Өөр сул холбоост бүрэлдэхүүнд байгаа хоёр цэгийн хооронд зам байхгүй
+        self._weak_component = memoryview(np.ascontiguousarray(arrays['weak_component']))
+        component_sizes = np.bincount(arrays['strong_component'])
+        self.largest_component = int(component_sizes.argmax()) if len(component_sizes) else -1
+
+    def _edge_memory(self, sample_size=1000):
+        """
+        Ирмэгийн шинж чанарын санах ой (байт/ирмэг)
+
+        'compact' нь төрөлжсөн массивууд ба хуваалцсан кодын хүснэгтүүд,
+        'objects' нь ирмэг бүр өөрийн dict, float, тэмдэгт мөр объекттой
+        (networkx-н ирмэгийн өгөгдөл шиг) байх үеийн дээж дээрх дундаж.
+        """
+        edge_count = max(self.edge_count, 1)
+        table_bytes = sum(sys.getsizeof(value) for name in ('road_type', 'name', 'oneway')
+                          for value in self.tables[name])
+        compact = (sum(self.arrays[name].nbytes for name in EDGE_ATTRIBUTE_NAMES)
+                   + table_bytes) / edge_count
+
+        sample = np.linspace(0, self.edge_count - 1, min(sample_size, self.edge_count)).astype(np.int64)
+        tables = {name: self.tables[name] + [np.nan] for name in ('road_type', 'name', 'oneway')}
+        total = 0
+        for position in sample.tolist():
+            edge_data = {
+                'weight': float(self.arrays['weight'][position]),
+                'time': float(self.arrays['time'][position]),
+            }
+            for name, table in tables.items():
+                # Ирмэг бүр өөрийн хуулбар мөртэй (shapefile-с мөр бүрээр уншсан шиг)
+                value = table[self.arrays[name][position]]
+                edge_data[name] = value
+                total += sys.getsizeof(value)
+            total += sys.getsizeof(edge_data) + 2 * sys.getsizeof(0.0)
+        return {'compact': compact, 'objects': total / max(len(sample), 1)}
+
+    def get_graph(self):
+        """
+        networkx граф буцаах (анх дуудахад CSR массивуудаас үүсгэнэ)
+
+        Орой нь (lon, lat) tuple, ирмэг бүр weight, time, road_type, name,
+        oneway шинж чанартай. Хайлтууд үүнийг ашигладаггүй.
+        """
+        if self._graph is not None:
+            return self._graph
+
+        stage_start = time.perf_counter()
+        arrays = self.arrays
+        node_keys = list(map(tuple, arrays['node_coords'].tolist()))
+
+        # Код -1 (утгагүй) нь жагсаалтын сүүлчийн NaN элементийг заана
+        road_types = self.tables['road_type'] + [np.nan]
+        names = self.tables['name'] + [np.nan]
+        oneways = self.tables['oneway'] + [np.nan]
+
+        source = np.repeat(np.arange(len(node_keys)), np.diff(arrays['indptr']))
+
+        # Оройг эхэлж нэмснээр анх гарч ирсэн дараалал хадгалагдана
+        graph = nx.DiGraph()
+        graph.add_nodes_from((key, {'id': i}) for i, key in enumerate(node_keys))
+        graph.add_edges_from(
+            (node_keys[u], node_keys[v], {
+                'weight': weight,
+                'time': travel_time,
+                'road_type': road_types[road_type],
+                'name': names[name],
+                'oneway': oneways[oneway]
+            })
+            for u, v, weight, travel_time, road_type, name, oneway in zip(
+                source.tolist(), arrays['indices'].tolist(),
+                arrays['weight'].tolist(), arrays['time'].tolist(),
+                arrays['road_type'].tolist(), arrays['name'].tolist(),
+                arrays['oneway'].tolist()
+            )
+        )
+        self.build_stats['graph'] = time.perf_counter() - stage_start
+        self._graph = graph
+        return graph
+
+    def nodes(self):
+        """Бүх оройн (lon, lat) tuple-н жагсаалт (индексийн дарааллаар)"""
+        return list(map(tuple, self.arrays['node_coords'].tolist()))
+
+    def node_key(self, node):
+        """
+        Оройн индексийн (lon, lat) tuple
+
+        Бүх оройн tuple-н жагсаалтыг процесс бүрт хадгалахын оронд
+        (memory-map хийсэн) node_coords-с хэрэгтэй үед нь үүсгэнэ.
+        """
+        return (self._coords[node, 0], self._coords[node, 1])
+
+    def build_options(self):
+        """
+        Ижил графыг (ижил snapshot signature, оройн дугаар) дахин үүсгэх
+        байгуулагчийн параметрүүд - shapefile_path-с бусад
+
+        Returns:
+            RoadNetworkGraph(shapefile_path, **options)-д дамжуулах dict
+        """
+        return {
+            'simplify': self.simplify,
+            'merge_tolerance': self.merge_tolerance,
+            'chunk_size': self.chunk_size,
+            'bbox': self.bbox,
+            'columns': self.columns
+        }
+
+    def component_info(self):
+        """Холбоост бүрэлдэхүүнүүдийн тоо ба хамгийн том хүчтэй бүрэлдэхүүний оройн тоо"""
+        strong = np.asarray(self.arrays['strong_component'])
+        weak = np.asarray(self.arrays['weak_component'])
+        return {
+            'weak': int(weak.max()) + 1 if len(weak) else 0,
+            'strong': int(strong.max()) + 1 if len(strong) else 0,
+            'largest_strong_nodes': int(np.count_nonzero(strong == self.largest_component))
+        }
+
+    def _build_csr(self, edges):
+        """
+        Ирмэгийн жагсаалтыг CSR массив болгох
+
+        Давхардсан (u, v) ирмэгээс сүүлийнх нь шинж чанар үлдэх ба хөршүүд анх
+        нэмэгдсэн дарааллаараа байна - networkx.DiGraph-д нэмсэнтэй ижил үр дүн.
+
+        Returns:
+            (arrays, tables): graph_snapshot.ARRAY_NAMES массивууд ба кодын хүснэгтүүд
+        """
+        stage_start = time.perf_counter()
+        node_count = len(edges['node_coords'])
+        key = edges['source'] * node_count + edges['target']
+
+        unique_key, first = np.unique(key, return_index=True)
+        _, last_reversed = np.unique(key[::-1], return_index=True)
+        last = len(key) - 1 - last_reversed
+
+        # Эх оройгоор, дараа нь анх нэмэгдсэн дарааллаар эрэмбэлэх
+        order = np.lexsort((first, unique_key // node_count))
+        first, last = first[order], last[order]
+
+        source = edges['source'][first]
+        indptr = np.zeros(node_count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(source, minlength=node_count), out=indptr[1:])
+
+        row = edges['row'][last]
+        road_type_table = edges['tables']['road_type']
+        name_table = edges['tables']['name']
+        # Буцах ирмэг нэг чиглэлтэй биш ('no'); ирмэгт ашиглагдсан утгуудыг
+        # анх гарч ирсэн дарааллаар нь шинэ хүснэгт болгоно
+        row_oneway_table = edges['tables']['oneway']
+        if 'no' not in row_oneway_table:
+            row_oneway_table = row_oneway_table + ['no']
+        edge_oneway, used = pd.factorize(np.where(
+            edges['forward'][last], edges['oneway'][row], row_oneway_table.index('no')))
+        valid = used >= 0
+        oneway_codes = np.where(valid, np.cumsum(valid) - 1, -1)[edge_oneway]
+        oneway_table = [row_oneway_table[code] for code in used[valid]]
+
+        arrays = {
+            'node_coords': edges['node_coords'],
+            'indptr': indptr,
+            'indices': edges['target'][first].astype(np.int32),
+            'weight': edges['weight'][last].astype(np.float32),
+            'time': edges['time'][last].astype(np.float32),
+            'road_type': edges['road_type'][row].astype(_code_dtype(road_type_table)),
+            'name': edges['name'][row].astype(_code_dtype(name_table)),
+            'oneway': oneway_codes.astype(_code_dtype(oneway_table))
+        }
+        tables = {
+            'road_type': road_type_table,
+            'name': name_table,
+            'oneway': oneway_table,
+            'merge': edges['merge']
+        }
+        self.build_stats['csr'] = time.perf_counter() - stage_start
+        return arrays, tables
+
+    def _contract_chains(self, arrays):
+        """
+        2-р зэргийн оройн гинжийг нэг ирмэг болгох (графыг хялбаршуулах)
+
+        Яг хоёр хөрштэй, хоёр чиглэлд (нэг чиглэлтэй замд нэг чиглэлд) дамжин
+        өнгөрөх оройг хасаж, гинжийн ирмэгүүдийн зай, хугацааг нэмнэ. Хасагдсан
+        оройнуудын координат ирмэгийн завсрын геометр болж үлдэх тул замыг
+        бүтэн зурна. Зөвхөн ижил төрөл, нэр, oneway, хурдтай ирмэгүүд нэгдэх
+        тул ирмэгийн хэсэгт ногдох хугацаа зайтайгаа пропорциональ хэвээр байна.
+        Хоёр оройн хооронд нэгээс олон гинж, эсвэл өөр рүүгээ буцах гинж үүсвэл
+        гинжийн дунд оройг үлдээнэ - сегмент бүр нэг л геометртэй байна.
+
+        Returns:
+            ARRAY_NAMES ба GEOMETRY_ARRAY_NAMES массивууд
+        """
+        stage_start = time.perf_counter()
+        node_count = len(arrays['node_coords'])
+        source = np.repeat(np.arange(node_count), np.diff(arrays['indptr']))
+        indptr = arrays['indptr'].tolist()
+        indices = arrays['indices'].tolist()
+        sources = source.tolist()
+        weight = arrays['weight'].tolist()
+        travel_time = arrays['time'].tolist()
+        attributes = list(zip(arrays['road_type'].tolist(), arrays['name'].tolist(),
+                              arrays['oneway'].tolist()))
+
+        # Дамжин өнгөрөх орой: хоёр хөрштэй, орох/гарах ирмэг 2/2 (хоёр чиглэлтэй) эсвэл 1/1
+        pairs = np.unique(np.sort(np.column_stack([source, arrays['indices']]), axis=1), axis=0)
+        pairs = pairs[pairs[:, 0] != pairs[:, 1]]
+        neighbor_count = np.bincount(pairs.ravel(), minlength=node_count)
+        out_degree = np.diff(arrays['indptr'])
+        in_degree = np.bincount(arrays['indices'], minlength=node_count)
+        loops = np.bincount(source[source == arrays['indices']], minlength=node_count)
+        through = ((neighbor_count == 2) & (loops == 0) & (out_degree == in_degree)
+                   & (out_degree >= 1) & (out_degree <= 2))
+
+        # Орох ирмэг бүр ба түүний үргэлжлэл болох гарах ирмэг ижил шинж чанар, хурдтай байх ёстой
+        in_order = np.argsort(arrays['indices'], kind='stable').tolist()
+        in_indptr = [0] + np.cumsum(in_degree).tolist()
+        for node in np.flatnonzero(through).tolist():
+            for incoming in in_order[in_indptr[node]:in_indptr[node + 1]]:
+                outgoing = next(edge for edge in range(indptr[node], indptr[node + 1])
+                                if indices[edge] != sources[incoming])
+                a = travel_time[incoming] * weight[outgoing]
+                b = travel_time[outgoing] * weight[incoming]
+                if attributes[incoming] != attributes[outgoing] \
+                        or abs(a - b) > CHAIN_SPEED_TOLERANCE * (a + b):
+                    through[node] = False
+                    break
+
+        def follow(edge, keep):
+            """edge-с эхлэн үлдэх орой хүртэл гинжийг дагах -> (төгсгөл, завсрын оройнууд, ирмэгүүд)"""
+            previous, node = sources[edge], indices[edge]
+            interior, edges = [], [edge]
+            while not keep[node]:
+                interior.append(node)
+                edge = next(edge for edge in range(indptr[node], indptr[node + 1])
+                            if indices[edge] != previous)
+                edges.append(edge)
+                previous, node = node, indices[edge]
+            return node, interior, edges
+
+        keep = (~through).tolist()
+        while True:
+            chains = []
+            segment_chain = {}  # (u, v), u <= v -> (гинжийн завсрын оройн хамгийн бага нь, завсрын оройнууд)
+            split = set()
+            reached = [False] * node_count
+            for node in range(node_count):
+                if not keep[node]:
+                    continue
+                for edge in range(indptr[node], indptr[node + 1]):
+                    end, interior, edges = follow(edge, keep)
+                    chains.append((node, end, interior, edges))
+                    for inner in interior:
+                        reached[inner] = True
+                    if interior and end == node:
+                        split.add(interior[len(interior) // 2])
+                        continue
+                    chain_id = min(interior) if interior else -1
+                    other_id, other_interior = segment_chain.setdefault(
+                        (min(node, end), max(node, end)), (chain_id, interior))
+                    if other_id != chain_id:
+                        longer = interior or other_interior
+                        split.add(longer[len(longer) // 2])
+
+            # Бүх орой нь дамжин өнгөрөх тойрог бүрээс нэг оройг үлдээнэ
+            for node in range(node_count):
+                if not keep[node] and not reached[node]:
+                    keep[node] = True
+                    split.add(node)
+                    _, interior, _ = follow(indptr[node], keep)
+                    for inner in interior:
+                        reached[inner] = True
+
+            if not split:
+                break
+            for node in split:
+                keep[node] = True
+
+        # Гинж бүрийн нийт зай, хугацаа ба завсрын оройн хувь (зайгаар)
+        chain_weight, chain_time, shares = [], [], []
+        for _, _, interior, edges in chains:
+            lengths = [weight[edge] for edge in edges]
+            total = sum(lengths)
+            chain_weight.append(total)
+            chain_time.append(sum(travel_time[edge] for edge in edges))
+            if total > 0:
+                cumulative = 0.0
+                for length in lengths[:-1]:
+                    cumulative += length
+                    shares.append(cumulative / total)
+            else:
+                shares.extend((i + 1) / len(edges) for i in range(len(interior)))
+
+        keep = np.array(keep, dtype=bool)
+        new_id = np.cumsum(keep) - 1
+        kept_count = int(keep.sum())
+        chain_source = new_id[np.array([c[0] for c in chains], dtype=np.int64)]
+        chain_target = new_id[np.array([c[1] for c in chains], dtype=np.int64)]
+        first_edge = np.array([c[3][0] for c in chains], dtype=np.int64)
+        geometry_nodes = np.fromiter(chain.from_iterable(c[2] for c in chains), np.int64)
+
+        new_indptr = np.zeros(kept_count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(chain_source, minlength=kept_count), out=new_indptr[1:])
+        geometry_indptr = np.zeros(len(chains) + 1, dtype=np.int64)
+        np.cumsum([len(c[2]) for c in chains], out=geometry_indptr[1:])
+
+        simplified = {
+            'node_coords': arrays['node_coords'][keep],
+            'indptr': new_indptr,
+            'indices': chain_target.astype(np.int32),
+            'weight': np.array(chain_weight, dtype=np.float32),
+            'time': np.array(chain_time, dtype=np.float32),
+            'road_type': arrays['road_type'][first_edge],
+            'name': arrays['name'][first_edge],
+            'oneway': arrays['oneway'][first_edge],
+            'geometry_indptr': geometry_indptr,
+            'geometry_coords': arrays['node_coords'][geometry_nodes].reshape(-1, 2),
+            'geometry_share': np.array(shares, dtype=float)
+        }
+        self.build_stats['simplify'] = time.perf_counter() - stage_start
+        print(f"Гинж нэгтгэлээ: {node_count} -> {kept_count} орой, "
+              f"{len(indices)} -> {len(chains)} ирмэг")
+        return simplified
+
+    def _connected_components(self, arrays):
+        """
+        Орой бүрийн сул ба хүчтэй холбоост бүрэлдэхүүний дугаар
+
+        Сул бүрэлдэхүүн өөр бол зам байхгүй (хайлтыг шууд зогсооно). Хүчтэй
+        бүрэлдэхүүн дотор дурын хоёр оройн хооронд хоёр чиглэлд зам бий.
+
+        Returns:
+            {'weak_component', 'strong_component'}: (N,) int32 массивууд
+        """
+        stage_start = time.perf_counter()
+        node_count = len(arrays['node_coords'])
+        graph = csr_matrix(
+            (np.ones(len(arrays['indices']), dtype=np.int8), arrays['indices'], arrays['indptr']),
+            shape=(node_count, node_count))
+        weak_count, weak = connected_components(graph, directed=True, connection='weak')
+        strong_count, strong = connected_components(graph, directed=True, connection='strong')
+        self.build_stats['components'] = time.perf_counter() - stage_start
+        print(f"Холбоост бүрэлдэхүүн: {weak_count} сул, {strong_count} хүчтэй")
+        return {
+            'weak_component': weak.astype(np.int32),
+            'strong_component': strong.astype(np.int32)
+        }
+
+    def _read_chunks(self):
+        """
+        Shapefile-г chunk_size мөрөөр GeoDataFrame хэсгүүд болгон унших (bbox, columns-р шүүнэ)
+
+        Хэсэг бүрийг боловсруулсны дараа хаях тул бүтэн GeoDataFrame санах ойд үүсэхгүй.
+        """
+        file_format = ARROW_FORMATS.get(os.path.splitext(self.shapefile_path)[1].lower())
+        if file_format is not None:
+            yield from self._read_arrow_chunks(file_format)
+            return
+
+        bbox = tuple(self.bbox) if self.bbox is not None else None
+        start = 0
+        while True:
+            stage_start = time.perf_counter()
+            rows = slice(start, start + self.chunk_size) if self.chunk_size else None
+            # pyogrio: хэсэг бүр файлын эхнээс дахин уншихгүй (fiona-д rows-н эхлэл
+            # мөр бүрийг гүйлгэдэг), columns-г ч зөвхөн pyogrio хэрэгжүүлдэг
+            gdf = gpd.read_file(self.shapefile_path, rows=rows, bbox=bbox, columns=self.columns,
+                                engine='pyogrio')
+            self.build_stats['read'] += time.perf_counter() - stage_start
+            if len(gdf):
+                yield gdf
+            if not self.chunk_size or len(gdf) < self.chunk_size:
+                return
+            start += self.chunk_size
+
+    def _read_arrow_chunks(self, file_format):
+        """
+        GeoParquet / Arrow IPC файлыг багцаар унших - зөвхөн columns ба геометрийн баганыг
+
+        Геометр нь GeoParquet-н 'geo' metadata-д заасан WKB багана. bbox-р
+        shapefile-тэй адил тэгш өнцөгттэй огтлолцох замуудыг үлдээнэ.
+        """
+        import pyarrow.dataset as ds
+
+        dataset = ds.dataset(self.shapefile_path, format=file_format)
+        metadata = dataset.schema.metadata or {}
+        geometry_column = json.loads(metadata.get(b'geo', b'{}')).get('primary_column', 'geometry')
+        columns = [column for column in self.columns if column in dataset.schema.names]
+        area = shapely.box(*self.bbox) if self.bbox is not None else None
+
+        stage_start = time.perf_counter()
+        if self.chunk_size:
+            batches = dataset.to_batches(columns=columns + [geometry_column],
+                                         batch_size=self.chunk_size)
+        else:
+            batches = dataset.to_table(columns=columns + [geometry_column]).combine_chunks().to_batches()
+        for batch in batches:
+            geometry = shapely.from_wkb(batch.column(geometry_column).to_numpy(zero_copy_only=False))
+            gdf = gpd.GeoDataFrame(
+                {column: batch.column(column).to_pandas() for column in columns},
+                geometry=geometry)
+            if area is not None:
+                gdf = gdf[shapely.intersects(gdf.geometry.values, area)]
+            self.build_stats['read'] += time.perf_counter() - stage_start
+            if len(gdf):
+                yield gdf
+            stage_start = time.perf_counter()
+
+    def _extract_edges(self):
+        """
+        Shapefile-с бүх чиглэлтэй ирмэгийг баганан (columnar) массив болгон гаргах
+
+        Замуудыг _read_chunks-р хэсэг хэсгээр уншиж, хэсэг бүрээс зөвхөн
+        сегментийн үзүүрүүд, мөрийн хурд, шинж чанарын кодыг хадгална.
+        Ирмэгүүд хуучин мөр бүрээр давтах дараалалтай ижил: мөр бүрийн сегмент
+        бүрт эхлээд урагш, дараа нь (хоёр чиглэлтэй бол) буцах ирмэг.
 
-            # LineString-н эхлэх ба төгсгөлийн цэгүүд
-            coords = list(row.geometry.coords)
-
-            for i in range(len(coords) - 1):
-                start_node = coords[i]
-                end_node = coords[i + 1]
-
-                # Замын урт тооцох (км-ээр)
-                distance = self._calculate_distance(start_node, end_node)
-
-                # Хурд (км/цаг)
-                max_speed = row.get('maxspeed', 50)
-                if isinstance(max_speed, str):
-                    try:
-                        max_speed = float(max_speed.split()[0])
-                    except:
-                        max_speed = 50
-
-                # Цаг тооцох (минут)
-                time = (distance / max_speed) * 60 if max_speed > 0 else float('inf')
-
-                # Граф руу ирмэг нэмэх
-                self.graph.add_edge(
-                    start_node,
-                    end_node,
-                    weight=distance,
-                    time=time,
-                    road_type=row.get('fclass', 'unknown'),
-                    name=row.get('name', 'Unnamed'),
-                    oneway=row.get('oneway', 'no')
-                )
-
-                # Хоёр чиглэлтэй зам бол буцаах ирмэг нэмэх
-                if row.get('oneway', 'no') != 'yes':
-                    self.graph.add_edge(
-                        end_node,
-                        start_node,
-                        weight=distance,
-                        time=time,
-                        road_type=row.get('fclass', 'unknown'),
-                        name=row.get('name', 'Unnamed'),
-                        oneway='no'
-                    )
-
-        print(f"Граф үүслээ: {self.graph.number_of_nodes()} оройтой, "
-              f"{self.graph.number_of_edges()} ирмэгтэй")
+        Returns:
+            dict: {
+                'node_coords': (N, 2) массив [lon, lat], анх гарч ирсэн дарааллаар,
+                'source', 'target': Ирмэгийн оройн индексүүд,
+                'weight': Зай (км), 'time': Хугацаа (минут),
+                'row': Ирмэг харьяалагдах замын (shapefile-н уншсан) мөр,
+                'forward': Урагш чиглэлийн ирмэг эсэх,
+                'road_type', 'name', 'oneway': Мөр бүрийн шинж чанарын код,
+                'tables': Кодын хүснэгтүүд {'road_type': [...], ...},
+                'merge': Оройн нэгтгэлийн тоо {'tolerance', 'merged_vertices',
+                    'dropped_segments'}
+            }
+        """
+        for stage in ('read', 'geometry', 'attributes'):
+            self.build_stats[stage] = 0.0
+        tables = {name: {} for name in ATTRIBUTE_COLUMNS}
+        endpoint_chunks = [np.empty((0, 2, 2))]
+        segment_row_chunks = [np.empty(0, dtype=np.int64)]
+        max_speed_chunks = [np.empty(0)]
+        code_chunks = {name: [np.empty(0, dtype=np.int32)] for name in ATTRIBUTE_COLUMNS}
+        row_count = 0
+
+        for gdf in self._read_chunks():
+            # 1. Хэсгийн бүх LineString-н координатыг нэг дор задлах
+            stage_start = time.perf_counter()
+            parts, part_row = shapely.get_parts(gdf.geometry.values, return_index=True)
+            coords, vertex_part = shapely.get_coordinates(parts, return_index=True)
+
+            # Нэг LineString-д хамаарах дараалсан хоёр цэг бүр нэг сегмент
+            segment = np.flatnonzero(vertex_part[1:] == vertex_part[:-1])
+            endpoint_chunks.append(np.stack([coords[segment], coords[segment + 1]], axis=1))
+            segment_row_chunks.append(part_row[vertex_part[segment]] + row_count)
+            self.build_stats['geometry'] += time.perf_counter() - stage_start
+
+            # Мөр бүрийн хурд, шинж чанарын код
+            stage_start = time.perf_counter()
+            if 'maxspeed' in gdf.columns:
+                max_speed_chunks.append(gdf['maxspeed'].map(_parse_max_speed).to_numpy(dtype=float))
+            else:
+                max_speed_chunks.append(np.full(len(gdf), float(DEFAULT_MAX_SPEED)))
+            for name, (column, default) in ATTRIBUTE_COLUMNS.items():
+                code_chunks[name].append(_intern(_column_values(gdf, column, default), tables[name]))
+            row_count += len(gdf)
+            self.build_stats['attributes'] += time.perf_counter() - stage_start
+        print(f"Нийт {row_count} зам уншлаа")
+
+        segment_row = np.concatenate(segment_row_chunks)
+        max_speed = np.concatenate(max_speed_chunks)
+        codes = {name: np.concatenate(chunks) for name, chunks in code_chunks.items()}
+        tables = {name: list(table) for name, table in tables.items()}
+
+        # 2. Оройн координатыг анх гарч ирсэн дарааллаар нь бүхэл тоон индекс болгох
+        stage_start = time.perf_counter()
+        endpoints = np.concatenate(endpoint_chunks).reshape(-1, 2)
+        del endpoint_chunks
+        endpoint_id, node_coords, merged = self._merge_vertices(endpoints)
+        del endpoints
+        endpoint_id = endpoint_id.reshape(-1, 2)
+
+        # Хоёр үзүүр нь нэг оройд нэгдсэн (тэг урттай) сегментүүд өөр рүүгээ гогцоо болох тул хасна
+        keep = endpoint_id[:, 0] != endpoint_id[:, 1]
+        merge_stats = {
+            'tolerance': self.merge_tolerance,
+            'merged_vertices': merged,
+            'dropped_segments': int(len(keep) - np.count_nonzero(keep))
+        }
+        print(f"Ойролцоо оройг нэгтгэлээ: {merged} орой нэгдэж, "
+              f"{merge_stats['dropped_segments']} тэг урттай сегмент хасагдлаа")
+        endpoint_id = endpoint_id[keep]
+        segment_row = segment_row[keep]
+        start_coords = node_coords[endpoint_id[:, 0]]
+        end_coords = node_coords[endpoint_id[:, 1]]
+        self.build_stats['nodes'] = time.perf_counter() - stage_start
+
+        # 3. Зай, хугацааг массиваар тооцох
+        stage_start = time.perf_counter()
+        distance = _haversine(start_coords[:, 0], start_coords[:, 1],
+                              end_coords[:, 0], end_coords[:, 1])
+
+        # OSM-д 0 эсвэл хоосон maxspeed нь "тодорхойгүй" гэсэн утгатай
+        with np.errstate(invalid='ignore'):
+            max_speed = np.where(max_speed > 0, max_speed, float(DEFAULT_MAX_SPEED))
+        travel_time = (distance / max_speed[segment_row]) * 60
+
+        yes_code = tables['oneway'].index('yes') if 'yes' in tables['oneway'] else -2
+        two_way = codes['oneway'][segment_row] != yes_code
+        self.build_stats['attributes'] += time.perf_counter() - stage_start
+
+        # 4. Урагш болон буцах ирмэгүүдийг хуучин дарааллаар нь нийлүүлэх
+        stage_start = time.perf_counter()
+        segment_count = len(endpoint_id)
+        order = np.arange(2 * segment_count).reshape(-1, 2)
+        keep = np.column_stack([np.ones(segment_count, dtype=bool), two_way]).ravel()
+        slot = order.ravel()[keep]
+        forward = slot % 2 == 0
+        edge_segment = slot // 2
+
+        source = np.where(forward, endpoint_id[edge_segment, 0], endpoint_id[edge_segment, 1])
+        target = np.where(forward, endpoint_id[edge_segment, 1], endpoint_id[edge_segment, 0])
+        self.build_stats['edges'] = time.perf_counter() - stage_start
+
+        return {
+            'node_coords': node_coords,
+            'source': source,
+            'target': target,
+            'weight': distance[edge_segment],
+            'time': travel_time[edge_segment],
+            'row': segment_row[edge_segment],
+            'forward': forward,
+            'road_type': codes['road_type'],
+            'name': codes['name'],
+            'oneway': codes['oneway'],
+            'tables': tables,
+            'merge': merge_stats
+        }
+
+    def _merge_vertices(self, endpoints):
+        """
+        Сегментийн үзүүрүүдийг орой болгох - merge_tolerance-с ойр координатуудыг нэгтгэнэ
+
+        Координатыг эхлээд merge_tolerance хэмжээтэй тор руу бүхэлчилж (quantize),
+        дараа нь торын хилийн хоёр талд орсон ойрхон нүднүүдийг cKDTree-р олж
+        нэгтгэнэ. Нэгдсэн оройн координат нь бүлгийн анх гарч ирсэн цэгийнх.
+
+        Args:
+            endpoints: (M, 2) [lon, lat] массив
+
+        Returns:
+            (endpoints-н оройн индекс, (N, 2) оройн координат анх гарч ирсэн
+            дарааллаар, нэгдсэн (ялгаатай боловч өөр оройтой нийлсэн) координатын тоо)
+        """
+        tolerance = self.merge_tolerance
+        first_seen, inverse = _unique_rows(endpoints)
+        exact_count = len(first_seen)
+
+        group_first = first_seen
+        if tolerance > 0:
+            first_seen, inverse = _unique_rows(np.round(endpoints / tolerance).astype(np.int64))
+            group_first = first_seen
+            pairs = cKDTree(endpoints[first_seen]).query_pairs(tolerance, output_type='ndarray')
+            if len(pairs):
+                cell_count = len(first_seen)
+                adjacency = csr_matrix((np.ones(len(pairs), dtype=np.int8), (pairs[:, 0], pairs[:, 1])),
+                                       shape=(cell_count, cell_count))
+                _, group = connected_components(adjacency, directed=False)
+                group_first = np.full(group.max() + 1, len(endpoints), dtype=np.int64)
+                np.minimum.at(group_first, group, first_seen)
+                inverse = group[inverse]
+
+        rank = np.empty(len(group_first), dtype=np.int64)
+        rank[np.argsort(group_first, kind='stable')] = np.arange(len(group_first))
+        node_coords = np.empty((len(group_first), 2))
+        node_coords[rank] = endpoints[group_first]
+        return rank[inverse], node_coords, exact_count - len(group_first)
 
     def _calculate_distance(self, coord1, coord2):
         """
@@ -79,21 +886,22 @@ class RoadNetworkGraph:
         Returns:
             Зай (км)
         """
-        lat1, lon1 = coord1[1], coord1[0]
-        lat2, lon2 = coord2[1], coord2[0]
-
-        # Дэлхийн радиус (км)
-        R = 6371.0
-
-        lat1_rad = np.radians(lat1)
-        lat2_rad = np.radians(lat2)
-        delta_lat = np.radians(lat2 - lat1)
-        delta_lon = np.radians(lon2 - lon1)
+        return _haversine(coord1[0], coord1[1], coord2[0], coord2[1])
 
-        a = np.sin(delta_lat/2)**2 + np.cos(lat1_rad) * np.cos(lat2_rad) * np.sin(delta_lon/2)**2
-        c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1-a))
+    @property
+    def node_index(self):
+        """
+        Оройн координатын KD-tree (find_nearest_node, _node_id-д ашиглана)
 
-        return R * c
+        Эхлэлийг удаашруулахгүйн тулд анх хэрэгтэй үед үүснэ; зэрэг хоёр
+        хүсэлт давхар үүсгэж болох ч үр дүн ижил.
+        """
+        if self._node_index is None and self.node_count > 0:
+            stage_start = time.perf_counter()
+            node_coords = self.arrays['node_coords']
+            self._node_index = cKDTree(_lonlat_to_unit(node_coords[:, 0], node_coords[:, 1]))
+            self.build_stats['index'] = time.perf_counter() - stage_start
+        return self._node_index
 
     def find_nearest_node(self, lat, lon):
         """
@@ -106,160 +914,652 @@ class RoadNetworkGraph:
         Returns:
             Хамгийн ойр орой
         """
-        target = (lon, lat)
-        min_dist = float('inf')
-        nearest = None
+        return self.find_nearest_nodes([lat], [lon])[0]
 
-        for node in self.graph.nodes():
-            dist = np.sqrt((node[0] - target[0])**2 + (node[1] - target[1])**2)
-            if dist < min_dist:
-                min_dist = dist
-                nearest = node
+    def find_nearest_nodes(self, lats, lons):
+        """
+        Олон координатын хамгийн ойр оройг KD-tree-ээр нэг дор олох
 
-        return nearest
+        Args:
+            lats: Өргөрөгүүд
+            lons: Уртрагууд
 
-    def get_graph(self):
-        """Граф буцаах"""
-        return self.graph
+        Returns:
+            Орой бүрийн жагсаалт (граф хоосон бол None)
+        """
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        if self.node_index is None:
+            return [None] * len(lats)
+
+        _, nearest = self.node_index.query(_lonlat_to_unit(lons, lats))
+        return list(map(tuple, self.arrays['node_coords'][nearest].tolist()))
+
+    def _edge_polylines(self, positions, reverse=None):
+        """
+        CSR ирмэгүүдийн бүтэн шугамын оройнууд: эх орой, завсрын геометр, төгсгөл орой
+
+        Args:
+            positions: Ирмэгүүдийн CSR байрлал
+            reverse: Ирмэг бүрийн шугамыг эсрэг (төгсгөлөөс эх рүү) өгөх эсэх
+
+        Returns:
+            (owner, coords, shares) - оройн харьяалах ирмэг (positions-н индекс),
+            (M, 2) координат, шугамын эхнээс хүрэх зайн хувь (0..1); ирмэг бүрийн
+            оройнууд дараалан байрлана
+        """
+        arrays = self.arrays
+        positions = np.asarray(positions, dtype=np.int64)
+        if reverse is None:
+            reverse = np.zeros(len(positions), dtype=bool)
+        source = np.searchsorted(arrays['indptr'], positions, side='right') - 1
+        target = arrays['indices'][positions]
+        first = self._geometry_indptr[positions]
+        inner_counts = self._geometry_indptr[positions + 1] - first
+
+        counts = inner_counts + 2
+        owner = np.repeat(np.arange(len(positions)), counts)
+        rank = np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts)
+        inner_count = inner_counts[owner]
+        backward = reverse[owner]
+        head = rank == 0
+        tail = rank == inner_count + 1
+        inner = ~(head | tail)
+
+        node_coords = arrays['node_coords']
+        coords = np.empty((len(owner), 2))
+        shares = np.empty(len(owner))
+        coords[head] = node_coords[np.where(reverse, target, source)]
+        coords[tail] = node_coords[np.where(reverse, source, target)]
+        shares[head] = 0.0
+        shares[tail] = 1.0
+        inner_rank = np.where(backward, inner_count - rank, rank - 1)[inner]
+        geometry = first[owner][inner] + inner_rank
+        coords[inner] = self._geometry_coords[geometry]
+        shares[inner] = np.where(backward[inner], 1.0 - self._geometry_share[geometry],
+                                 self._geometry_share[geometry])
+        return owner, coords, shares
+
+    def _segment_arrays(self):
+        """
+        Замын сегментүүдийн шулуун хэсгүүд (snap_points-д, SEGMENT_ARRAY_NAMES)
+
+        Хялбаршуулсан графын сегмент нь завсрын геометрийнхээ олон шулуун
+        хэсэгтэй; хэсэг бүр сегмент дээрх байрлалаа (хувиар) мэднэ. Snapshot-д
+        хадгалагдах тул зөвхөн графыг үүсгэхэд тооцно.
+        """
+        stage_start = time.perf_counter()
+        arrays = self.arrays
+        source = np.repeat(np.arange(self.node_count), np.diff(arrays['indptr']))
+
+        # Хоёр чиглэлтэй замын u -> v, v -> u ирмэгүүд нэг сегмент болно
+        pairs = np.sort(np.column_stack([source, arrays['indices']]), axis=1)
+        segment_nodes, edge = np.unique(pairs, axis=0, return_index=True)
+
+        # Сегментийн шугамыг u -> v чиглэлд, хөрш оройнуудын хос бүр нэг хэсэг
+        owner, coords, shares = self._edge_polylines(edge, source[edge] != segment_nodes[:, 0])
+        piece = np.flatnonzero(owner[1:] == owner[:-1])
+        self.build_stats['segments'] = time.perf_counter() - stage_start
+        return {
+            'segment_nodes': segment_nodes,
+            'piece_segment': owner[piece],
+            'piece_start': coords[piece],
+            'piece_end': coords[piece + 1],
+            'piece_offset': shares[piece],
+            'piece_share': shares[piece + 1] - shares[piece]
+        }
+
+    def _init_segments(self):
+        """Сегментийн массивуудыг холбох - KD-tree, STRtree-г анх хэрэгтэй үед үүсгэнэ"""
+        arrays = self.arrays
+        self.segment_nodes = arrays['segment_nodes']
+        self._piece_segment = arrays['piece_segment']
+        self._piece_start = arrays['piece_start']
+        self._piece_end = arrays['piece_end']
+        self._piece_offset = arrays['piece_offset']
+        self._piece_share = arrays['piece_share']
+        self._node_index = None
+        self._segment_index = None
+        self._largest_segment_index = None  # snap_points(largest_component=True)-д анх хэрэгтэй үед
+
+    @property
+    def segment_index(self):
+        """Сегментийн шулуун хэсгүүдийн STRtree (анх буулгах үед үүснэ)"""
+        if self._segment_index is None:
+            stage_start = time.perf_counter()
+            self._piece_lines = shapely.linestrings(np.stack([self._piece_start, self._piece_end], axis=1))
+            self._segment_index = shapely.STRtree(self._piece_lines)
+            self.build_stats['segment_index'] = time.perf_counter() - stage_start
+        return self._segment_index
+
+    def build_indexes(self):
+        """
+        KD-tree, STRtree-г (бүх болон хамгийн том бүрэлдэхүүний) одоо үүсгэх
+
+        gunicorn-н master процесст fork-с өмнө дуудвал worker-үүд тэдгээрийг
+        copy-on-write-р хуваалцана; эс бөгөөс анх хэрэгтэй үед үүснэ.
+        """
+        self.node_index
+        self._snap_index(largest_component=True)
+
+    def _snap_index(self, largest_component):
+        """
+        Буулгах STRtree ба түүний индекс -> хэсгийн дугаарын массив (бүх хэсэг бол None)
+
+        largest_component бол зөвхөн хамгийн том хүчтэй бүрэлдэхүүн доторх
+        сегментүүдийн мод (анх хэрэгтэй үед үүснэ).
+        """
+        segment_index = self.segment_index
+        if not largest_component:
+            return segment_index, None
+        if self._largest_segment_index is None:
+            in_largest = np.asarray(self.arrays['strong_component']) == self.largest_component
+            segment_nodes = self.segment_nodes[self._piece_segment]
+            pieces = np.flatnonzero(in_largest[segment_nodes[:, 0]] & in_largest[segment_nodes[:, 1]])
+            self._largest_segment_index = (shapely.STRtree(self._piece_lines[pieces]), pieces)
+        return self._largest_segment_index
+
+    def snap_points(self, lats, lons, largest_component=False):
+        """
+        Координат бүрийг хамгийн ойр замын сегмент дээр буулгах
+
+        STRtree-ээс хавтгай (градус) зайгаар хамгийн ойр сегментийг олоод,
+        уртрагийн шахалтыг тооцож болох бүх нэр дэвшигчийг дахин шалгана.
+        Проекц цэгийг орон нутгийн тэгш өнцөгт (equirectangular) координатад
+        тооцно.
+
+        Args:
+            lats: Өргөрөгүүд
+            lons: Уртрагууд
+            largest_component: Зөвхөн хамгийн том хүчтэй холбоост бүрэлдэхүүн дээр
+                буулгах - буулгасан дурын хоёр цэгийн хооронд зам байна
+
+        Returns:
+            SnappedPoint-н жагсаалт (граф хоосон бол None)
+        """
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        if len(self.segment_nodes) == 0:
+            return [None] * len(lats)
+
+        segment_index, pieces = self._snap_index(largest_component)
+        points = shapely.points(lons, lats)
+        (query, _), planar = segment_index.query_nearest(
+            points, return_distance=True, all_matches=False)
+
+        # Геодезийн хувьд илүү ойр сегмент хавтгай зайны 1/cos(lat) дотор байна
+        radius = np.empty(len(lats))
+        radius[query] = planar / np.cos(np.radians(lats[query])) * (1 + 1e-9) + 1e-12
+        query, segment = segment_index.query(points, predicate='dwithin', distance=radius)
+        if pieces is not None:
+            segment = pieces[segment]
+
+        scale = np.cos(np.radians(lats[query]))
+        start = self._piece_start[segment]
+        end = self._piece_end[segment]
+        ax, ay = (start[:, 0] - lons[query]) * scale, start[:, 1] - lats[query]
+        dx, dy = (end[:, 0] - start[:, 0]) * scale, end[:, 1] - start[:, 1]
+        length_sq = dx * dx + dy * dy
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fraction = np.where(length_sq > 0, -(ax * dx + ay * dy) / length_sq, 0.0)
+        fraction = np.clip(fraction, 0.0, 1.0)
+        offset_sq = (ax + fraction * dx) ** 2 + (ay + fraction * dy) ** 2
+
+        # Цэг бүрийн хамгийн ойр нэр дэвшигч
+        order = np.lexsort((offset_sq, query))
+        best = order[np.flatnonzero(np.r_[True, query[order][1:] != query[order][:-1]])]
+
+        snapped = []
+        for i in best:
+            t = float(fraction[i])
+            point_lon, point_lat = (start[i] + t * (end[i] - start[i])).tolist()
+            # Хэсэг доторх байрлалыг бүтэн сегмент дээрх хувь болгох
+            piece = segment[i]
+            segment_nodes = self.segment_nodes[self._piece_segment[piece]]
+            snapped.append(SnappedPoint(
+                point=(point_lon, point_lat),
+                u=int(segment_nodes[0]),
+                v=int(segment_nodes[1]),
+                fraction=min(1.0, float(self._piece_offset[piece] + t * self._piece_share[piece])),
+                distance=float(_haversine(lons[query[i]], lats[query[i]], point_lon, point_lat))
+            ))
+        return snapped
+
+    def snap_point(self, lat, lon, largest_component=False):
+        """Нэг координатыг хамгийн ойр замын сегмент дээр буулгах"""
+        return self.snap_points([lat], [lon], largest_component)[0]
+
+    def _search_endpoints(self, start, end):
+        """
+        Хайлтын эхлэл, төгсгөлийг оройн индекс болгох
 
-    def bfs(self, start_node, end_node):
+        SnappedPoint өгөгдвөл проекц цэгийг виртуал орой (node_count-с эхэлсэн
+        индекс) болгож, сегментийн үзүүрүүдтэй хэсэгчилсэн жинтэй ирмэгээр
+        холбоно. Виртуал ирмэгүүд зөвхөн энэ хайлтын overlay-д байх тул графыг
+        өөрчлөхгүй.
+
+        Returns:
+            (start_node, end_node, overlay, virtual) - overlay: {орой: {хөрш:
+            ирмэгийн өгөгдөл}}, virtual: {виртуал орой: (lon, lat)}; олдоогүй
+            орой None байна. Эхлэл, төгсгөл өөр сул холбоост бүрэлдэхүүнд
+            байвал зам байхгүй тул хоёулаа None.
+        """
+        overlay = {}
+        virtual = {}
+        start_node = self._attach_virtual(start, overlay, virtual, outgoing=True)
+        end_node = self._attach_virtual(end, overlay, virtual, outgoing=False)
+
+        if start_node is not None and end_node is not None \
+                and self._component(start, start_node) != self._component(end, end_node):
+            return None, None, {}, {}
+
+        # Хоёр цэг нэг сегмент дээр байвал шууд ирмэг нэмэх
+        virtual_start = start_node is not None and start_node >= self.node_count
+        virtual_end = end_node is not None and end_node >= self.node_count
+        if virtual_start and virtual_end and start_node != end_node \
+                and {start.u, start.v} == {end.u, end.v}:
+            for a, b in ((start.u, start.v), (start.v, start.u)):
+                edge_data = self._edge_data(a, b)
+                start_share = start.fraction if a == start.u else 1 - start.fraction
+                end_share = end.fraction if a == end.u else 1 - end.fraction
+                if edge_data is not None and end_share > start_share:
+                    overlay[start_node][end_node] = self._partial_edge_between(
+                        a, b, edge_data, start_share, end_share)
+
+        return start_node, end_node, overlay, virtual
+
+    def _component(self, point, node):
+        """Эхлэл/төгсгөлийн сул холбоост бүрэлдэхүүн (виртуал оройнх нь сегментийнх)"""
+        return self._weak_component[point.u if node >= self.node_count else node]
+
+    def _attach_virtual(self, snapped, overlay, virtual, outgoing):
+        """SnappedPoint-г виртуал орой болгон overlay-д холбох (энгийн оройн индексийг буцаана)"""
+        if not isinstance(snapped, SnappedPoint):
+            return self._node_id(snapped)
+        if snapped.fraction <= 0:
+            return snapped.u
+        if snapped.fraction >= 1:
+            return snapped.v
+
+        # Эхлэл, төгсгөл нэг цэг дээр буувал нэг виртуал орой болно
+        node = next((index for index, point in virtual.items() if point == snapped.point),
+                    self.node_count + len(virtual))
+        virtual[node] = snapped.point
+        overlay.setdefault(node, {})
+        for a, b, share in ((snapped.u, snapped.v, snapped.fraction),
+                            (snapped.v, snapped.u, 1 - snapped.fraction)):
+            edge_data = self._edge_data(a, b)
+            if edge_data is None:
+                continue
+            if outgoing:
+                # Виртуал оройгоос a -> b ирмэгийн үлдсэн хэсгээр b руу
+                overlay[node][b] = self._partial_edge_between(a, b, edge_data, share, 1)
+            else:
+                # a оройгоос a -> b ирмэгийн эхний хэсгээр виртуал орой руу
+                overlay.setdefault(a, {})[node] = self._partial_edge_between(a, b, edge_data, 0, share)
+        return node
+
+    def _node_id(self, node):
+        """
+        (lon, lat) оройн бүхэл тоон индекс
+
+        KD-tree-ээр хамгийн ойр оройг олж, merge_tolerance дотор (нэгтгэсэн
+        координатууд орно) таарвал түүнийг, үгүй бол None буцаана.
+        """
+        if isinstance(node, (int, np.integer)):
+            return int(node) if 0 <= node < self.node_count else None
+        if node is None or self.node_index is None:
+            return None
+        _, index = self.node_index.query(_lonlat_to_unit(node[0], node[1])[0])
+        index = int(index)
+        if math.hypot(self._coords[index, 0] - node[0],
+                      self._coords[index, 1] - node[1]) > self.merge_tolerance:
+            return None
+        return index
+
+    def _neighbor_function(self, overlay, attribute='weight', reverse=False):
+        """
+        Оройн гарах (reverse бол орж ирэх) ирмэгүүдийг (хөрш, жин) буцаах функц
+
+        Массивуудыг closure-д холбосноор орой бүрт атрибут хайхгүй. Виртуал
+        ирмэгүүдийг overlay-с нэмнэ. attribute None бол зөвхөн хөршүүдийг буцаана.
+        """
+        if reverse:
+            indptr, indices, edge_weights = self._reverse_csr()
+        else:
+            indptr, indices, edge_weights = self._indptr, self._indices, self._edge_weights
+
+        if attribute is None:
+            def neighbor_ids(node):
+                start, end = indptr[node], indptr[node + 1]
+                extra = overlay.get(node)
+                if extra is None:
+                    return indices[start:end]
+                return chain(indices[start:end], extra)
+
+            return neighbor_ids
+
+        weights = edge_weights[attribute]
+
+        def neighbors(node):
+            start, end = indptr[node], indptr[node + 1]
+            edges = zip(indices[start:end], weights[start:end])
+            extra = overlay.get(node)
+            if extra is None:
+                return edges
+            return chain(edges, [(v, edge_data[attribute]) for v, edge_data in extra.items()])
+
+        return neighbors
+
+    def _reverse_csr(self):
+        """Урвуу (орж ирэх ирмэгийн) CSR - анх хэрэгтэй үед нэг удаа үүсгэнэ"""
+        if self._reverse is None:
+            arrays = self.arrays
+            source = np.repeat(np.arange(self.node_count, dtype=np.int32),
+                               np.diff(arrays['indptr']))
+            order = np.argsort(arrays['indices'], kind='stable')
+            indptr = np.full(self.node_count + 3, self.edge_count, dtype=np.int64)
+            indptr[0] = 0
+            np.cumsum(np.bincount(arrays['indices'], minlength=self.node_count),
+                      out=indptr[1:self.node_count + 1])
+            self._reverse = (
+                memoryview(indptr),
+                memoryview(source[order]),
+                {attribute: memoryview(np.ascontiguousarray(arrays[attribute][order]))
+                 for attribute in METRIC_ATTRIBUTES.values()}
+            )
+        return self._reverse
+
+    def _edge_data(self, u, v, overlay=None):
+        """u -> v ирмэгийн өгөгдөл {'weight', 'time'} (виртуал ирмэг бол overlay-с, байхгүй бол None)"""
+        if overlay and u in overlay and v in overlay[u]:
+            return overlay[u][v]
+        position = self._edge_position(u, v)
+        if position is None:
+            return None
+        return {attribute: weights[position] for attribute, weights in self._edge_weights.items()}
+
+    def _edge_position(self, u, v):
+        """u -> v ирмэгийн CSR байрлал (байхгүй бол None)"""
+        if u is None or not 0 <= u < self.node_count:
+            return None
+        start, end = self._indptr[u], self._indptr[u + 1]
+        neighbors = self._indices[start:end].tolist()
+        if v not in neighbors:
+            return None
+        return start + neighbors.index(v)
+
+    def _edge_geometry(self, u, v, start_share=0.0, end_share=1.0):
+        """
+        u -> v ирмэгийн завсрын цэгүүдээс (start_share, end_share) хувийн хооронд орших нь
+
+        Хялбаршуулаагүй графын ирмэг шулуун тул хоосон жагсаалт. Хил дээрх
+        (GEOMETRY_SHARE_TOLERANCE дотор) цэгийг оруулахгүй - тэр нь буулгасан
+        цэг (виртуал орой) өөрөө.
+        """
+        position = self._edge_position(u, v)
+        if position is None or not self._has_geometry:
+            return []
+        first, last = self._geometry_indptr[position], self._geometry_indptr[position + 1]
+        if first == last:
+            return []
+        shares = self._geometry_share[first:last]
+        inside = ((shares > start_share + GEOMETRY_SHARE_TOLERANCE)
+                  & (shares < end_share - GEOMETRY_SHARE_TOLERANCE))
+        return list(map(tuple, self._geometry_coords[first:last][inside].tolist()))
+
+    def _partial_edge_between(self, a, b, edge_data, start_share, end_share):
+        """a -> b ирмэгийн [start_share, end_share] хэсэг - завсрын геометртэй (хялбаршуулсан граф)"""
+        partial = _partial_edge(edge_data, end_share - start_share)
+        if self._has_geometry:
+            partial['geometry'] = self._edge_geometry(a, b, start_share, end_share)
+        return partial
+
+    def _path_coords(self, path, overlay, virtual):
+        """
+        Замын оройнуудыг (lon, lat) болгож, ирмэг бүрийн завсрын геометрийг оруулах
+
+        Виртуал ирмэгийн геометрийг overlay-с (_partial_edge_between) авна.
+        """
+        coords = self._to_coords(path, virtual)
+        if not self._has_geometry or len(path) < 2:
+            return coords
+        expanded = [coords[0]]
+        for i in range(len(path) - 1):
+            u, v = path[i], path[i + 1]
+            if u in overlay and v in overlay[u]:
+                expanded.extend(overlay[u][v].get('geometry', ()))
+            else:
+                expanded.extend(self._edge_geometry(u, v))
+            expanded.append(coords[i + 1])
+        return expanded
+
+    def _result(self, path, visited, overlay, virtual):
+        """
+        Оройн индексүүдийг (lon, lat) tuple болгож хайлтын үр дүн үүсгэх
+
+        Аль хэмжүүрээр хайсанаас үл хамааран замын нийт зай, хугацааг хоёуланг нь өгнө.
+        """
+        totals = self._path_totals(path, overlay)
+        return {
+            'path': self._path_coords(path, overlay, virtual),
+            # Дамжуулсан (streamed) visit_log-н оройнууд клиент рүү аль хэдийн илгээгдсэн
+            'visited': [] if getattr(visited, 'streamed', False) else self._to_coords(visited, virtual),
+            'distance': totals['weight'],
+            'time': totals['time'],
+            'found': bool(path)
+        }
+
+    def _to_coords(self, nodes, virtual):
+        """
+        Оройн индексүүдийн (lon, lat) tuple-н жагсаалт
+
+        nodes нь жинхэнэ дараалал байх ёстой - дамжуулсан (streamed)
+        search_stream.VisitStream-г оройн жагсаалт гэж үзэхгүй.
+        """
+        if getattr(nodes, 'streamed', False):
+            raise TypeError("Дамжуулсан visit_log-г координат болгох боломжгүй")
+        if not virtual:
+            coords = self.arrays['node_coords'][np.asarray(nodes, dtype=np.int64)]
+            return list(map(tuple, coords.tolist()))
+        node_count = self.node_count
+        node_key = self.node_key
+        return [node_key(node) if node < node_count else virtual[node] for node in nodes]
+
+    def search(self, algorithm, start_node, end_node, metric='distance'):
+        """
+        Алгоритмыг нэрээр нь ажиллуулах - үр дүнг LRU кэшээс авах/хадгалах
+
+        Кэшийн түлхүүр нь (эхлэл, төгсгөл, алгоритм, хэмжүүр); эхлэл, төгсгөл нь
+        буулгасан сегментийн байрлал тул ойролцоо дарсан цэгүүд ижил түлхүүртэй
+        болно. Буцаасан dict-г кэш хуваалцдаг тул өөрчилж болохгүй. Кэшийг
+        бага байлгахын тул 'visited' нь эхний CACHED_VISITED_LIMIT оройг л
+        агуулна (нийт тоо нь 'visited_count') - бүгдийг нь run_algorithm өгнө.
+
+        Args:
+            algorithm: ALGORITHMS-н нэг
+            start_node: Эхлэх орой (lon, lat) эсвэл SnappedPoint
+            end_node: Төгсгөх орой (lon, lat) эсвэл SnappedPoint
+            metric: 'distance' (км) эсвэл 'time' (минут) - BFS/DFS-д хамаарахгүй
+
+        Returns:
+            {'path', 'visited', 'visited_count', 'distance', 'time', 'found'}
+        """
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Буруу алгоритм: {algorithm}")
+        if algorithm in ('bfs', 'dfs'):
+            metric = None
+        key = (self._endpoint_key(start_node), self._endpoint_key(end_node), algorithm, metric)
+        result = self.route_cache.get(key)
+        if result is None:
+            result = self.run_algorithm(algorithm, start_node, end_node, metric)
+            result = dict(result, visited=result['visited'][:CACHED_VISITED_LIMIT],
+                          visited_count=len(result['visited']))
+            self.route_cache.put(key, result)
+        return result
+
+    def run_algorithm(self, algorithm, start_node, end_node, metric='distance', visit_log=None):
+        """
+        Алгоритмыг нэрээр нь кэшгүйгээр ажиллуулах (хугацаа хэмжих, харьцуулах, дамжуулахад)
+
+        visit_log өгвөл хайсан оройнууд хайлтын явцад түүн рүү нэмэгдэнэ.
+        """
+        if algorithm == 'bfs':
+            result = self.bfs(start_node, end_node, visit_log)
+        elif algorithm == 'dfs':
+            result = self.dfs(start_node, end_node, visit_log)
+        elif algorithm == 'dijkstra':
+            result = self.dijkstra(start_node, end_node, metric, visit_log)
+        elif algorithm == 'astar':
+            result = self.astar(start_node, end_node, metric, visit_log)
+        elif algorithm == 'bidirectional':
+            result = self.bidirectional_dijkstra(start_node, end_node, metric, visit_log)
+        elif algorithm == 'ch':
+            result = self.ch_query(start_node, end_node, metric, visit_log)
+        elif algorithm == 'alt':
+            result = self.alt(start_node, end_node, metric, visit_log)
+        else:
+            raise ValueError(f"Буруу алгоритм: {algorithm}")
+        return result
+
+    def _endpoint_key(self, node):
+        """Эхлэл/төгсгөлийн кэшийн түлхүүр - орой бол индекс, сегмент дээр бол (u, v, хувь)"""
+        if isinstance(node, SnappedPoint):
+            if node.fraction <= 0:
+                return node.u
+            if node.fraction >= 1:
+                return node.v
+            return (node.u, node.v, node.fraction)
+        return self._node_id(node)
+
+    def bfs(self, start_node, end_node, visit_log=None):
         """
         Breadth-First Search (Өргөнөөр эхлэн хайх) алгоритм
 
         Args:
-            start_node: Эхлэх орой
-            end_node: Төгсгөх орой
+            start_node: Эхлэх орой (lon, lat) эсвэл SnappedPoint
+            end_node: Төгсгөх орой (lon, lat) эсвэл SnappedPoint
+            visit_log: Хайсан оройнуудыг хүлээн авах list төст объект (VisitStream)
 
         Returns:
             dict: {
                 'path': Олдсон зам (жагсаалт),
                 'visited': Хайсан оройнууд,
-                'distance': Нийт зай,
+                'distance': Нийт зай (км),
+                'time': Нийт хугацаа (минут),
                 'found': Зам олдсон эсэх
             }
         """
-        if start_node not in self.graph or end_node not in self.graph:
-            return {'path': [], 'visited': [], 'distance': 0, 'found': False}
+        start_node, end_node, overlay, virtual = self._search_endpoints(start_node, end_node)
+        if start_node is None or end_node is None:
+            return {'path': [], 'visited': [], 'distance': 0, 'time': 0, 'found': False}
 
-        from collections import deque
+        neighbors = self._neighbor_function(overlay, attribute=None)
 
-        queue = deque([(start_node, [start_node])])
-        visited = set()
-        visited_order = []
+        # Орой бүрийг анх дараалалд орсон үед нь эцэг оройг тэмдэглэнэ
+        queue = deque([start_node])
+        parents = {start_node: None}
+        visited_order = [] if visit_log is None else visit_log
 
         while queue:
-            current_node, path = queue.popleft()
-
-            if current_node in visited:
-                continue
-
-            visited.add(current_node)
+            current_node = queue.popleft()
             visited_order.append(current_node)
 
             if current_node == end_node:
-                # Замын нийт зайг тооцох
-                total_distance = 0
-                for i in range(len(path) - 1):
-                    edge_data = self.graph.get_edge_data(path[i], path[i+1])
-                    total_distance += edge_data.get('weight', 0)
-
-                return {
-                    'path': path,
-                    'visited': visited_order,
-                    'distance': total_distance,
-                    'found': True
-                }
+                path = self._reconstruct_path(parents, end_node)
+                return self._result(path, visited_order, overlay, virtual)
 
             # Хөрш оройнуудыг дараалалд нэмэх
-            for neighbor in self.graph.neighbors(current_node):
-                if neighbor not in visited:
-                    queue.append((neighbor, path + [neighbor]))
+            for neighbor in neighbors(current_node):
+                if neighbor not in parents:
+                    parents[neighbor] = current_node
+                    queue.append(neighbor)
 
-        return {'path': [], 'visited': visited_order, 'distance': 0, 'found': False}
+        return self._result([], visited_order, overlay, virtual)
 
-    def dfs(self, start_node, end_node):
+    def dfs(self, start_node, end_node, visit_log=None):
         """
         Depth-First Search (Гүнээр эхлэн хайх) алгоритм
 
         Args:
-            start_node: Эхлэх орой
-            end_node: Төгсгөх орой
+            start_node: Эхлэх орой (lon, lat) эсвэл SnappedPoint
+            end_node: Төгсгөх орой (lon, lat) эсвэл SnappedPoint
+            visit_log: Хайсан оройнуудыг хүлээн авах list төст объект (VisitStream)
 
         Returns:
             dict: {
                 'path': Олдсон зам (жагсаалт),
                 'visited': Хайсан оройнууд,
-                'distance': Нийт зай,
+                'distance': Нийт зай (км),
+                'time': Нийт хугацаа (минут),
                 'found': Зам олдсон эсэх
             }
         """
-        if start_node not in self.graph or end_node not in self.graph:
-            return {'path': [], 'visited': [], 'distance': 0, 'found': False}
+        start_node, end_node, overlay, virtual = self._search_endpoints(start_node, end_node)
+        if start_node is None or end_node is None:
+            return {'path': [], 'visited': [], 'distance': 0, 'time': 0, 'found': False}
 
-        stack = [(start_node, [start_node])]
-        visited = set()
-        visited_order = []
+        neighbors = self._neighbor_function(overlay, attribute=None)
+
+        # Стэкт (орой, эцэг орой) хос хадгалж, орой анх гарахад эцгийг нь тогтооно
+        stack = [(start_node, None)]
+        parents = {}
+        visited_order = [] if visit_log is None else visit_log
 
         while stack:
-            current_node, path = stack.pop()
+            current_node, parent = stack.pop()
 
-            if current_node in visited:
+            if current_node in parents:
                 continue
 
-            visited.add(current_node)
+            parents[current_node] = parent
             visited_order.append(current_node)
 
             if current_node == end_node:
-                # Замын нийт зайг тооцох
-                total_distance = 0
-                for i in range(len(path) - 1):
-                    edge_data = self.graph.get_edge_data(path[i], path[i+1])
-                    total_distance += edge_data.get('weight', 0)
-
-                return {
-                    'path': path,
-                    'visited': visited_order,
-                    'distance': total_distance,
-                    'found': True
-                }
+                path = self._reconstruct_path(parents, end_node)
+                return self._result(path, visited_order, overlay, virtual)
 
             # Хөрш оройнуудыг стэк рүү нэмэх (эсрэг дарааллаар)
-            neighbors = list(self.graph.neighbors(current_node))
-            for neighbor in reversed(neighbors):
-                if neighbor not in visited:
-                    stack.append((neighbor, path + [neighbor]))
+            for neighbor in reversed(list(neighbors(current_node))):
+                if neighbor not in parents:
+                    stack.append((neighbor, current_node))
 
-        return {'path': [], 'visited': visited_order, 'distance': 0, 'found': False}
+        return self._result([], visited_order, overlay, virtual)
 
-    def dijkstra(self, start_node, end_node):
+    def dijkstra(self, start_node, end_node, metric='distance', visit_log=None):
         """
-        Dijkstra алгоритм - хамгийн богино замыг олох
+        Dijkstra алгоритм - хамгийн богино (эсвэл хурдан) замыг олох
 
         Args:
-            start_node: Эхлэх орой
-            end_node: Төгсгөх орой
+            start_node: Эхлэх орой (lon, lat) эсвэл SnappedPoint
+            end_node: Төгсгөх орой (lon, lat) эсвэл SnappedPoint
+            metric: 'distance' (км) эсвэл 'time' (минут) - багасгах хэмжүүр
+            visit_log: Хайсан оройнуудыг хүлээн авах list төст объект (VisitStream)
 
         Returns:
             dict: {
                 'path': Хамгийн богино зам (жагсаалт),
                 'visited': Хайсан оройнууд,
-                'distance': Нийт зай,
+                'distance': Нийт зай (км),
+                'time': Нийт хугацаа (минут),
                 'found': Зам олдсон эсэх
             }
         """
-        if start_node not in self.graph or end_node not in self.graph:
-            return {'path': [], 'visited': [], 'distance': 0, 'found': False}
+        start_node, end_node, overlay, virtual = self._search_endpoints(start_node, end_node)
+        if start_node is None or end_node is None:
+            return {'path': [], 'visited': [], 'distance': 0, 'time': 0, 'found': False}
 
-        import heapq
+        neighbors = self._neighbor_function(overlay, METRIC_ATTRIBUTES[metric])
 
-        # Priority queue: (зай, орой, зам)
-        pq = [(0, start_node, [start_node])]
+        # Priority queue: (зай, орой); замыг эцэг оройн map-аар сэргээнэ
+        pq = [(0, start_node)]
         distances = {start_node: 0}
+        parents = {start_node: None}
         visited = set()
-        visited_order = []
+        visited_order = [] if visit_log is None else visit_log
 
         while pq:
-            current_dist, current_node, path = heapq.heappop(pq)
+            current_dist, current_node = heapq.heappop(pq)
 
             if current_node in visited:
                 continue
@@ -268,39 +1568,815 @@ class RoadNetworkGraph:
             visited_order.append(current_node)
 
             if current_node == end_node:
-                return {
-                    'path': path,
-                    'visited': visited_order,
-                    'distance': current_dist,
-                    'found': True
-                }
+                path = self._reconstruct_path(parents, end_node)
+                return self._result(path, visited_order, overlay, virtual)
 
             # Хөрш оройнуудыг шалгах
-            for neighbor in self.graph.neighbors(current_node):
+            for neighbor, weight in neighbors(current_node):
                 if neighbor not in visited:
-                    edge_data = self.graph.get_edge_data(current_node, neighbor)
-                    new_dist = current_dist + edge_data.get('weight', 0)
+                    new_dist = current_dist + weight
 
                     if neighbor not in distances or new_dist < distances[neighbor]:
                         distances[neighbor] = new_dist
-                        heapq.heappush(pq, (new_dist, neighbor, path + [neighbor]))
+                        parents[neighbor] = current_node
+                        heapq.heappush(pq, (new_dist, neighbor))
+
+        return self._result([], visited_order, overlay, virtual)
+
+    def bidirectional_dijkstra(self, start_node, end_node, metric='distance', visit_log=None):
+        """
+        Хоёр чиглэлтэй Dijkstra - эхлэлээс урагш, төгсгөлөөс урвуу графаар зэрэг хайх
+
+        Урвуу хайлт ирмэгүүдийг эсрэг чиглэлд (predecessor) дагадаг тул нэг
+        чиглэлтэй замуудыг зөв тооцно. Хоёр дарааллын оройн утгын нийлбэр
+        олдсон хамгийн сайн зайнаас багагүй болмогц хайлт зогсоно.
+
+        Args:
+            start_node: Эхлэх орой (lon, lat) эсвэл SnappedPoint
+            end_node: Төгсгөх орой (lon, lat) эсвэл SnappedPoint
+            metric: 'distance' (км) эсвэл 'time' (минут) - багасгах хэмжүүр
+            visit_log: Хайсан оройнуудыг хүлээн авах list төст объект (VisitStream)
+
+        Returns:
+            dict: {
+                'path': Хамгийн богино зам (жагсаалт),
+                'visited': Хоёр талын хайсан оройнууд,
+                'distance': Нийт зай (км),
+                'time': Нийт хугацаа (минут),
+                'found': Зам олдсон эсэх
+            }
+        """
+        start_node, end_node, overlay, virtual = self._search_endpoints(start_node, end_node)
+        if start_node is None or end_node is None:
+            return {'path': [], 'visited': [], 'distance': 0, 'time': 0, 'found': False}
+
+        # Урвуу хайлтад виртуал ирмэгүүдийг мөн эргүүлнэ
+        reverse_overlay = {}
+        for u, edges in overlay.items():
+            reverse_overlay.setdefault(u, {})
+            for v, edge_data in edges.items():
+                reverse_overlay.setdefault(v, {})[u] = edge_data
+
+        # 0 - урагш хайлт, 1 - урвуу хайлт
+        attribute = METRIC_ATTRIBUTES[metric]
+        neighbors = (self._neighbor_function(overlay, attribute),
+                     self._neighbor_function(reverse_overlay, attribute, reverse=True))
+        pqs = ([(0, start_node)], [(0, end_node)])
+        distances = ({start_node: 0}, {end_node: 0})
+        parents = ({start_node: None}, {end_node: None})
+        settled = (set(), set())
+        visited_order = [] if visit_log is None else visit_log
+
+        best_distance = 0 if start_node == end_node else float('inf')
+        meeting_node = start_node if start_node == end_node else None
+
+        while pqs[0] and pqs[1]:
+            # Хоёр талын хамгийн бага утгын нийлбэр олдсон замаас багагүй бол зогсох
+            if pqs[0][0][0] + pqs[1][0][0] >= best_distance:
+                break
+
+            side = 0 if pqs[0][0][0] <= pqs[1][0][0] else 1
+            current_dist, current_node = heapq.heappop(pqs[side])
+
+            if current_node in settled[side]:
+                continue
+
+            settled[side].add(current_node)
+            visited_order.append(current_node)
+
+            other_distances = distances[1 - side]
+            for neighbor, weight in neighbors[side](current_node):
+                if neighbor in settled[side]:
+                    continue
+                new_dist = current_dist + weight
+
+                if neighbor not in distances[side] or new_dist < distances[side][neighbor]:
+                    distances[side][neighbor] = new_dist
+                    parents[side][neighbor] = current_node
+                    heapq.heappush(pqs[side], (new_dist, neighbor))
+
+                # Нөгөө талын хайлт хүрсэн оройгоор дамжих зам
+                if neighbor in other_distances:
+                    total = distances[side][neighbor] + other_distances[neighbor]
+                    if total < best_distance:
+                        best_distance = total
+                        meeting_node = neighbor
+
+        if meeting_node is None:
+            return self._result([], visited_order, overlay, virtual)
+
+        # Уулзах цэг хүртэлх урагш зам + уулзах цэгээс төгсгөл хүртэлх урвуу зам
+        path = self._reconstruct_path(parents[0], meeting_node)
+        node = parents[1][meeting_node]
+        while node is not None:
+            path.append(node)
+            node = parents[1][node]
+
+        return self._result(path, visited_order, overlay, virtual)
+
+    def astar(self, start_node, end_node, metric='distance', visit_log=None):
+        """
+        A* алгоритм - Haversine зайн доод хязгаараар чиглүүлсэн хамгийн богино зам
+
+        Шулуун (Haversine) зай нь ямар ч замын уртаас их биш тул heuristic
+        зөвшөөрөгдөхүйц (admissible). Хугацааны хэмжүүрт түүнийг сүлжээний
+        хамгийн их хурдаар хуваана.
+
+        Args:
+            start_node: Эхлэх орой (lon, lat) эсвэл SnappedPoint
+            end_node: Төгсгөх орой (lon, lat) эсвэл SnappedPoint
+            metric: 'distance' (км) эсвэл 'time' (минут)
+            visit_log: Хайсан оройнуудыг хүлээн авах list төст объект (VisitStream)
+
+        Returns:
+            dict: {
+                'path': Хамгийн богино зам (жагсаалт),
+                'visited': Хайсан оройнууд,
+                'distance': Нийт зай (км),
+                'time': Нийт хугацаа (минут),
+                'found': Зам олдсон эсэх
+            }
+        """
+        start_node, end_node, overlay, virtual = self._search_endpoints(start_node, end_node)
+        if start_node is None or end_node is None:
+            return {'path': [], 'visited': [], 'distance': 0, 'time': 0, 'found': False}
+
+        return self._best_first(start_node, end_node, overlay, virtual,
+                                self._heuristic(end_node, virtual, metric), metric, visit_log)
+
+    def alt(self, start_node, end_node, metric='distance', visit_log=None):
+        """
+        ALT хайлт - landmark-н гурвалжны тэнцэтгэл бишээр чиглүүлсэн A*
+
+        Haversine-с хамаагүй нарийн доод хязгаартай тул цөөн орой хайна.
+        Тухайн хэмжүүрийн landmark хүснэгтүүдийг урьдчилан бэлтгэсэн байх шаардлагатай.
+
+        Args:
+            start_node: Эхлэх орой (lon, lat) эсвэл SnappedPoint
+            end_node: Төгсгөх орой (lon, lat) эсвэл SnappedPoint
+            metric: 'distance' (км) эсвэл 'time' (минут)
+            visit_log: Хайсан оройнуудыг хүлээн авах list төст объект (VisitStream)
+
+        Returns:
+            dict: {
+                'path': Хамгийн богино зам (жагсаалт),
+                'visited': Хайсан оройнууд,
+                'distance': Нийт зай (км),
+                'time': Нийт хугацаа (минут),
+                'found': Зам олдсон эсэх
+            }
+        """
+        landmarks = self.landmarks.get(metric)
+        if landmarks is None:
+            raise RuntimeError(f"ALT landmark ({metric}) бэлтгэгдээгүй байна (python landmarks.py)")
+
+        start_node, end_node, overlay, virtual = self._search_endpoints(start_node, end_node)
+        if start_node is None or end_node is None:
+            return {'path': [], 'visited': [], 'distance': 0, 'time': 0, 'found': False}
+
+        # Виртуал төгсгөл рүү зөвхөн сегментийн үзүүрүүдээр хүрнэ
+        attribute = METRIC_ATTRIBUTES[metric]
+        if end_node < self.node_count:
+            targets = [(end_node, 0)]
+        else:
+            targets = [(node, edges[end_node][attribute])
+                       for node, edges in overlay.items()
+                       if end_node in edges and node < self.node_count]
+
+        node_count = self.node_count
+        if targets:
+            landmark_bound = landmarks.heuristic(targets)
+
+            def heuristic(node):
+                # Виртуал орой (эхлэл, төгсгөл) бол 0
+                return landmark_bound(node) if node < node_count else 0.0
+        else:
+            def heuristic(node):
+                return 0.0
+
+        return self._best_first(start_node, end_node, overlay, virtual, heuristic, metric,
+                                visit_log)
+
+    def _best_first(self, start_node, end_node, overlay, virtual, heuristic, metric,
+                    visit_log=None):
+        """
+        A* төрлийн хайлтын нийтлэг давталт
+
+        Орой илүү богино зайгаар дахин хүрэгдвэл дахин нээгдэнэ - heuristic
+        бага зэрэг тууштай бус (жишээ нь float32 хүснэгтээс) байсан ч олдсон
+        зам хамгийн богино хэвээр байна.
+        """
+        neighbors = self._neighbor_function(overlay, METRIC_ATTRIBUTES[metric])
+
+        # Priority queue: (зай + heuristic, зай, орой)
+        pq = [(heuristic(start_node), 0, start_node)]
+        distances = {start_node: 0}
+        parents = {start_node: None}
+        visited_order = [] if visit_log is None else visit_log
 
-        return {'path': [], 'visited': visited_order, 'distance': 0, 'found': False}
+        while pq:
+            _, current_dist, current_node = heapq.heappop(pq)
+
+            if current_dist > distances[current_node]:
+                continue
+
+            visited_order.append(current_node)
+
+            if current_node == end_node:
+                path = self._reconstruct_path(parents, end_node)
+                return self._result(path, visited_order, overlay, virtual)
+
+            # Хөрш оройнуудыг шалгах
+            for neighbor, weight in neighbors(current_node):
+                new_dist = current_dist + weight
+
+                if neighbor not in distances or new_dist < distances[neighbor]:
+                    distances[neighbor] = new_dist
+                    parents[neighbor] = current_node
+                    heapq.heappush(pq, (new_dist + heuristic(neighbor), new_dist, neighbor))
+
+        return self._result([], visited_order, overlay, virtual)
+
+    def _heuristic(self, end_node, virtual, metric):
+        """
+        end_node хүртэлх Haversine зайн доод хязгаарыг буцаах функц үүсгэх
+
+        Оройн координатыг memoryview-с (виртуал бол virtual-с) уншина. Скаляр
+        утгад NumPy-с хурдан байх үүднээс math ашиглана.
+        """
+        coords = self._coords
+        node_count = self.node_count
+        end_lon, end_lat = virtual[end_node] if end_node >= node_count \
+            else (coords[end_node, 0], coords[end_node, 1])
+        end_lon = math.radians(end_lon)
+        end_lat = math.radians(end_lat)
+        cos_end_lat = math.cos(end_lat)
+        scale = 2 * EARTH_RADIUS_KM
+
+        if metric == 'time':
+            # км -> минут: сүлжээний хамгийн их хурдаар явсан ч үүнээс хурдан хүрэхгүй
+            scale = scale / (self.max_speed / 60) if self.max_speed > 0 else 0
+
+        def heuristic(node):
+            if node < node_count:
+                lon, lat = coords[node, 0], coords[node, 1]
+            else:
+                lon, lat = virtual[node]
+            lon = math.radians(lon)
+            lat = math.radians(lat)
+            a = (math.sin((end_lat - lat) / 2) ** 2
+                 + math.cos(lat) * cos_end_lat * math.sin((end_lon - lon) / 2) ** 2)
+            return scale * math.asin(min(1.0, math.sqrt(a)))
+
+        return heuristic
+
+    def _network_max_speed(self):
+        """Сүлжээн дэх хамгийн их хурд (км/цаг) - ирмэгийн зай/хугацаанаас"""
+        weight = np.asarray(self.arrays['weight'])
+        travel_time = np.asarray(self.arrays['time'])
+        valid = np.isfinite(travel_time) & (travel_time > 0)
+        if not valid.any():
+            return 0.0
+        return float((weight[valid] / travel_time[valid]).max() * 60)
+
+    def build_contraction_hierarchy(self, metric='distance'):
+        """
+        Contraction Hierarchies бэлтгэж snapshot-н хажууд хадгалах (offline алхам)
+
+        Args:
+            metric: 'distance' (км) эсвэл 'time' (минут)
+
+        Returns:
+            ContractionHierarchy
+        """
+        arrays = self.arrays
+        ch = ContractionHierarchy.build(
+            arrays['indptr'], arrays['indices'], arrays[METRIC_ATTRIBUTES[metric]])
+        ch.save(self._contraction_hierarchy_dir(metric), self.source_signature)
+        self.contraction_hierarchies[metric] = ch
+        self.route_cache.clear()
+        return ch
+
+    def _contraction_hierarchy_dir(self, metric):
+        """Хэмжүүр бүрийн CH хадгалах хавтас"""
+        return os.path.join(self.snapshot_dir, f'ch_{metric}')
+
+    def build_landmarks(self, metric='distance', count=None):
+        """
+        ALT landmark хүснэгтүүдийг бэлтгэж snapshot-н хажууд хадгалах (offline алхам)
+
+        Args:
+            metric: 'distance' (км) эсвэл 'time' (минут)
+            count: Landmark-н тоо (None бол landmarks.LANDMARK_COUNT)
+
+        Returns:
+            Landmarks
+        """
+        arrays = self.arrays
+        options = {} if count is None else {'count': count}
+        landmarks = Landmarks.build(
+            arrays['indptr'], arrays['indices'], arrays[METRIC_ATTRIBUTES[metric]], **options)
+        landmarks.save(self._landmarks_dir(metric), self.source_signature)
+        self.landmarks[metric] = landmarks
+        self.route_cache.clear()
+        return landmarks
+
+    def _landmarks_dir(self, metric):
+        """Хэмжүүр бүрийн landmark хүснэгт хадгалах хавтас"""
+        return os.path.join(self.snapshot_dir, f'alt_{metric}')
+
+    def ch_query(self, start_node, end_node, metric='distance', visit_log=None):
+        """
+        Contraction Hierarchies хайлт - dijkstra-тай ижил хамгийн богино зам
+
+        Shortcut ирмэгүүд бүтэн оройн дараалал болж задарна.
+
+        Args:
+            start_node: Эхлэх орой (lon, lat) эсвэл SnappedPoint
+            end_node: Төгсгөх орой (lon, lat) эсвэл SnappedPoint
+            metric: 'distance' (км) эсвэл 'time' (минут)
+            visit_log: Хайсан оройнуудыг хүлээн авах list төст объект (VisitStream)
+
+        Returns:
+            dict: {
+                'path': Хамгийн богино зам (жагсаалт),
+                'visited': Дээш хайлтуудын хайсан оройнууд,
+                'distance': Нийт зай (км),
+                'time': Нийт хугацаа (минут),
+                'found': Зам олдсон эсэх
+            }
+        """
+        contraction_hierarchy = self.contraction_hierarchies.get(metric)
+        if contraction_hierarchy is None:
+            raise RuntimeError(f"Contraction Hierarchies ({metric}) бэлтгэгдээгүй байна "
+                               "(python contraction_hierarchy.py)")
+
+        start_node, end_node, overlay, virtual = self._search_endpoints(start_node, end_node)
+        if start_node is None or end_node is None:
+            return {'path': [], 'visited': [], 'distance': 0, 'time': 0, 'found': False}
+        if start_node == end_node:
+            visited = [] if visit_log is None else visit_log
+            visited.append(start_node)
+            return self._result([start_node], visited, overlay, virtual)
+
+        # Виртуал эхлэл/төгсгөл бол сегментийн үзүүрүүдээс хэсэгчилсэн жинтэй эхэлнэ
+        attribute = METRIC_ATTRIBUTES[metric]
+        node_count = self.node_count
+        if start_node < node_count:
+            sources = [(start_node, 0)]
+        else:
+            sources = [(node, edge_data[attribute])
+                       for node, edge_data in overlay[start_node].items() if node < node_count]
+        if end_node < node_count:
+            targets = [(end_node, 0)]
+        else:
+            targets = [(node, edges[end_node][attribute])
+                       for node, edges in overlay.items()
+                       if end_node in edges and node < node_count]
+
+        cost, path, visited = contraction_hierarchy.query(sources, targets)
+        if visit_log is not None:
+            # CH-н дээш хайлтууд хурдан тул хайсан оройнуудыг хайлтын дараа дамжуулна
+            visit_log.extend(visited)
+            visited = visit_log
+
+        # Нэг сегмент дээрх хоёр виртуал цэгийн шууд ирмэг
+        direct = overlay.get(start_node, {}).get(end_node)
+        if direct is not None and direct[attribute] <= cost:
+            return self._result([start_node, end_node], visited, overlay, virtual)
+
+        if path:
+            if start_node >= node_count:
+                path.insert(0, start_node)
+            if end_node >= node_count:
+                path.append(end_node)
+        return self._result(path, visited, overlay, virtual)
+
+    def distance_matrix(self, sources, targets, metric='distance'):
+        """
+        Олон эхлэлээс олон төгсгөл хүртэлх хамгийн богино зай (эсвэл хугацааны) матриц
+
+        Тухайн хэмжүүрийн CH бэлтгэсэн бол bucket аргаар (нийт len(sources) +
+        len(targets) дээш хайлт), үгүй бол эхлэл бүрээс төгсгөлүүд тогтмогц
+        зогсох нэг one-to-many Dijkstra-р (scipy) тооцно.
+
+        Args:
+            sources: Эхлэлүүд - (lon, lat) эсвэл SnappedPoint-н жагсаалт
+            targets: Төгсгөлүүд - (lon, lat) эсвэл SnappedPoint-н жагсаалт
+            metric: 'distance' (км) эсвэл 'time' (минут)
+
+        Returns:
+            (len(sources), len(targets)) float64 матриц - зам байхгүй бол inf
+        """
+        attribute = METRIC_ATTRIBUTES[metric]
+        source_seeds = [self._matrix_seeds(point, attribute, outgoing=True) for point in sources]
+        target_seeds = [self._matrix_seeds(point, attribute, outgoing=False) for point in targets]
+
+        contraction_hierarchy = self.contraction_hierarchies.get(metric)
+        if contraction_hierarchy is not None:
+            matrix = contraction_hierarchy.many_to_many(source_seeds, target_seeds)
+        else:
+            matrix = self._one_to_many_matrix(source_seeds, target_seeds, attribute)
+
+        # Нэг сегмент дээр буусан эхлэл, төгсгөлийн хоорондох шууд зам
+        segment_targets = {}
+        for column, point in enumerate(targets):
+            if isinstance(point, SnappedPoint) and 0 < point.fraction < 1:
+                segment_targets.setdefault(frozenset((point.u, point.v)), []).append(column)
+        for row, start in enumerate(sources):
+            if not (isinstance(start, SnappedPoint) and 0 < start.fraction < 1):
+                continue
+            for column in segment_targets.get(frozenset((start.u, start.v)), []):
+                end = targets[column]
+                for a, b in ((start.u, start.v), (start.v, start.u)):
+                    edge_data = self._edge_data(a, b)
+                    start_share = start.fraction if a == start.u else 1 - start.fraction
+                    end_share = end.fraction if a == end.u else 1 - end.fraction
+                    if edge_data is not None and end_share >= start_share:
+                        matrix[row, column] = min(matrix[row, column],
+                                                  edge_data[attribute] * (end_share - start_share))
+        return matrix
+
+    def _matrix_seeds(self, point, attribute, outgoing):
+        """
+        Матрицын эхлэл/төгсгөлийг [(орой, хэсэгчилсэн жин)] болгох
+
+        SnappedPoint-н хувьд сегментийн үзүүрүүд ба виртуал цэгээс (outgoing)
+        эсвэл виртуал цэг хүртэлх хэсэгчилсэн жинг өгнө. Олдоогүй бол хоосон.
+        """
+        if not outgoing:
+            return [(node, partial[attribute] if partial else 0.0)
+                    for node, partial in self._target_candidates(point)]
+        if isinstance(point, SnappedPoint):
+            if point.fraction <= 0:
+                return [(point.u, 0.0)]
+            if point.fraction >= 1:
+                return [(point.v, 0.0)]
+            seeds = []
+            for a, b, share in ((point.u, point.v, point.fraction),
+                                (point.v, point.u, 1 - point.fraction)):
+                edge_data = self._edge_data(a, b)
+                if edge_data is not None:
+                    seeds.append((b, edge_data[attribute] * (1 - share)))
+            return seeds
+        node = self._node_id(point)
+        return [] if node is None else [(node, 0.0)]
+
+    def _target_candidates(self, point):
+        """
+        Төгсгөлд хүрэх [(орой, сүүлийн хэсэгчилсэн ирмэг)] хувилбарууд
+
+        Сегмент дээр буусан цэгт сегментийн үзүүр бүрээс хэсэгчилсэн ирмэгээр
+        хүрнэ; орой дээрх цэгийн хувьд ирмэг нь None. Олдоогүй бол хоосон.
+        """
+        if isinstance(point, SnappedPoint) and 0 < point.fraction < 1:
+            candidates = []
+            for a, b, share in ((point.u, point.v, point.fraction),
+                                (point.v, point.u, 1 - point.fraction)):
+                edge_data = self._edge_data(a, b)
+                if edge_data is not None:
+                    candidates.append((a, self._partial_edge_between(a, b, edge_data, 0, share)))
+            return candidates
+        if isinstance(point, SnappedPoint):
+            node = point.u if point.fraction <= 0 else point.v
+        else:
+            node = self._node_id(point)
+        return [] if node is None else [(node, None)]
+
+    def search_batch(self, pairs, metric='distance'):
+        """
+        Олон эхлэл-төгсгөлийн хосын хамгийн богино замууд
+
+        Ижил эхлэлтэй хосуудыг бүлэглэж, эхлэл бүрээс нэг Dijkstra мод
+        (dijkstra_one_to_many) бүх төгсгөлд нь үйлчилнэ.
+
+        Args:
+            pairs: [(эхлэл, төгсгөл)] - (lon, lat) эсвэл SnappedPoint
+            metric: 'distance' (км) эсвэл 'time' (минут)
+
+        Returns:
+            (pairs-н дарааллаар үр дүнгийн жагсаалт, хийсэн хайлтын тоо)
+        """
+        groups = {}
+        for index, (start, end) in enumerate(pairs):
+            group = groups.setdefault(self._endpoint_key(start), (start, [], []))
+            group[1].append(index)
+            group[2].append(end)
+
+        results = [None] * len(pairs)
+        for start, indices, ends in groups.values():
+            for index, result in zip(indices, self.dijkstra_one_to_many(start, ends, metric)):
+                results[index] = result
+        return results, len(groups)
+
+    def dijkstra_one_to_many(self, start_node, end_nodes, metric='distance'):
+        """
+        Нэг эхлэлээс олон төгсгөл хүртэлх хамгийн богино замууд (нэг Dijkstra мод)
+
+        Бүх төгсгөлийн оройнууд тогтмогц зогсоно.
+
+        Args:
+            start_node: Эхлэх орой (lon, lat) эсвэл SnappedPoint
+            end_nodes: Төгсгөлүүдийн жагсаалт - (lon, lat) эсвэл SnappedPoint
+            metric: 'distance' (км) эсвэл 'time' (минут)
+
+        Returns:
+            end_nodes-н дарааллаар {'path', 'distance', 'time', 'found'} жагсаалт
+        """
+        not_found = {'path': [], 'distance': 0, 'time': 0, 'found': False}
+        start, _, overlay, virtual = self._search_endpoints(start_node, None)
+        if start is None:
+            return [dict(not_found) for _ in end_nodes]
+
+        attribute = METRIC_ATTRIBUTES[metric]
+        start_component = self._component(start_node, start)
+        targets = []
+        for end in end_nodes:
+            # Өөр бүрэлдэхүүнд орших төгсгөлийг хүлээхгүй (модыг бүхэлд нь хайхгүй)
+            candidates = [(node, partial) for node, partial in self._target_candidates(end)
+                          if self._weak_component[node] == start_component]
+            # Эхлэлтэй нэг сегмент дээрх төгсгөлд виртуал эхлэлээс шууд хүрнэ
+            if start >= self.node_count and isinstance(end, SnappedPoint) \
+                    and 0 < end.fraction < 1 and {start_node.u, start_node.v} == {end.u, end.v}:
+                for a, b in ((start_node.u, start_node.v), (start_node.v, start_node.u)):
+                    edge_data = self._edge_data(a, b)
+                    start_share = start_node.fraction if a == start_node.u else 1 - start_node.fraction
+                    end_share = end.fraction if a == end.u else 1 - end.fraction
+                    if edge_data is not None and end_share >= start_share:
+                        candidates.append((start, self._partial_edge_between(
+                            a, b, edge_data, start_share, end_share)))
+            targets.append(candidates)
+
+        neighbors = self._neighbor_function(overlay, attribute)
+        remaining = {node for candidates in targets for node, _ in candidates}
+        pq = [(0, start)]
+        distances = {start: 0}
+        parents = {start: None}
+        visited = set()
+
+        while pq and remaining:
+            current_dist, current_node = heapq.heappop(pq)
+            if current_node in visited:
+                continue
+            visited.add(current_node)
+            remaining.discard(current_node)
+
+            for neighbor, weight in neighbors(current_node):
+                if neighbor not in visited:
+                    new_dist = current_dist + weight
+                    if neighbor not in distances or new_dist < distances[neighbor]:
+                        distances[neighbor] = new_dist
+                        parents[neighbor] = current_node
+                        heapq.heappush(pq, (new_dist, neighbor))
+
+        results = []
+        for end, candidates in zip(end_nodes, targets):
+            reached = [(distances[node] + (partial[attribute] if partial else 0), node, partial)
+                       for node, partial in candidates if node in visited]
+            if not reached:
+                results.append(dict(not_found))
+                continue
+            _, node, partial = min(reached, key=lambda candidate: candidate[0])
+            path = self._reconstruct_path(parents, node)
+            totals = self._path_totals(path, overlay)
+            coords = self._path_coords(path, overlay, virtual)
+            if partial is not None:
+                coords.extend(partial.get('geometry', ()))
+                coords.append(end.point)
+                for key in totals:
+                    totals[key] += partial[key]
+            results.append({
+                'path': coords,
+                'distance': totals['weight'],
+                'time': totals['time'],
+                'found': True
+            })
+        return results
+
+    def _one_to_many_matrix(self, source_seeds, target_seeds, attribute):
+        """
+        Эхлэлийн орой бүрээс scipy-н Dijkstra-р зайн матриц тооцох
+
+        Хайлт бүрийг төгсгөлүүд хүртэлх Haversine доод хязгаарын
+        MATRIX_LIMIT_GROWTH дахин их зайгаар (limit) хязгаарлаж, бүх төгсгөл
+        тогтоогүй бол хязгаарыг өсгөж дахин хайна - ойр төгсгөлүүдийн төлөө
+        бүх графыг хайхгүй. Хязгаараас цааш гарах ирмэг үлдээгүй бол үлдсэн
+        төгсгөлүүдэд хүрэх боломжгүй.
+        """
+        matrix = np.full((len(source_seeds), len(target_seeds)), np.inf)
+        source_rows = [(row, node, offset)
+                       for row, seeds in enumerate(source_seeds) for node, offset in seeds]
+        target_columns = [(column, node, offset)
+                          for column, seeds in enumerate(target_seeds) for node, offset in seeds]
+        if not source_rows or not target_columns:
+            return matrix
+
+        source_owner, source_nodes, source_offsets = (np.array(values) for values in zip(*source_rows))
+        target_owner, target_nodes, target_offsets = (np.array(values) for values in zip(*target_columns))
+        arrays = self.arrays
+        # float64 жин, int32 индекс - scipy дуудлага бүрт графыг хөрвүүлэхгүй
+        index_dtype = np.int32 if self.edge_count < np.iinfo(np.int32).max else np.int64
+        weights = np.asarray(arrays[attribute], dtype=np.float64)
+        graph = csr_matrix((weights, np.asarray(arrays['indices'], dtype=index_dtype),
+                            np.asarray(arrays['indptr'], dtype=index_dtype)),
+                           shape=(self.node_count, self.node_count))
+        edge_source = None  # Хязгаарын хилийг шалгахад анх хэрэгтэй үед
+        min_weight = float(weights[weights > 0].min()) if (weights > 0).any() else 1.0
+
+        # Доод хязгаарыг хэмжүүрийн нэгжид (км эсвэл минут) шилжүүлэх
+        if attribute == 'time':
+            scale = 60 / self.max_speed if self.max_speed > 0 else 0.0
+        else:
+            scale = 1.0
+        node_coords = arrays['node_coords']
+        weak = np.asarray(arrays['weak_component'])
+
+        unique_nodes, inverse = np.unique(source_nodes, return_inverse=True)
+        for index, node in enumerate(unique_nodes.tolist()):
+            # Өөр сул холбоост бүрэлдэхүүнд орших төгсгөлд хүрэхгүй
+            wanted = target_nodes[weak[target_nodes] == weak[node]]
+            if len(wanted) == 0:
+                continue
+            bound = _haversine(node_coords[node, 0], node_coords[node, 1],
+                               node_coords[wanted, 0], node_coords[wanted, 1]).max() * scale
+            limit = max(bound * MATRIX_LIMIT_GROWTH, min_weight)
+            while True:
+                distances = sparse_dijkstra(graph, indices=node, limit=limit)
+                if np.isfinite(distances[wanted]).all():
+                    break
+                if edge_source is None:
+                    edge_source = np.repeat(np.arange(self.node_count), np.diff(arrays['indptr']))
+                settled = np.isfinite(distances)
+                if not (settled[edge_source] & ~settled[arrays['indices']]).any():
+                    break
+                limit *= MATRIX_LIMIT_GROWTH
+
+            selected = inverse == index
+            values = distances[target_nodes][None, :] + target_offsets + source_offsets[selected, None]
+            np.minimum.at(matrix, (source_owner[selected, None], target_owner[None, :]), values)
+        return matrix
+
+    def isochrones(self, start_node, budgets, metric='time'):
+        """
+        Эхлэлээс budget бүрийн дотор хүрэх бүсүүд (isochrone)
+
+        Хамгийн том budget хүртэл нэг л хязгаарлагдмал Dijkstra хийх тул олон
+        budget тооцох нь хамгийн томыг нь тооцохтой ижил өртөгтэй. Бүс бүрийг
+        хүрсэн ирмэгүүдийн (хил дээрх ирмэгийн хүрсэн хэсгийн) үзүүрүүдийн
+        concave hull-р илэрхийлнэ.
+
+        Args:
+            start_node: Эхлэх орой (lon, lat) эсвэл SnappedPoint
+            budgets: Хугацааны (минут) эсвэл зайн (км) хязгааруудын жагсаалт
+            metric: 'time' (минут) эсвэл 'distance' (км)
+
+        Returns:
+            budgets-н дарааллаар {'budget', 'polygon' (shapely, lon/lat),
+            'reachable_nodes'} жагсаалт - эхлэл олдоогүй бол None
+        """
+        start_node, _, overlay, virtual = self._search_endpoints(start_node, None)
+        if start_node is None:
+            return None
+
+        attribute = METRIC_ATTRIBUTES[metric]
+        distances = self._bounded_dijkstra(start_node, max(budgets), overlay, attribute)
+
+        nodes = np.fromiter(distances.keys(), np.int64, len(distances))
+        costs = np.fromiter(distances.values(), float, len(distances))
+        real = nodes < self.node_count
+        nodes, costs = nodes[real], costs[real]
+
+        # Хүрсэн оройнуудын гарах ирмэгүүд (CSR мөрүүдийг нэг массив болгох)
+        arrays = self.arrays
+        indptr = arrays['indptr']
+        counts = indptr[nodes + 1] - indptr[nodes]
+        positions = (np.repeat(indptr[nodes] - np.cumsum(counts) + counts, counts)
+                     + np.arange(int(counts.sum())))
+        edge_cost = np.repeat(costs, counts)
+        edge_weight = np.asarray(arrays[attribute][positions], dtype=float)
+        # Ирмэг бүрийн шугам (хялбаршуулсан графд завсрын геометртэй)
+        owner, vertex_coords, vertex_shares = self._edge_polylines(positions)
+
+        # Виртуал эхлэлээс сегментийн үзүүрүүд рүү гарах хэсэгчилсэн ирмэгүүд
+        if start_node >= self.node_count:
+            for node, edge_data in overlay[start_node].items():
+                line = np.array([virtual[start_node], *edge_data.get('geometry', ()),
+                                 self.node_key(node)])
+                lengths = _haversine(line[:-1, 0], line[:-1, 1], line[1:, 0], line[1:, 1])
+                total = lengths.sum()
+                shares = np.concatenate([[0.0], np.cumsum(lengths) / total]) if total > 0 \
+                    else np.linspace(0.0, 1.0, len(line))
+                owner = np.append(owner, np.full(len(line), len(edge_cost)))
+                vertex_coords = np.vstack([vertex_coords, line])
+                vertex_shares = np.append(vertex_shares, shares)
+                edge_cost = np.append(edge_cost, 0.0)
+                edge_weight = np.append(edge_weight, edge_data[attribute])
+        origin = virtual[start_node] if start_node >= self.node_count else self.node_key(start_node)
+
+        vertex_counts = np.bincount(owner, minlength=len(edge_cost))
+        group_start = np.cumsum(vertex_counts) - vertex_counts
+        isochrones = []
+        for budget in budgets:
+            inside = edge_cost <= budget
+            # Хил дээрх ирмэгийг хүрсэн хувиар нь шугамын дагуу таслах
+            with np.errstate(divide='ignore', invalid='ignore'):
+                fraction = np.where(edge_weight > 0, (budget - edge_cost) / edge_weight, 1.0)
+            fraction = np.clip(fraction, 0.0, 1.0)
+            included = inside[owner] & (vertex_shares <= fraction[owner])
+            last = group_start + np.bincount(owner[included], minlength=len(edge_cost)) - 1
+            last = last[inside]
+            following = np.minimum(last + 1, (group_start + vertex_counts - 1)[inside])
+            span = vertex_shares[following] - vertex_shares[last]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                t = np.where(span > 0, (fraction[inside] - vertex_shares[last]) / span, 0.0)
+            cut = vertex_coords[last] + t[:, None] * (vertex_coords[following] - vertex_coords[last])
+            isochrones.append({
+                'budget': budget,
+                'polygon': self._reachable_polygon(origin, np.vstack([vertex_coords[included], cut])),
+                'reachable_nodes': int((costs <= budget).sum())
+            })
+        return isochrones
+
+    def _bounded_dijkstra(self, start_node, limit, overlay, attribute):
+        """
+        limit-с хэтрэхгүй зайтай бүх оройг олох Dijkstra
+
+        Дарааллын хамгийн бага утга limit-с хэтэрмэгц зогсох тул графын
+        үлдсэн хэсгийг хайхгүй.
+
+        Returns:
+            {орой: зай} - limit дотор хүрсэн оройнууд
+        """
+        neighbors = self._neighbor_function(overlay, attribute)
+        pq = [(0, start_node)]
+        distances = {start_node: 0}
+        settled = {}
+
+        while pq:
+            current_dist, current_node = heapq.heappop(pq)
+            if current_dist > limit:
+                break
+            if current_node in settled:
+                continue
+            settled[current_node] = current_dist
+
+            for neighbor, weight in neighbors(current_node):
+                new_dist = current_dist + weight
+                if new_dist <= limit and new_dist < distances.get(neighbor, float('inf')):
+                    distances[neighbor] = new_dist
+                    heapq.heappush(pq, (new_dist, neighbor))
+        return settled
+
+    def _reachable_polygon(self, origin, points):
+        """
+        Хүрсэн цэгүүдийн concave hull полигон (lon/lat)
+
+        Hull-г origin орчмын тэгш өнцөгт (км) координатад тооцно. Шугамуудыг
+        тэлж нэгтгэхээс (buffer + union) олон дахин хурдан.
+        """
+        lon0, lat0 = origin
+        km_per_degree = math.radians(EARTH_RADIUS_KM)
+        scale = np.array([km_per_degree * math.cos(math.radians(lat0)), km_per_degree])
+        offset = np.array([lon0, lat0])
+
+        points = np.unique(np.vstack([(points - offset) * scale, [[0.0, 0.0]]]), axis=0)
+        polygon = shapely.concave_hull(shapely.multipoints(points), ratio=ISOCHRONE_HULL_RATIO)
+        if not isinstance(polygon, shapely.Polygon):
+            polygon = shapely.buffer(polygon, ISOCHRONE_BUFFER_KM)
+        return shapely.transform(polygon, lambda coords: coords / scale + offset)
+
+    def _reconstruct_path(self, parents, end_node):
+        """Эцэг оройн map-аас эхлэлээс end_node хүртэлх замыг сэргээх"""
+        path = []
+        node = end_node
+        while node is not None:
+            path.append(node)
+            node = parents[node]
+        path.reverse()
+        return path
+
+    def _path_totals(self, path, overlay):
+        """Замын (оройн индексүүд) нийт зай, хугацааг ирмэгүүдээр тооцох {'weight', 'time'}"""
+        totals = {attribute: 0 for attribute in METRIC_ATTRIBUTES.values()}
+        for i in range(len(path) - 1):
+            edge_data = self._edge_data(path[i], path[i+1], overlay)
+            for attribute in totals:
+                totals[attribute] += edge_data[attribute]
+        return totals
 
 
 # Жишээ ашиглалт
 if __name__ == "__main__":
     # Shapefile унших
     road_network = RoadNetworkGraph("gis_osm_roads_free_1.shp")
-    G = road_network.get_graph()
 
     print(f"\nГрафын мэдээлэл:")
-    print(f"  - Оройн тоо: {G.number_of_nodes()}")
-    print(f"  - Ирмэгийн тоо: {G.number_of_edges()}")
+    print(f"  - Оройн тоо: {road_network.node_count}")
+    print(f"  - Ирмэгийн тоо: {road_network.edge_count}")
 
     # Жишээ: Алгоритмуудыг турших
-    if G.number_of_nodes() > 0:
-        nodes_list = list(G.nodes())[:100]  # Эхний 100 оройг авах
+    if road_network.node_count > 0:
+        nodes_list = road_network.nodes()[:100]  # Эхний 100 оройг авах
         if len(nodes_list) >= 2:
             start = nodes_list[0]
             end = nodes_list[min(50, len(nodes_list)-1)]
@@ -0,0 +1,85 @@
+"""
+Хайлтын үр дүнгийн LRU кэш
+
+Ижил эхлэл-төгсгөлийн (OD) хосыг давтан хайхад үр дүнг дахин тооцохгүй,
+dict-с шууд авна. Хэмжээ нь хязгаартай бөгөөд дүүрэхэд хамгийн удаан
+ашиглагдаагүй үр дүнг хасна. Flask-н олон thread-с зэрэг ашиглаж болно.
+"""
+
+import threading
+from collections import OrderedDict
+
+# Кэшд хадгалах үр дүнгийн хамгийн их тоо
+ROUTE_CACHE_SIZE = 256
+
+
+class RouteCache:
+    """Хэмжээ хязгаартай, thread-safe LRU кэш ба түүний статистик"""
+
+    def __init__(self, maxsize=ROUTE_CACHE_SIZE, on_evict=None):
+        """
+        Args:
+            maxsize: Хадгалах үр дүнгийн хамгийн их тоо (0 бол кэшлэхгүй)
+            on_evict: Хасагдсан (дүүрсэн эсвэл clear) үр дүн бүрт дуудах
+                функц (key, result) - жишээ нь холбоотой файлыг устгах
+        """
+        self.maxsize = maxsize
+        self.on_evict = on_evict
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        """key-н үр дүн (байхгүй бол None) - олдвол хамгийн сүүлд ашигласан болгоно"""
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key, result):
+        """Үр дүнг хадгалах - дүүрсэн бол хамгийн удаан ашиглаагүйг хасна"""
+        if self.maxsize <= 0:
+            return
+        evicted = []
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                evicted.append(self._entries.popitem(last=False))
+                self.evictions += 1
+        self._evicted(evicted)
+
+    def clear(self):
+        """Бүх үр дүнг хасах (граф эсвэл урьдчилсан бэлтгэл өөрчлөгдөхөд)"""
+        with self._lock:
+            evicted = list(self._entries.items())
+            self._entries.clear()
+            self.invalidations += 1
+        self._evicted(evicted)
+
+    def _evicted(self, entries):
+        """Хасагдсан үр дүнгүүдэд on_evict-г (lock-н гадна) дуудах"""
+        if self.on_evict is not None:
+            for key, result in entries:
+                self.on_evict(key, result)
+
+    def stats(self):
+        """Кэшийн статистик"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations
+            }
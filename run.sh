@@ -28,6 +28,13 @@ if [ ! -f "gis_osm_roads_free_1.shp" ]; then
     exit 1
 fi
 
+# Production горим: ./run.sh prod (gunicorn, граф master-т нэг удаа ачаалагдана)
+if [ "$1" = "prod" ]; then
+    echo "Gunicorn серверийг эхлүүлж байна..."
+    echo "Бэлэн эсэх: http://localhost:3000/api/ready"
+    exec gunicorn -c gunicorn.conf.py wsgi:app
+fi
+
 echo "Flask серверийг эхлүүлж байна..."
 echo "Хөтөч дээр http://localhost:5000 руу орно уу"
 echo ""
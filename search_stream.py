@@ -0,0 +1,136 @@
+"""
+Хайлтын явцыг багцаар дамжуулах (streaming)
+
+Хайлт тусдаа thread-д ажиллаж, хайсан оройнууд VISITED_BATCH_SIZE-н багцаар
+хэмжээ хязгаартай дараалал руу орно. Дуудагч тал (Flask-н хариу) багцуудыг
+хайлт үргэлжилж байх үед нь уншиж клиент рүү илгээнэ. Илгээсэн оройнуудыг
+хадгалдаггүй тул бүтэн visited жагсаалт санах ойд үүсэхгүй; клиент удаан
+уншвал дараалал дүүрч хайлт түр зогсоно, холболт тасарвал хайлт цуцлагдана.
+"""
+
+import queue
+import threading
+
+# Нэг багц дахь хайсан оройн тоо
+VISITED_BATCH_SIZE = 500
+
+# Уншаагүй байж болох багцын дээд тоо (дүүрвэл хайлт хүлээнэ)
+VISITED_QUEUE_SIZE = 16
+
+# Цуцлагдсан эсэхийг шалгах хугацаа (секунд)
+_POLL_INTERVAL = 0.5
+
+
+class SearchCancelled(Exception):
+    """Клиент холболтоо тасалсан тул хайлтыг зогсоох"""
+
+
+class VisitStream:
+    """
+    Алгоритмуудын visited_order-г орлох visit_log
+
+    append/extend хийсэн оройнуудыг багц болгон дараалал руу илгээнэ.
+    Оройнуудыг хадгалдаггүй тул жагсаалт биш (давтах, len боломжгүй) -
+    RoadNetworkGraph._result, _to_coords нь streamed тэмдгийг шалгана.
+    """
+
+    # Хайлтын үр дүнд visited-г координат болгохгүй байх тэмдэг
+    streamed = True
+
+    def __init__(self, batch_queue, cancelled, batch_size=VISITED_BATCH_SIZE):
+        """
+        Args:
+            batch_queue: Багцуудыг хүлээн авах queue.Queue
+            cancelled: Хайлтыг цуцлах threading.Event
+            batch_size: Нэг багц дахь оройн тоо
+        """
+        self.batch_size = batch_size
+        self.count = 0
+        self._queue = batch_queue
+        self._cancelled = cancelled
+        self._batch = []
+
+    def append(self, node):
+        self._batch.append(node)
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def extend(self, nodes):
+        for node in nodes:
+            self.append(node)
+
+    def flush(self):
+        """Хуримтлагдсан оройнуудыг багц болгон илгээх"""
+        if not self._batch:
+            return
+        batch, self._batch = self._batch, []
+        self.count += len(batch)
+        _put(self._queue, self._cancelled, ('visited', batch))
+
+
+def _put(batch_queue, cancelled, item):
+    """Дараалал дүүрсэн бол сул болтол хүлээх - цуцлагдвал SearchCancelled"""
+    while True:
+        if cancelled.is_set():
+            raise SearchCancelled()
+        try:
+            batch_queue.put(item, timeout=_POLL_INTERVAL)
+            return
+        except queue.Full:
+            continue
+
+
+def stream_search(network, algorithm, start_node, end_node, metric='distance',
+                  batch_size=VISITED_BATCH_SIZE):
+    """
+    Алгоритмыг ажиллуулж явцыг нь үүсгэгчээр (generator) буцаах
+
+    Кэш ашиглахгүй - хайлт бүр бодитоор ажиллаж явцаа харуулна.
+
+    Args:
+        network: RoadNetworkGraph
+        algorithm: ALGORITHMS-н нэг
+        start_node: Эхлэх орой (lon, lat) эсвэл SnappedPoint
+        end_node: Төгсгөх орой (lon, lat) эсвэл SnappedPoint
+        metric: 'distance' (км) эсвэл 'time' (минут)
+        batch_size: Нэг багц дахь оройн тоо
+
+    Yields:
+        ('visited', [(lon, lat), ...]) - хайсан оройн багцууд (хайсан дарааллаар),
+        эцэст нь ('result', үр дүн) эсвэл ('error', мессеж). Үр дүнгийн
+        'visited' хоосон, 'visited_count' нь нийт хайсан оройн тоо.
+    """
+    # Виртуал оройн (буулгасан цэг) координатыг хайлттай ижил дугаарлалтаар авна
+    _, _, _, virtual = network._search_endpoints(start_node, end_node)
+
+    batch_queue = queue.Queue(maxsize=VISITED_QUEUE_SIZE)
+    cancelled = threading.Event()
+    visit_log = VisitStream(batch_queue, cancelled, batch_size)
+
+    def run():
+        try:
+            result = network.run_algorithm(algorithm, start_node, end_node, metric, visit_log)
+            visit_log.flush()
+            result = dict(result, visited_count=visit_log.count)
+            _put(batch_queue, cancelled, ('result', result))
+        except SearchCancelled:
+            pass
+        except Exception as e:
+            try:
+                _put(batch_queue, cancelled, ('error', str(e)))
+            except SearchCancelled:
+                pass
+
+    worker = threading.Thread(target=run, daemon=True)
+    worker.start()
+    try:
+        while True:
+            kind, payload = batch_queue.get()
+            if kind == 'visited':
+                yield kind, network._to_coords(payload, virtual)
+            else:
+                yield kind, payload
+                return
+    finally:
+        # Клиент тасарсан (GeneratorExit) эсвэл дууссан - хайлтыг зогсооно
+        cancelled.set()
@@ -1,6 +1,6 @@
 """
 Алгоритмуудыг тестлэх скрипт
-3 алгоритмыг ажиллуулж, үр дүнг харьцуулна
+Алгоритмуудыг ажиллуулж, үр дүнг харьцуулна
 """
 
 from read_osm import RoadNetworkGraph
@@ -18,19 +18,18 @@ def test_algorithms():
     print("\n1️⃣ Графыг ачаалж байна...")
     start_time = time.time()
     road_network = RoadNetworkGraph("gis_osm_roads_free_1.shp")
-    G = road_network.get_graph()
     load_time = time.time() - start_time
 
     print(f"   ✅ Амжилттай ачааллаа ({load_time:.2f} секунд)")
-    print(f"   📊 Оройн тоо: {G.number_of_nodes():,}")
-    print(f"   📊 Ирмэгийн тоо: {G.number_of_edges():,}")
+    print(f"   📊 Оройн тоо: {road_network.node_count:,}")
+    print(f"   📊 Ирмэгийн тоо: {road_network.edge_count:,}")
 
     # Тест цэгүүдийг сонгох
-    if G.number_of_nodes() == 0:
+    if road_network.node_count == 0:
         print("\n❌ Граф хоосон байна!")
         return
 
-    nodes_list = list(G.nodes())
+    nodes_list = road_network.nodes()
 
     # Тест кейсүүд
     test_cases = [
@@ -135,6 +134,30 @@ def test_algorithms():
         else:
             print(f"      ❌ Зам олдсонгүй")
 
+        # A*
+        print(f"\n   🟣 A* ажиллуулж байна...")
+        start_time = time.time()
+        astar_result = road_network.astar(start_node, end_node)
+        astar_time = (time.time() - start_time) * 1000
+
+        results['A*'] = {
+            'found': astar_result['found'],
+            'distance': astar_result['distance'],
+            'path_length': len(astar_result['path']),
+            'visited_count': len(astar_result['visited']),
+            'time_ms': astar_time
+        }
+
+        if astar_result['found']:
+            saved = len(dijkstra_result['visited']) - len(astar_result['visited'])
+            print(f"      ✅ Зам олдсон")
+            print(f"      📏 Зай: {astar_result['distance']:.2f} км")
+            print(f"      🔢 Замын урт: {len(astar_result['path'])} орой")
+            print(f"      👀 Хайсан: {len(astar_result['visited'])} орой (Dijkstra-с {saved} цөөн)")
+            print(f"      ⏱️  Хугацаа: {astar_time:.2f} мс")
+        else:
+            print(f"      ❌ Зам олдсонгүй")
+
         all_results.append({
             'test_name': test_case['name'],
             'results': results
@@ -192,7 +215,7 @@ def create_comparison_chart(all_results):
     # 3 график үүсгэх
     fig, (ax1, ax2, ax3) = plt.subplots(1, 3, figsize=(15, 5))
 
-    colors = ['#3498db', '#2ecc71', '#e74c3c']
+    colors = ['#3498db', '#2ecc71', '#e74c3c', '#9b59b6']
 
     # 1. Замын зай
     ax1.bar(algorithms, distances, color=colors)
@@ -0,0 +1,84 @@
+"""
+search_stream-н тест: хайлтын явцыг багцаар дамжуулж эцэст нь үр дүн өгөх
+"""
+
+import json
+
+import pytest
+
+import app as app_module
+from conftest import GRID_STEP, grid_point
+from search_stream import stream_search
+
+STREAM_ALGORITHMS = ('bfs', 'dfs', 'dijkstra', 'astar', 'bidirectional')
+
+
+def _events(network, algorithm, start, end):
+    """stream_search-н үйл явдлууд ба эцсийн үр дүн"""
+    events = list(stream_search(network, algorithm, start, end, batch_size=7))
+    kind, result = events[-1]
+    assert kind == 'result', result
+    return events, result
+
+
+@pytest.mark.parametrize('algorithm', STREAM_ALGORITHMS)
+def test_stream_vertex_endpoints(road_network, algorithm):
+    """Графын орой дээрх (виртуал оройгүй) эхлэл, төгсгөлөөр дамжуулах"""
+    start, end = grid_point(0, 0), grid_point(4, 4)
+    events, result = _events(road_network, algorithm, start, end)
+    expected = road_network.run_algorithm(algorithm, start, end)
+
+    assert result['found']
+    assert result['path'] == expected['path']
+    assert result['visited'] == []
+    assert result['visited_count'] == len(expected['visited'])
+    streamed = [node for kind, nodes in events[:-1] for node in nodes]
+    assert streamed == expected['visited']
+
+
+@pytest.mark.parametrize('algorithm', STREAM_ALGORITHMS)
+def test_stream_snapped_on_vertex(road_network, algorithm):
+    """Сегментийн үзүүр дээр буусан (fraction 0 эсвэл 1) цэгүүдээр дамжуулах"""
+    (start_lon, start_lat), (end_lon, end_lat) = grid_point(0, 0), grid_point(3, 2)
+    start, end = road_network.snap_points([start_lat, end_lat], [start_lon, end_lon])
+    assert start.fraction in (0.0, 1.0) and end.fraction in (0.0, 1.0)
+
+    _, result = _events(road_network, algorithm, start, end)
+    expected = road_network.run_algorithm(algorithm, start, end)
+    assert result['found']
+    assert result['path'] == expected['path']
+    assert result['visited_count'] == len(expected['visited'])
+
+
+def _stream_request(client, start, end, algorithm):
+    """/api/search/stream-н NDJSON мөрүүдийг JSON болгож унших"""
+    response = client.post('/api/search/stream', json={
+        'algorithm': algorithm,
+        'start_lat': start[1], 'start_lon': start[0],
+        'end_lat': end[1], 'end_lon': end[0]
+    })
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+@pytest.mark.parametrize('algorithm', ('bfs', 'dijkstra', 'astar'))
+@pytest.mark.parametrize('endpoints', ['vertex', 'virtual'])
+def test_stream_endpoint_ndjson(road_network, monkeypatch, algorithm, endpoints):
+    """/api/search/stream орой болон сегментийн дунд буусан цэгүүдэд эцсийн result илгээх"""
+    monkeypatch.setattr(app_module, 'road_network', road_network)
+    start, end = grid_point(0, 0), grid_point(4, 4)
+    if endpoints == 'virtual':
+        # Уулзвар хоорондын замын дунд орчим - буулгасан цэг виртуал орой болно
+        start = (start[0] + GRID_STEP / 2, start[1])
+        end = (end[0], end[1] - GRID_STEP / 2)
+
+    events = _stream_request(app_module.app.test_client(), start, end, algorithm)
+    result = events[-1]
+    assert result['type'] == 'result', result
+    assert result['found']
+    assert all(event['type'] == 'visited' for event in events[:-1])
+    assert result['visited_count'] == events[-2]['count']
+    snapped = road_network.snap_points([start[1], end[1]], [start[0], end[0]])
+    assert result['path'][0] == pytest.approx([snapped[0].point[1], snapped[0].point[0]], abs=1e-6)
+    assert result['path'][-1] == pytest.approx([snapped[1].point[1], snapped[1].point[0]], abs=1e-6)
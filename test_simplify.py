@@ -0,0 +1,33 @@
+"""
+Хялбаршуулсан (2-р зэргийн оройн гинжийг нэгтгэсэн) графын тест: хялбаршуулаагүй
+графтай ижил зам өгөх
+"""
+
+import pytest
+
+SIMPLIFY_ALGORITHMS = ('dijkstra', 'astar', 'bidirectional')
+
+
+def _interior_vertices(road_network, simple_network):
+    """Хялбаршуулахад завсрын геометр болсон оройнууд"""
+    kept = set(simple_network.nodes())
+    return [node for node in road_network.nodes() if node not in kept]
+
+
+@pytest.mark.parametrize('algorithm', SIMPLIFY_ALGORITHMS)
+def test_interior_vertex_endpoints(road_network, simple_network, algorithm):
+    """Завсрын орой дээр буусан эхлэл, төгсгөлийн зам хоёр графд ижил"""
+    interior = _interior_vertices(road_network, simple_network)
+    assert interior
+    # Буулгасан цэгийн хувь завсрын оройн хувиас ulp-р ялгаатай байж болох тул бүгдийг шалгана
+    for start, end in zip(interior, interior[::-1]):
+        if start == end:
+            continue
+        lats, lons = [start[1], end[1]], [start[0], end[0]]
+        full = road_network.run_algorithm(algorithm, *road_network.snap_points(lats, lons))
+        simple = simple_network.run_algorithm(algorithm, *simple_network.snap_points(lats, lons))
+
+        assert simple['found'] == full['found']
+        assert len(simple['path']) == len(full['path'])
+        assert simple['path'] == pytest.approx(full['path'], abs=1e-9)
+        assert simple['distance'] == pytest.approx(full['distance'], rel=1e-6)
@@ -0,0 +1,24 @@
+"""
+Production WSGI entry point
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Графыг master процесс worker-үүдийг fork хийхээс өмнө нэг удаа ачаална
+(preload_app). Worker-үүд санах ойн хуудсуудыг copy-on-write-р хуваалцах
+тул граф бүрт тусдаа хуулбар үүсэхгүй. Ачаалал амжилтгүй бол сервер эхлэхгүй.
+"""
+
+import gc
+
+import app as app_module
+from app import app, initialize_network
+
+initialize_network()
+
+# KD-tree, STRtree-г fork-с өмнө үүсгэснээр worker бүр өөрийн хуулбарыг
+# үүсгэхгүй, хуваалцана
+app_module.road_network.build_indexes()
+
+# Ачаалсан объектуудыг GC-н хяналтаас гаргах - worker-т GC эдгээрийг
+# тойрч гарахдаа хуудсуудыг бичиж, copy-on-write хуулбар үүсгэхгүй
+gc.freeze()